@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import aauthenticate
+from .pagination import PageOrCursorPagination
+from .sparse_fields import sparse_params, sparse_queryset
+from .views import ProjectViewSet, TaskViewSet, CommentViewSet
+from .visibility import scope_queryset
+
+
+# ------------------ ASYNC READ PATH ------------------
+# ASGI-native list/retrieve for projects, tasks and comments under /api/async/.
+# Each view borrows its queryset, serializer, filters, permissions and
+# pagination from the matching DRF viewset, so the body of a 200 matches
+# /api/<resource>/: same rows in the same order, ?fields=/?expand=, and page
+# numbers or ?pagination=cursor where the viewset offers it. Database work goes
+# through the async ORM (aget, acount, async iteration) instead of holding a
+# thread for the whole request; serialization runs on the event loop from
+# prefetched data. Not carried over: conditional requests and the response cache.
+
+async def acheck_permissions(request, view):
+    """
+    DRF permission checks. The viewsets' permission classes only look at
+    request.method and request.user, so they run on the event loop as they
+    are; object visibility is enforced by scoping the queryset instead.
+    """
+    for permission in view.get_permissions():
+        if not permission.has_permission(request, view):
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+class AsyncReadView(View):
+    viewset = None  # DRF viewset whose configuration is reused
+    http_method_names = ['get', 'head', 'options']
+
+    def __getattr__(self, name):
+        # Filter backends read filterset_class, search_fields, ... off the view
+        return getattr(self.viewset, name)
+
+    def get_permissions(self):
+        return [permission() for permission in self.viewset.permission_classes]
+
+    def get_queryset(self, request):
+        queryset = scope_queryset(self.viewset.queryset.all(), request.user, self.viewset.visibility_lookup)
+        if request.sparse_fields:
+            serializer = self.viewset.serializer_class(context={'sparse_fields': request.sparse_fields})
+            queryset = sparse_queryset(queryset, serializer)
+        return queryset
+
+    def render(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    async def get(self, request, pk=None):
+        drf_request = Request(request)
+        try:
+            drf_request.user, drf_request.auth = await aauthenticate(request, self.viewset.authentication_classes)
+            await acheck_permissions(drf_request, self)
+            fields, expand = sparse_params(drf_request, self.viewset.serializer_class)
+            drf_request.sparse_fields = (fields, expand) if fields is not None or expand else None
+            if pk is not None:
+                return await self.retrieve(drf_request, pk)
+            return await self.list(drf_request)
+        except exceptions.APIException as e:
+            # Same error bodies as the sync viewsets
+            response = api_settings.EXCEPTION_HANDLER(e, {'view': self, 'request': drf_request})
+            return self.render(response.data, status=response.status_code)
+
+    def filter_queryset(self, request, queryset):
+        for backend in self.viewset.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        return queryset
+
+    def serialize(self, request, data, many=False):
+        context = {'request': request, 'view': self}
+        if request.sparse_fields:
+            context['sparse_fields'] = request.sparse_fields
+        return self.viewset.serializer_class(data, many=many, context=context).data
+
+    async def retrieve(self, request, pk):
+        try:
+            instance = await self.get_queryset(request).aget(pk=pk)
+        except (self.viewset.queryset.model.DoesNotExist, ValueError):
+            raise exceptions.NotFound()
+        return self.render(self.serialize(request, instance))
+
+    async def list(self, request):
+        queryset = self.filter_queryset(request, self.get_queryset(request))
+        if issubclass(self.viewset.pagination_class, PageOrCursorPagination):
+            keyset = self.viewset.pagination_class().get_keyset(queryset, request)
+            if keyset:
+                rows = keyset.finish_page([obj async for obj in keyset.page_queryset(queryset, request)])
+                return self.render(keyset.get_paginated_response(self.serialize(request, rows, many=True)).data)
+
+        page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 10
+        try:
+            page = int(request.query_params.get('page', 1))
+        except ValueError:
+            page = 0
+        count = await queryset.acount()
+        last_page = max(1, -(-count // page_size))
+        if not 1 <= page <= last_page:
+            raise exceptions.NotFound("Invalid page.")
+
+        start = (page - 1) * page_size
+        rows = [obj async for obj in queryset[start:start + page_size]]
+
+        url = request.build_absolute_uri()
+        return self.render({
+            'count': count,
+            'next': replace_query_param(url, 'page', page + 1) if page < last_page else None,
+            'previous': (remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)) if page > 1 else None,
+            'results': self.serialize(request, rows, many=True),
+        })
+
+
+class AsyncProjectView(AsyncReadView):
+    viewset = ProjectViewSet
+
+
+class AsyncTaskView(AsyncReadView):
+    viewset = TaskViewSet
+
+
+class AsyncCommentView(AsyncReadView):
+    viewset = CommentViewSet
@@ -0,0 +1,375 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import RevokedToken
+
+
+def token_cache_setting(name):
+    defaults = {
+        'TTL': 300,             # Seconds a cached token is trusted in either tier
+        'MAX_SIZE': 10_000,     # Tokens kept in the in-process LRU
+        'SHARED_CACHE': 'default',  # CACHES alias shared by all workers (see core.checks)
+    }
+    return getattr(settings, 'TOKEN_AUTH_CACHE', {}).get(name, defaults[name])
+
+
+class TokenCache:
+    """
+    Two-tier cache of Token objects (with their user) keyed by token key.
+
+    The in-process tier is an LRU with a TTL. Unless SHARED_CACHE is None, tokens are
+    also stored there and every user carries a version stamp in the shared cache;
+    bumping the stamp (on user save or token deletion) invalidates the user's
+    entries in every process, not just the one that made the change.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (token, expires_at, user version)
+        self._keys_by_user = {}        # user id -> token keys in _entries
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = token_cache_setting('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    def _token_key(self, key):
+        return f'tms:auth-token:{key}'
+
+    def _version_key(self, user_id):
+        return f'tms:auth-user-version:{user_id}'
+
+    def _user_version(self, user_id):
+        return self.shared.get(self._version_key(user_id)) if self.shared else None
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            token, expires_at, version = entry
+            if expires_at > now and version == self._user_version(token.user_id):
+                return self._copy(token)
+            self.discard(key)
+
+        if self.shared:
+            cached = self.shared.get(self._token_key(key))
+            if cached is not None:
+                token, version = cached
+                if version == self._user_version(token.user_id):
+                    self._store_local(key, token, version)
+                    return self._copy(token)
+
+        return None
+
+    def set(self, key, token):
+        version = self._user_version(token.user_id)
+        if self.shared:
+            self.shared.set(self._token_key(key), (token, version), token_cache_setting('TTL'))
+        self._store_local(key, token, version)
+        return self._copy(token)
+
+    def _store_local(self, key, token, version):
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + token_cache_setting('TTL'), version)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(token.user_id, set()).add(key)
+            while len(self._entries) > token_cache_setting('MAX_SIZE'):
+                self._pop_local(next(iter(self._entries)))
+
+    def _pop_local(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[0].user_id, set())
+            keys.discard(key)
+            if not keys:
+                self._keys_by_user.pop(entry[0].user_id, None)
+
+    def _copy(self, token):
+        # Hand every request its own instances so nobody mutates the cached ones
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token
+
+    def discard(self, key):
+        with self._lock:
+            self._pop_local(key)
+        if self.shared:
+            self.shared.delete(self._token_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._pop_local(key)
+        if self.shared:
+            self.shared.set(self._version_key(user_id), uuid.uuid4().hex, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that serves repeat requests from token_cache instead of
+    joining authtoken_token and core_user on every call. Entries are invalidated
+    by the receivers in core.signals whenever a user is saved or a token deleted,
+    so role changes are seen by core.permissions on the very next request.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token = token_cache.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+    # Async counterparts for the ASGI read path (core.async_views) and change feed
+    async def aauthenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain invalid characters.'))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = await model.objects.select_related('user').aget(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            token = token_cache.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+# ------------------ JWT ------------------
+# Bearer access tokens carry the claims core.permissions and core.visibility
+# read (user id, username, role, is_superuser), so authenticating a request
+# touches neither authtoken_token nor core_user. Revocation is durable: every
+# user save and every logout stamps User.auth_changed_at, access tokens carry
+# the stamp they were issued under, and logged-out refresh tokens are stored
+# as RevokedToken rows. Stamps are cached in SHARED_CACHE, which every worker
+# sees at once (or per process for TTL seconds when it is None). Refreshing re-reads
+# the user, so a new access token always has the current role.
+
+def jwt_revocation_setting(name):
+    defaults = {
+        'TTL': 30,              # Seconds a worker trusts its cached stamp with SHARED_CACHE None
+        'SHARED_CACHE': 'default',  # CACHES alias shared by all workers (see core.checks)
+    }
+    return getattr(settings, 'JWT_REVOCATION', {}).get(name, defaults[name])
+
+
+VERSION_CLAIM = 'ver'
+DELETED_USER = 'deleted'  # Stamp of a user that no longer exists; matches no token
+
+
+def version_stamp(auth_changed_at):
+    """The 'ver' claim for a user's auth_changed_at (None until the user is first saved after migrating)."""
+    return int(auth_changed_at.timestamp() * 1_000_000) if auth_changed_at else None
+
+
+class RevocationList:
+    """
+    Decides whether a JWT has been revoked. Access tokens are compared with
+    their user's current stamp; refresh tokens (only seen on refresh, verify
+    and logout) are looked up in RevokedToken.
+    """
+
+    def __init__(self):
+        self._versions = {}  # user id -> (stamp, expires_at)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = jwt_revocation_setting('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    def _version_key(self, user_id):
+        return f'tms:jwt-user-version:{user_id}'
+
+    def user_version(self, user_id):
+        if self.shared:
+            cached = self.shared.get(self._version_key(user_id))
+            if cached is not None:
+                return cached[0]
+        else:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+        # Unknown here (another worker issued the token, or this one restarted)
+        rows = list(get_user_model().objects.filter(pk=user_id).values_list('auth_changed_at', flat=True)[:1])
+        stamp = version_stamp(rows[0]) if rows else DELETED_USER
+        self.remember(user_id, stamp)
+        return stamp
+
+    def remember(self, user_id, stamp):
+        if self.shared:
+            self.shared.set(self._version_key(user_id), (stamp,), None)
+            return
+        with self._lock:
+            self._versions[user_id] = (stamp, time.monotonic() + jwt_revocation_setting('TTL'))
+
+    def forget_user(self, user_id):
+        """Drop the cached stamp after auth_changed_at changed."""
+        with self._lock:
+            self._versions.pop(user_id, None)
+        if self.shared:
+            self.shared.delete(self._version_key(user_id))
+
+    def revoke_user(self, user_id):
+        """Void every access token issued to the user so far."""
+        get_user_model().objects.filter(pk=user_id).update(auth_changed_at=timezone.now())
+        self.forget_user(user_id)
+
+    def revoke(self, token):
+        """Revoke a refresh token until it expires."""
+        now = timezone.now()
+        RevokedToken.objects.filter(expires_at__lte=now).delete()
+        RevokedToken.objects.get_or_create(
+            jti=token[jwt_settings.JTI_CLAIM],
+            defaults={'expires_at': datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)},
+        )
+
+    def is_revoked(self, token):
+        if token.get(jwt_settings.TOKEN_TYPE_CLAIM) == 'access':
+            return token.get(VERSION_CLAIM) != self.user_version(token[jwt_settings.USER_ID_CLAIM])
+        return RevokedToken.objects.filter(jti=token.get(jwt_settings.JTI_CLAIM)).exists()
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+jwt_revocations = RevocationList()
+
+
+def add_user_claims(token, user):
+    """Claims read instead of the user row; see ClaimsUser."""
+    token['username'] = user.get_username()
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+    token[VERSION_CLAIM] = version_stamp(user.auth_changed_at)
+    jwt_revocations.remember(user.pk, token[VERSION_CLAIM])  # The user row was just read
+    return token
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user for JWT requests. pk, username, role and is_superuser come
+    from the token, so permission checks and scoped reads never load the user;
+    anything else (its email, assigning it to created_by) loads the row once.
+    """
+
+    def __init__(self, token):
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+        super().__init__(lambda: get_user_model().objects.get(pk=user_id))
+        self.__dict__['token'] = token
+
+    @property
+    def pk(self):
+        return self.token[jwt_settings.USER_ID_CLAIM]
+
+    id = pk
+
+    @property
+    def username(self):
+        return self.token['username']
+
+    @property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_superuser(self):
+        return self.token['is_superuser']
+
+    # Tokens are only issued to, and refreshed for, active users
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def get_username(self):
+        return self.username
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Authorization: Bearer <access token>, without a database lookup."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if jwt_revocations.is_revoked(token):
+            raise InvalidToken(_('Token has been revoked.'))
+        return token
+
+    def get_user(self, validated_token):
+        if 'role' not in validated_token:
+            raise InvalidToken(_('Token contained no role claim.'))
+        return ClaimsUser(validated_token)
+
+    # Used by core.async_views and core.feeds. A stamp this worker hasn't cached
+    # is read from core_user, which the async context can't do on the loop.
+    async def aauthenticate(self, request):
+        return await sync_to_async(self.authenticate)(request)
+
+
+# ------------------ ASYNC AUTHENTICATION ------------------
+async def aauthenticate(request, authentication_classes):
+    """
+    (user, auth) from the first of `authentication_classes` that recognises the
+    request, as DRF's Request does for sync views; (AnonymousUser, None) if none
+    does. Classes without an async `aauthenticate` are skipped.
+    """
+    for authentication_class in authentication_classes:
+        authenticator = authentication_class()
+        if hasattr(authenticator, 'aauthenticate'):
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                return result
+    return AnonymousUser(), None
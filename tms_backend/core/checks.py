@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .authentication import jwt_revocation_setting, token_cache_setting
+from .visibility import visibility_setting
+
+
+# ------------------ SHARED CACHES ------------------
+# Invalidations (user saves, deleted tokens, JWT revocations, membership
+# changes) reach other workers only through each setting's SHARED_CACHE alias.
+# It defaults to 'default', so configuring a Redis or Memcached
+# CACHES['default'] is enough; `manage.py check --deploy` fails while an alias
+# is unset or per process. A single-worker deployment can silence core.E001 in
+# SILENCED_SYSTEM_CHECKS.
+
+PER_PROCESS_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+SHARED_CACHE_SETTINGS = {
+    'TOKEN_AUTH_CACHE': lambda: token_cache_setting('SHARED_CACHE'),
+    'JWT_REVOCATION': lambda: jwt_revocation_setting('SHARED_CACHE'),
+    'VISIBILITY': lambda: visibility_setting('SHARED_CACHE'),
+}
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for name, alias in SHARED_CACHE_SETTINGS.items():
+        alias = alias()
+        backend = settings.CACHES.get(alias, {}).get('BACKEND') if alias else None
+        if backend and backend not in PER_PROCESS_BACKENDS:
+            continue
+        problem = f"is the per-process cache '{alias}'" if alias else "is not set"
+        errors.append(Error(
+            f"{name}['SHARED_CACHE'] {problem}, so other workers miss its invalidations.",
+            hint="Point it at a CACHES alias every worker shares (Redis, Memcached, database), "
+                 "or silence core.E001 when running a single worker.",
+            id='core.E001',
+        ))
+    return errors
@@ -0,0 +1,110 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import stats
+from .models import Comment, ProjectStat
+from .sync import record_deletions
+from .versioning import bump_collection
+
+
+# ------------------ COMMENT.PROJECT ------------------
+# Comment.project always equals comment.task.project. It is stored only so
+# project-scoped comment listings filter on an indexed column without joining
+# core_task; Comment.save() derives it and moving a task moves its comments.
+# Moved tasks and comments leave a tombstone under their old project, so delta
+# sync clients that can only see that project drop them (see core.sync).
+
+def move_comments(moves):
+    """
+    Point comments at their task's new project. `moves` maps task id -> new
+    project id for tasks that (may) have moved. Uses plain UPDATEs (no
+    per-comment signals), so the comment counters, tombstones and collection
+    version are handled here. Returns the number of comments moved.
+    """
+    if not moves:
+        return 0
+    deltas, by_project, left = Counter(), defaultdict(set), []
+    for pk, task_id, project_id in Comment.objects.filter(task_id__in=moves).values_list('id', 'task_id', 'project_id'):
+        if project_id != moves[task_id]:
+            deltas[(project_id, ProjectStat.COMMENTS, '')] -= 1
+            deltas[(moves[task_id], ProjectStat.COMMENTS, '')] += 1
+            by_project[moves[task_id]].add(task_id)
+            left.append((pk, project_id))
+    if not by_project:
+        return 0
+
+    now, moved = timezone.now(), 0
+    for project_id, task_ids in by_project.items():
+        moved += Comment.objects.filter(task_id__in=task_ids).exclude(project_id=project_id).update(
+            project_id=project_id, updated_at=now,
+        )
+    stats.apply_deltas(deltas)
+    record_deletions(Comment, left)
+    bump_collection(Comment)
+    return moved
+
+
+def left_projects(tasks):
+    """(task id, previous project id) for saved tasks known to have moved to another project."""
+    return [
+        (task.pk, task._loaded_values['project_id']) for task in tasks
+        if 'project_id' in (getattr(task, '_loaded_values', None) or {})
+        and task._loaded_values['project_id'] != task.project_id
+    ]
+
+
+def moved_tasks(tasks):
+    """task id -> project id for saved tasks whose project changed (or whose previous project is unknown)."""
+    moves = {}
+    for task in tasks:
+        loaded = getattr(task, '_loaded_values', None) or {}
+        if loaded.get('project_id', object()) != task.project_id:
+            moves[task.pk] = task.project_id
+    return moves
+
+
+def mismatched_comments():
+    """Comments whose stored project disagrees with their task's."""
+    return Comment.objects.exclude(project_id=F('task__project_id'))
+
+
+def repair_comment_projects(batch_size=1000, dry_run=False, log=None):
+    """
+    Fix Comment.project for rows written before it was derived from the task
+    (or by raw SQL). Works through the mismatches in primary key order, one
+    transaction per batch. Returns the number of comments repaired (or found,
+    with dry_run).
+    """
+    repaired, last_pk = 0, 0
+    while True:
+        batch = list(
+            mismatched_comments().filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', 'project_id', 'task__project_id')[:batch_size]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1][0]
+        repaired += len(batch)
+        if dry_run:
+            continue
+
+        deltas, by_project = Counter(), defaultdict(list)
+        for pk, old_project, new_project in batch:
+            deltas[(old_project, ProjectStat.COMMENTS, '')] -= 1
+            deltas[(new_project, ProjectStat.COMMENTS, '')] += 1
+            by_project[new_project].append(pk)
+        now = timezone.now()
+        with transaction.atomic():
+            for project_id, pks in by_project.items():
+                Comment.objects.filter(pk__in=pks).update(project_id=project_id, updated_at=now)
+            stats.apply_deltas(deltas)
+            record_deletions(Comment, [(pk, old_project) for pk, old_project, _ in batch])
+        if log:
+            log(f"  repaired {repaired} comments (up to id {last_pk})")
+
+    if repaired and not dry_run:
+        bump_collection(Comment)
+    return repaired
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import uuid
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from .models import Task, Comment
+
+
+def change_feed_setting(name):
+    defaults = {
+        'BROKER': 'core.events.InProcessBroker',  # Dotted path; swap in a broker shared by all workers
+        'HISTORY': 1000,          # Events kept per project for Last-Event-ID replay
+        'QUEUE_SIZE': 1000,       # Events buffered per subscriber before it is told to reset
+        'KEEPALIVE': 15,          # Seconds between keep-alive messages on idle streams
+    }
+    return getattr(settings, 'CHANGE_FEED', {}).get(name, defaults[name])
+
+
+Event = namedtuple('Event', ['id', 'type', 'data'])
+
+# Sent instead of a replay when the requested event is no longer (or never was)
+# in this broker's history; clients reload once and continue from its id.
+RESET = 'reset'
+
+
+# ------------------ BROKER ------------------
+class Subscription:
+    """Async iterator of Events for one channel, fed by the broker from any thread."""
+
+    def __init__(self, broker, channel, loop, backlog):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=change_feed_setting('QUEUE_SIZE'))
+        for event in backlog:
+            self.queue.put_nowait(event)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and ask the client to reload
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(self.broker.reset_event(self.channel))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def next(self, timeout):
+        """The next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.__anext__(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub within one process, with a bounded history per channel so clients
+    can resume from a Last-Event-ID. Event ids are "<epoch>-<sequence>"; the
+    epoch changes on every restart, so a stale id yields a reset event rather
+    than a silently incomplete replay.
+
+    Publishing is thread-safe (writes happen in sync views and worker threads);
+    events are handed to each subscriber's own event loop.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._history = {}       # channel -> deque of Events
+        self._subscribers = {}   # channel -> set of Subscriptions
+        self._lock = threading.Lock()
+
+    def _next_id(self):
+        self._sequence += 1
+        return f'{self.epoch}-{self._sequence}'
+
+    def _parse_id(self, event_id):
+        epoch, _, sequence = (event_id or '').partition('-')
+        return epoch, int(sequence) if sequence.isdigit() else None
+
+    def reset_event(self, channel):
+        with self._lock:
+            return Event(f'{self.epoch}-{self._sequence}', RESET, {'channel': channel})
+
+    def publish(self, channel, event_type, data):
+        with self._lock:
+            event = Event(self._next_id(), event_type, data)
+            history = self._history.setdefault(channel, deque(maxlen=change_feed_setting('HISTORY')))
+            history.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+        return event
+
+    def subscribe(self, channel, last_event_id=None):
+        """
+        Subscribe the running event loop to `channel`. With `last_event_id`,
+        everything published after it is replayed first, or a reset event is
+        queued when that point is no longer in the history.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            backlog = []
+            if last_event_id:
+                history = self._history.get(channel, ())
+                epoch, sequence = self._parse_id(last_event_id)
+                # Sequences are shared by all channels; only a full history may have dropped events
+                truncated = len(history) == change_feed_setting('HISTORY')
+                oldest = self._parse_id(history[0].id)[1] if history else 0
+                if epoch == self.epoch and sequence is not None and (not truncated or sequence >= oldest - 1):
+                    backlog = [event for event in history if self._parse_id(event.id)[1] > sequence]
+                else:
+                    backlog = [Event(f'{self.epoch}-{self._sequence}', RESET, {'channel': channel})]
+            subscription = Subscription(self, channel, loop, backlog)
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.channel, None)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(change_feed_setting('BROKER'))()
+        return _broker
+
+
+def project_channel(project_id):
+    return f'project:{project_id}'
+
+
+# ------------------ TASK / COMMENT EVENTS ------------------
+_datetime_field = serializers.DateTimeField()
+
+EVENT_FIELDS = {
+    Task: ['id', 'title', 'status', 'assigned_to_id', 'project_id', 'updated_at'],
+    Comment: ['id', 'content', 'task_id', 'project_id', 'user_id', 'created_at'],
+}
+
+
+def event_payload(instance):
+    payload = {}
+    for field in EVENT_FIELDS[type(instance)]:
+        value = getattr(instance, field)
+        name = field[:-3] if field.endswith('_id') and field != 'id' else field
+        payload[name] = _datetime_field.to_representation(value) if hasattr(value, 'isoformat') else value
+    return payload
+
+
+def saved_events(instance, created):
+    """(channel, type, data) for a saved task or comment; status changes get their own type."""
+    kind = 'task' if isinstance(instance, Task) else 'comment'
+    data = event_payload(instance)
+    previous = getattr(instance, '_loaded_values', None) or {}
+
+    if created:
+        event_type = f'{kind}.created'
+    elif kind == 'task' and 'status' in previous and previous['status'] != instance.status:
+        event_type = 'task.status_changed'
+        data['previous_status'] = previous['status']
+    else:
+        event_type = f'{kind}.updated'
+
+    events = [(project_channel(instance.project_id), event_type, data)]
+    # A task moved between projects is announced on both feeds
+    old_project = previous.get('project_id')
+    if not created and old_project is not None and old_project != instance.project_id:
+        events.append((project_channel(old_project), event_type, data))
+    return events
+
+
+def deleted_events(instance):
+    kind = 'task' if isinstance(instance, Task) else 'comment'
+    return [(project_channel(instance.project_id), f'{kind}.deleted', {'id': instance.pk, 'project': instance.project_id})]
+
+
+def publish_on_commit(events):
+    """Publish once the surrounding transaction commits, so rolled back writes are never announced."""
+    if events:
+        transaction.on_commit(lambda: [get_broker().publish(*event) for event in events])
@@ -0,0 +1,110 @@
+import csv
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+from .models import Project, Task, Comment
+
+
+# ------------------ STREAMING EXPORT ------------------
+# Columns exported per model. Foreign keys are exported as ids, and projects also
+# get a `user_ids` column. The names match the API serializers.
+EXPORT_FIELDS = {
+    Project: ['id', 'name', 'description', 'created_at', 'updated_at', 'created_by'],
+    Task: ['id', 'title', 'description', 'status', 'assigned_to', 'project', 'created_by', 'created_at', 'updated_at'],
+    Comment: ['id', 'content', 'task', 'project', 'user', 'created_by', 'created_at', 'updated_at'],
+}
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+_datetime_field = serializers.DateTimeField()
+
+
+def export_columns(model):
+    return EXPORT_FIELDS[model] + (['user_ids'] if model is Project else [])
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Yield one dict per row using a values() projection streamed with
+    iterator(chunk_size), so memory stays flat whatever the table size.
+    """
+    model = queryset.model
+    fields = EXPORT_FIELDS[model]
+    rows = (
+        queryset
+        .select_related(None).prefetch_related(None)
+        .order_by('id')
+        .values(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        if model is Project:
+            attach_user_ids(chunk)
+        for row in chunk:
+            row['created_at'] = _datetime_field.to_representation(row['created_at'])
+            row['updated_at'] = _datetime_field.to_representation(row['updated_at'])
+            yield row
+
+
+def attach_user_ids(rows):
+    """Add `user_ids` to a chunk of project rows with one query on the membership table."""
+    Membership = Project.users.through
+    user_ids = {row['id']: [] for row in rows}
+    memberships = (
+        Membership.objects
+        .filter(project_id__in=list(user_ids))
+        .order_by('project_id', 'user_id')
+        .values_list('project_id', 'user_id')
+    )
+    for project_id, user_id in memberships:
+        user_ids[project_id].append(user_id)
+    for row in rows:
+        row['user_ids'] = user_ids[row['id']]
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            ';'.join(map(str, row[col])) if isinstance(row[col], list) else row[col]
+            for col in columns
+        ])
+
+
+def export_lines(queryset, output, chunk_size=2000):
+    rows = export_rows(queryset, chunk_size=chunk_size)
+    if output == 'csv':
+        return csv_lines(rows, export_columns(queryset.model))
+    return ndjson_lines(rows)
+
+
+def export_response(queryset, output, filename, chunk_size=2000):
+    response = StreamingHttpResponse(
+        export_lines(queryset, output, chunk_size=chunk_size),
+        content_type=EXPORT_CONTENT_TYPES[output],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -0,0 +1,156 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .metrics import timed_serialization
+from .sparse_fields import KEY_FIELDS
+
+
+def fast_serialization_setting(name):
+    defaults = {
+        'ENABLED': True,  # Serve list endpoints from values() rows
+    }
+    return getattr(settings, 'FAST_SERIALIZATION', {}).get(name, defaults[name])
+
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.ChoiceField, serializers.ReadOnlyField,
+)
+
+
+# ------------------ VALUES PLAN ------------------
+class ValuesPlan:
+    """
+    How to build a serializer's read representation straight from
+    queryset.values() rows: the columns to select and, per output field, the
+    column it comes from and the field's to_representation when the raw value
+    needs converting (datetimes). Expanded foreign keys (?expand=) are read
+    through joined columns; many-to-many fields rendered by a nested
+    serializer (Project.users) are loaded with one query over the through
+    table, ordered by the related primary key like the prefetch they replace.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.name
+        self.fields = []   # (output name, column or None for nested, converter or None)
+        self.related = {}  # output name -> child ValuesPlan of an expanded foreign key
+        self.nested = {}   # output name -> (m2m field, child ValuesPlan)
+        columns = [self.pk] + [name for name in KEY_FIELDS if name in {f.name for f in self.model._meta.concrete_fields}]
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            model_field = self.model._meta.get_field(field.source)
+            if isinstance(field, serializers.ListSerializer):
+                if not model_field.many_to_many:
+                    raise ImproperlyConfigured(f"{type(serializer).__name__}.{name}: only many-to-many nesting is supported")
+                self.nested[name] = (model_field, ValuesPlan(type(field.child)()))
+                self.fields.append((name, None, None))
+            elif isinstance(field, serializers.RelatedField):
+                # values('fk') yields the related primary key
+                columns.append(field.source)
+                self.fields.append((name, field.source, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                if not model_field.many_to_one:
+                    raise ImproperlyConfigured(f"{type(serializer).__name__}.{name}: nested serializers need a foreign key or many-to-many source")
+                child = self.related[name] = ValuesPlan(type(field)())
+                columns += [f'{field.source}__{column}' for column in child.columns]
+                self.fields.append((name, None, None))
+            else:
+                columns.append(field.source)
+                self.fields.append((name, field.source, None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation))
+        self.columns = list(dict.fromkeys(columns))
+
+    def load_nested(self, ids):
+        """output name -> {pk: [child representations]}"""
+        loaded = {}
+        for name, (field, child) in self.nested.items():
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            rows = (
+                field.remote_field.through.objects
+                .filter(**{f'{source}_id__in': ids})
+                .order_by(f'{target}_id')
+                .values_list(f'{source}_id', *[f'{target}__{column}' for column in child.columns])
+            )
+            by_owner = defaultdict(list)
+            for owner, *values in rows:
+                by_owner[owner].append(dict(zip(child.columns, values)))
+            loaded[name] = {owner: child.represent(children) for owner, children in by_owner.items()}
+        return loaded
+
+    def represent_related(self, name, row):
+        child = self.related[name]
+        values = {column: row[f'{name}__{column}'] for column in child.columns}
+        return None if values[child.pk] is None else child.represent([values])[0]
+
+    def represent(self, rows):
+        """Representations of `rows` (dicts of self.columns), in order."""
+        rows = list(rows)
+        nested = self.load_nested([row[self.pk] for row in rows]) if self.nested and rows else {}
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.fields:
+                if column is None:
+                    if name in self.related:
+                        item[name] = self.represent_related(name, row)
+                    else:
+                        item[name] = nested.get(name, {}).get(row[self.pk], [])
+                    continue
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+
+class ValuesSerializerMixin:
+    """
+    Read-only fast mode for a ModelSerializer: `values_data(queryset)` returns
+    the same dicts as `Serializer(queryset, many=True).data` without creating a
+    model instance or walking the field tree per row. Pass `sparse` =
+    (fields, expand) to mirror context['sparse_fields'] (core.sparse_fields).
+    """
+
+    @classmethod
+    def values_plan(cls, sparse=None):
+        plans = cls.__dict__.get('_values_plans')
+        if plans is None:
+            plans = cls._values_plans = {}
+        if sparse not in plans:
+            context = {'sparse_fields': sparse} if sparse else {}
+            plans[sparse] = ValuesPlan(cls(context=context))
+        return plans[sparse]
+
+    @classmethod
+    def values_data(cls, queryset, sparse=None):
+        plan = cls.values_plan(sparse)
+        with timed_serialization():
+            return plan.represent(queryset.select_related(None).prefetch_related(None).values(*plan.columns))
+
+
+# ------------------ VIEWSET LIST ------------------
+class FastListMixin:
+    """
+    Serves list() from values() rows through the serializer's ValuesPlan when
+    FAST_SERIALIZATION['ENABLED'] is on; same filters, ordering, pagination and
+    output as ModelViewSet.list. Goes after ConditionalGetMixin in the bases.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if not fast_serialization_setting('ENABLED') or not issubclass(serializer_class, ValuesSerializerMixin):
+            return super().list(request, *args, **kwargs)
+
+        plan = serializer_class.values_plan(self.get_serializer_context().get('sparse_fields'))
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        rows = queryset.values(*plan.columns)
+        page = self.paginate_queryset(rows)
+        with timed_serialization():
+            if page is not None:
+                return self.get_paginated_response(plan.represent(page))
+            return Response(plan.represent(rows))
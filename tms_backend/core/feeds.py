@@ -0,0 +1,186 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions
+
+from .authentication import aauthenticate
+from .events import change_feed_setting, get_broker, project_channel
+from .models import Project
+from .views import ProjectViewSet
+from .visibility import is_scoped, scope_queryset, visible_project_ids
+
+
+# ------------------ SHARED ------------------
+class FeedError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def credentials(authorization, query):
+    """
+    A request carrying the feed's credentials for the API's authentication
+    classes: the Authorization header, or, since browsers can't set headers on
+    EventSource or WebSocket, ?token= (API token) or ?access_token= (JWT access token).
+    """
+    if not authorization and query.get('token'):
+        authorization = f"Token {query['token']}"
+    elif not authorization and query.get('access_token'):
+        authorization = f"Bearer {query['access_token']}"
+    request = HttpRequest()
+    if authorization:
+        request.META['HTTP_AUTHORIZATION'] = authorization
+    return request
+
+
+async def authenticate(request):
+    """The user the viewsets would see for `request`, or raises FeedError."""
+    try:
+        user, _ = await aauthenticate(request, ProjectViewSet.authentication_classes)
+    except exceptions.AuthenticationFailed as e:
+        # JWT errors carry a dict of details
+        detail = e.detail.get('detail', e.detail) if isinstance(e.detail, dict) else e.detail
+        raise FeedError(401, str(detail))
+    if not user.is_authenticated:
+        raise FeedError(401, "Authentication credentials were not provided.")
+    return user
+
+
+async def open_feed(project_id, request, last_event_id=None):
+    """
+    Authenticate, check the project exists and is visible to the user, and
+    subscribe to its channel. Returns (user, subscription).
+    """
+    user = await authenticate(request)
+    if not await scope_queryset(Project.objects.filter(pk=project_id), user, 'id').aexists():
+        raise FeedError(404, "Not found.")
+    return user, get_broker().subscribe(project_channel(project_id), last_event_id=last_event_id or None)
+
+
+async def still_visible(user, project_id):
+    """
+    Checked before each event is delivered, so a member removed from the
+    project stops receiving it. The project-id set is cached and invalidated
+    on membership changes (see core.visibility).
+    """
+    if not is_scoped(user):
+        return True
+    return project_id in await sync_to_async(visible_project_ids)(user)
+
+
+def ends_feed(event):
+    """The project itself was deleted; nothing follows this event."""
+    return event.type == 'project.deleted'
+
+
+# ------------------ SERVER-SENT EVENTS ------------------
+def sse_message(event):
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+
+async def sse_stream(subscription, user, project_id):
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.next(timeout=change_feed_setting('KEEPALIVE'))
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            if not await still_visible(user, project_id):
+                return
+            yield sse_message(event)
+            if ends_feed(event):
+                return
+    finally:
+        subscription.close()
+
+
+async def project_events(request, project_id):
+    """
+    GET /api/projects/{id}/events/ -> text/event-stream of task and comment
+    changes in the project. Resume with the Last-Event-ID header (sent
+    automatically by EventSource) or ?last_event_id=. Authenticated like the
+    API (token or JWT; see credentials()). The stream ends when the user can
+    no longer see the project or it is deleted; EventSource's reconnect then
+    gets a 404 and stops. Needs an ASGI server; under WSGI each open stream
+    would hold a worker.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        user, subscription = await open_feed(
+            project_id, credentials(request.headers.get('Authorization'), request.GET), last_event_id,
+        )
+    except FeedError as e:
+        return JsonResponse({'detail': e.detail}, status=e.status)
+
+    response = StreamingHttpResponse(sse_stream(subscription, user, project_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+# ------------------ WEBSOCKET ------------------
+WEBSOCKET_PATH = re.compile(r'^/ws/projects/(?P<project_id>\d+)/$')
+
+
+def websocket_message(event):
+    return json.dumps({'id': event.id, 'type': event.type, 'data': event.data})
+
+
+async def websocket_application(scope, receive, send):
+    """
+    Raw ASGI app for ws://.../ws/projects/{id}/?token=...&last_event_id=...
+    Sends each event as {"id", "type", "data"}; messages from the client are
+    ignored. Closes with 4401/4404 when authentication or the project lookup
+    fails, 4403 once the user can no longer see the project and 4404 after
+    a project.deleted event.
+    """
+    match = WEBSOCKET_PATH.match(scope['path'])
+    query = {name: values[0] for name, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    headers = {name.decode().lower(): value.decode() for name, value in scope.get('headers', [])}
+
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if match is None:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    project_id = int(match['project_id'])
+    try:
+        user, subscription = await open_feed(
+            project_id, credentials(headers.get('authorization'), query), query.get('last_event_id'),
+        )
+    except FeedError as e:
+        await send({'type': 'websocket.close', 'code': 4000 + e.status})
+        return
+
+    await send({'type': 'websocket.accept'})
+    receiving = asyncio.ensure_future(receive())
+    try:
+        while True:
+            waiting = asyncio.ensure_future(subscription.__anext__())
+            done, _ = await asyncio.wait({receiving, waiting}, return_when=asyncio.FIRST_COMPLETED)
+            if waiting in done:
+                event = waiting.result()
+                if not await still_visible(user, project_id):
+                    await send({'type': 'websocket.close', 'code': 4403})
+                    break
+                await send({'type': 'websocket.send', 'text': websocket_message(event)})
+                if ends_feed(event):
+                    await send({'type': 'websocket.close', 'code': 4404})
+                    break
+            else:
+                waiting.cancel()
+            if receiving in done:
+                if receiving.result()['type'] == 'websocket.disconnect':
+                    break
+                receiving = asyncio.ensure_future(receive())
+    finally:
+        receiving.cancel()
+        subscription.close()
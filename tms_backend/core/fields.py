@@ -0,0 +1,94 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves ids from objects preloaded into the
+    serializer context (see prefetch_related_pks) instead of one SELECT per value.
+    Falls back to the regular lookup when nothing was preloaded for its model.
+    With many=True it becomes a BatchedManyRelatedField.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {key: value for key, value in kwargs.items() if key in MANY_RELATION_KWARGS}
+        return BatchedManyRelatedField(child_relation=cls(*args, **kwargs), **list_kwargs)
+
+    def to_pk(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+
+        pk = self.to_pk(data)
+        if pk not in prefetched:
+            self.fail('does_not_exist', pk_value=data)
+        return prefetched[pk]
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """
+    List of primary keys resolved with one IN query (or from the preloaded
+    objects) instead of one SELECT per id. Every missing id is reported in a
+    single error; order and duplicates of the input are kept.
+    """
+    default_error_messages = {
+        'does_not_exist': _('Invalid pk(s) {pk_values} - object(s) do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        pks = [child.to_pk(item) for item in data]
+        objects = self.context.get('prefetched', {}).get(child.get_queryset().model)
+        if objects is None:
+            objects = child.get_queryset().in_bulk(set(pks)) if pks else {}
+        missing = [item for item, pk in zip(data, pks) if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_values=list(dict.fromkeys(missing)))
+        return [objects[pk] for pk in pks]
+
+
+def prefetch_related_pks(serializer, items):
+    """
+    Load every object referenced by the serializer's PrefetchedPrimaryKeyRelatedFields
+    (single or many=True) across all `items` with one IN query per related model. Returns a mapping of
+    model -> {pk: instance} for the serializer context's 'prefetched' key.
+    """
+    querysets, pks = {}, {}
+    for name, field in serializer.fields.items():
+        many = isinstance(field, BatchedManyRelatedField)
+        if many:
+            field = field.child_relation
+        if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+            continue
+        queryset = field.get_queryset()
+        querysets.setdefault(queryset.model, queryset)
+        for item in items:
+            if not isinstance(item, dict) or item.get(name) in (None, ''):
+                continue
+            values = item[name] if many and isinstance(item[name], list) else [item[name]]
+            for value in values:
+                try:
+                    pks.setdefault(queryset.model, set()).add(queryset.model._meta.pk.to_python(value))
+                except (TypeError, ValueError, DjangoValidationError):
+                    continue  # Reported by the field during validation
+
+    return {
+        model: queryset.in_bulk(list(pks.get(model, ())))
+        for model, queryset in querysets.items()
+    }
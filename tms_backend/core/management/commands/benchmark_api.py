@@ -0,0 +1,285 @@
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+
+import django
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from core.models import User, Project, Task, Comment
+from core.serializers import ClaimsTokenObtainPairSerializer
+from core.sync import changes_since
+from core.urls import router
+from core.utils.benchmark import throwaway_database, seed_dataset, summarize, wsgi_request, run_threaded, QueryCounter
+
+PASSWORD = 'Bench-password-1'
+ASYNC_RESOURCES = ['projects', 'tasks', 'comments']  # Served under /api/async/ too
+
+
+def fixed(path, body=None):
+    """Every request sends the same path and body."""
+    return lambda count: lambda: (path, body)
+
+
+def numbered(path, body):
+    """Request n sends body(n), e.g. a username nobody has taken yet."""
+    def prepare(count):
+        numbers = itertools.count()
+        return lambda: (path, body(next(numbers)))
+    return prepare
+
+
+def fresh(make, path=None, body=None):
+    """
+    Each request uses its own value from make(), prepared before the clock
+    starts: a row to update or delete (its id goes into `path`), or a token.
+    """
+    def prepare(count):
+        values = iter([make() for _ in range(count)])
+        if path:
+            return lambda: (path.format(id=next(values).pk), body)
+        return lambda: (None, body(next(values)))
+    return prepare
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, drive the API (router reads and writes, sync, "
+        "auth and the async views) with concurrent clients and report latency "
+        "percentiles, throughput and query counts as JSON. Pass --compare with an "
+        "earlier report to flag regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--tasks', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=10_000)
+        parser.add_argument('--members-per-project', type=int, default=5)
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent clients (threads).")
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help="Only endpoints whose name contains this (repeatable).")
+        parser.add_argument('--response-cache', action='store_true', help="Keep the response cache on (off by default so every request does the work).")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--compare', help="Earlier JSON report to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p95 slowdown ratio before --compare fails (default 0.2).")
+
+    def handle(self, *args, **options):
+        cache = {} if options['response_cache'] else {'RESPONSE_CACHE': {'ENABLED': False}}
+        with throwaway_database(), override_settings(**cache):
+            self.stderr.write(f"Seeding {options['tasks']} tasks and {options['comments']} comments...")
+            users, _ = seed_dataset(
+                users=options['users'], projects=options['projects'],
+                tasks=options['tasks'], comments=options['comments'],
+                members_per_project=options['members_per_project'],
+                log=self.stderr.write,
+            )
+            # seed_dataset bypasses signals: build the counters and search index it skipped
+            call_command('rebuild_project_stats', stdout=self.stderr)
+            call_command('rebuild_search_index', stdout=self.stderr)
+
+            admin = users[0]
+            admin.role = User.ADMIN
+            admin.set_password(PASSWORD)
+            admin.save()
+            headers = {'Authorization': f'Token {Token.objects.create(user=admin).key}'}
+            endpoints = self.endpoints(admin, options['endpoints'])
+            results = {}
+            for name, (method, path, prepare) in endpoints.items():
+                # SQLite has one writer at a time, and its in-memory test database fails
+                # concurrent writers ("table is locked") instead of making them wait
+                serial = method != 'GET' and connection.vendor == 'sqlite'
+                concurrency = 1 if serial else options['concurrency']
+                self.stderr.write(f"  {name}: {method} {path}")
+                results[name] = self.measure(method, path, prepare, headers, options['requests'], concurrency)
+
+        report = {'meta': self.meta(options), 'endpoints': results}
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['compare']:
+            self.compare(report, options['compare'], options['tolerance'])
+
+    def endpoints(self, admin, only):
+        """
+        name -> (method, path, prepare). prepare(n) is called before an endpoint
+        is measured and returns a function giving the (path, body) of each of
+        its n requests. Reads come first, then sync and auth, then the writes,
+        so the rows the writes add don't change what the reads measure. The SSE
+        feed (/api/projects/{id}/events/) is left out: its response is a stream
+        that never ends, so it has no latency to measure.
+        """
+        endpoints = {}
+        for prefix, viewset, basename in router.registry:
+            pk = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+            endpoints[f'{basename}-list'] = ('GET', f'/api/{prefix}/', fixed(f'/api/{prefix}/'))
+            endpoints[f'{basename}-retrieve'] = ('GET', f'/api/{prefix}/{pk}/', fixed(f'/api/{prefix}/{pk}/'))
+            for extra in viewset.get_extra_actions():
+                if 'get' not in extra.mapping:
+                    continue
+                base = f'/api/{prefix}/{pk}/' if extra.detail else f'/api/{prefix}/'
+                path = f'{base}{extra.url_path}/'
+                endpoints[f'{basename}-{extra.__name__}'] = ('GET', path, fixed(path))
+            if prefix in ASYNC_RESOURCES:
+                # The async views under WSGI, as a deployment without an ASGI server runs them
+                # (benchmark_async compares them under both)
+                endpoints[f'async-{basename}-list'] = ('GET', f'/api/async/{prefix}/', fixed(f'/api/async/{prefix}/'))
+                endpoints[f'async-{basename}-retrieve'] = (
+                    'GET', f'/api/async/{prefix}/{pk}/', fixed(f'/api/async/{prefix}/{pk}/'),
+                )
+
+        # A delta sync measured before any write returns no rows; sync-full returns them all
+        watermark = changes_since(admin, None)['watermark']
+        endpoints['sync-full'] = ('GET', '/api/sync/', fixed('/api/sync/'))
+        endpoints['sync-delta'] = ('GET', '/api/sync/?since=...', fixed(f'/api/sync/?since={watermark}'))
+        endpoints['metrics'] = ('GET', '/api/_metrics/', fixed('/api/_metrics/'))
+
+        refresh = ClaimsTokenObtainPairSerializer.get_token(admin)
+        credentials = {'username': admin.username, 'password': PASSWORD}
+        endpoints['auth-profile'] = ('GET', '/api/auth/profile/', fixed('/api/auth/profile/'))
+        endpoints['auth-login'] = ('POST', '/api/auth/login/', fixed('/api/auth/login/', credentials))
+        endpoints['auth-register'] = ('POST', '/api/auth/register/', numbered('/api/auth/register/', lambda n: {
+            'username': f'bench_new_{n}', 'email': f'bench_new_{n}@example.com',
+            'password': PASSWORD, 'password2': PASSWORD,
+        }))
+        endpoints['jwt-login'] = ('POST', '/api/auth/jwt/login/', fixed('/api/auth/jwt/login/', credentials))
+        endpoints['jwt-refresh'] = (
+            'POST', '/api/auth/jwt/refresh/', fixed('/api/auth/jwt/refresh/', {'refresh': str(refresh)}),
+        )
+        endpoints['jwt-verify'] = (
+            'POST', '/api/auth/jwt/verify/', fixed('/api/auth/jwt/verify/', {'token': str(refresh.access_token)}),
+        )
+        # Last among the auth endpoints: logging out revokes the admin's access tokens
+        endpoints['jwt-logout'] = ('POST', '/api/auth/jwt/logout/', fresh(
+            lambda: str(ClaimsTokenObtainPairSerializer.get_token(admin)), body=lambda token: {'refresh': token},
+        ))
+
+        endpoints.update(self.write_endpoints(admin))
+        if only:
+            endpoints = {name: endpoint for name, endpoint in endpoints.items() if any(part in name for part in only)}
+        return endpoints
+
+    def write_endpoints(self, admin):
+        """Create, patch and delete for projects, tasks and comments; patch and delete each get fresh rows."""
+        project = Project.objects.order_by('pk').first()
+        task = Task.objects.filter(project=project).order_by('pk').first()
+        numbers = itertools.count()
+
+        def new_project():
+            return Project.objects.create(name=f'Bench write {next(numbers)}', description='', created_by=admin)
+
+        def new_task():
+            return Task.objects.create(
+                title=f'Bench write {next(numbers)}', project=project, assigned_to=admin, created_by=admin,
+            )
+
+        def new_comment():
+            return Comment.objects.create(
+                content=f'Bench write {next(numbers)}', task=task, user=admin, created_by=admin,
+            )
+
+        return {
+            'project-create': ('POST', '/api/projects/', numbered('/api/projects/', lambda n: {
+                'name': f'Bench create {n}', 'description': 'Created by benchmark_api', 'user_ids': [admin.pk],
+            })),
+            'project-partial_update': (
+                'PATCH', '/api/projects/{id}/', fresh(new_project, '/api/projects/{id}/', {'description': 'Patched'}),
+            ),
+            'project-destroy': ('DELETE', '/api/projects/{id}/', fresh(new_project, '/api/projects/{id}/')),
+            'task-create': ('POST', '/api/tasks/', numbered('/api/tasks/', lambda n: {
+                'title': f'Bench create {n}', 'project': project.pk, 'assigned_to': admin.pk, 'created_by': admin.pk,
+            })),
+            'task-partial_update': (
+                'PATCH', '/api/tasks/{id}/', fresh(new_task, '/api/tasks/{id}/', {'status': 'done'}),
+            ),
+            'task-destroy': ('DELETE', '/api/tasks/{id}/', fresh(new_task, '/api/tasks/{id}/')),
+            'comment-create': ('POST', '/api/comments/', numbered('/api/comments/', lambda n: {
+                'content': f'Bench create {n}', 'task': task.pk,
+            })),
+            'comment-partial_update': (
+                'PATCH', '/api/comments/{id}/', fresh(new_comment, '/api/comments/{id}/', {'content': 'Patched'}),
+            ),
+            'comment-destroy': ('DELETE', '/api/comments/{id}/', fresh(new_comment, '/api/comments/{id}/')),
+        }
+
+    def measure(self, method, path, prepare, headers, total, concurrency):
+        app = WSGIHandler()
+        query_counts = []
+        next_request = prepare(total + 1)
+
+        def request():
+            url, body = next_request()
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                status = wsgi_request(app, method, url or path, headers, body)
+            query_counts.append(counter.count)
+            return status
+
+        request()  # Warm up the token cache and connections
+        query_counts.clear()
+        elapsed, latencies, failed = run_threaded(request, total, concurrency)
+        return {
+            'method': method,
+            'path': path,
+            'requests': total,
+            'concurrency': concurrency,
+            'errors': failed,
+            'throughput_rps': round(total / elapsed, 1),
+            **summarize(latencies),
+            'queries': {
+                'min': min(query_counts),
+                'max': max(query_counts),
+                'mean': round(statistics.fmean(query_counts), 2),
+            },
+        }
+
+    def meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {key: options[key] for key in ('users', 'projects', 'tasks', 'comments', 'members_per_project')},
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'response_cache': options['response_cache'],
+        }
+
+    def compare(self, report, baseline_path, tolerance):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('dataset') != report['meta']['dataset']:
+            self.stderr.write(self.style.WARNING("Baseline was measured on a different dataset."))
+
+        regressions = []
+        for name, result in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+            line = (
+                f"{name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms ({change:+.0%}), "
+                f"queries {before['queries']['max']} -> {result['queries']['max']}"
+            )
+            if change > tolerance or result['queries']['max'] > before['queries']['max']:
+                regressions.append(name)
+                self.stderr.write(self.style.ERROR(line))
+            else:
+                self.stderr.write(line)
+        if regressions:
+            raise CommandError(f"Regressions against {baseline_path}: {', '.join(regressions)}")
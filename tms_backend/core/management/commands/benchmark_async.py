@@ -0,0 +1,61 @@
+import asyncio
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from core.utils.benchmark import (
+    throwaway_database, seed_dataset, summarize, wsgi_get, asgi_get, run_threaded, run_concurrent,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare throughput and latency of the sync "
+        "viewsets under WSGI and ASGI with the async read path under ASGI, at "
+        "several client concurrencies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resource', choices=['projects', 'tasks', 'comments'], default='tasks')
+        parser.add_argument('--query', default='', help="Query string added to every request, e.g. 'status=todo'.")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--requests', type=int, default=500, help="Requests per scenario and concurrency.")
+        parser.add_argument('--tasks', type=int, default=20_000)
+        parser.add_argument('--comments', type=int, default=20_000)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--users', type=int, default=100)
+
+    def handle(self, *args, **options):
+        query = f"?{options['query']}" if options['query'] else ''
+        # Every request must reach the database, not the response cache
+        with throwaway_database(), override_settings(RESPONSE_CACHE={'ENABLED': False}):
+            self.stdout.write(f"Seeding {options['tasks']} tasks and {options['comments']} comments...")
+            users, _ = seed_dataset(
+                users=options['users'], projects=options['projects'],
+                tasks=options['tasks'], comments=options['comments'],
+                log=self.stdout.write,
+            )
+            headers = {'Authorization': f'Token {Token.objects.create(user=users[0]).key}'}
+            wsgi, asgi = WSGIHandler(), ASGIHandler()
+            sync_path = f"/api/{options['resource']}/{query}"
+            async_path = f"/api/async/{options['resource']}/{query}"
+
+            scenarios = {
+                f'WSGI  {sync_path}': lambda total, n: run_threaded(lambda: wsgi_get(wsgi, sync_path, headers), total, n),
+                f'ASGI  {sync_path}': lambda total, n: asyncio.run(run_concurrent(lambda: asgi_get(asgi, sync_path, headers), total, n)),
+                f'ASGI  {async_path}': lambda total, n: asyncio.run(run_concurrent(lambda: asgi_get(asgi, async_path, headers), total, n)),
+            }
+            for name, run in scenarios.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+                run(min(20, options['requests']), 1)  # Warm up caches and connections
+                for concurrency in options['concurrency']:
+                    elapsed, latencies, failed = run(options['requests'], concurrency)
+                    result = summarize(latencies)
+                    line = (
+                        f"  clients={concurrency:<4} {len(latencies) / elapsed:8.1f} req/s  "
+                        f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms"
+                    )
+                    self.stdout.write(line + (self.style.ERROR(f"  failed={failed}") if failed else ''))
@@ -0,0 +1,72 @@
+import statistics
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from core.authentication import token_cache
+from core.serializers import ClaimsTokenObtainPairSerializer
+from core.utils.benchmark import throwaway_database, seed_dataset, summarize, wsgi_get, run_threaded, QueryCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare requests/sec of the same endpoint "
+        "authenticated with a DB-checked token, a cached token and a JWT access token."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tasks/?fields=id', help="Endpoint every request GETs.")
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per scenario and concurrency.")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--tasks', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Responses come from the response cache, so what differs is authentication
+        with throwaway_database():
+            users, _ = seed_dataset(
+                users=options['users'], projects=options['projects'], tasks=options['tasks'], log=self.stdout.write,
+            )
+            user = users[0]
+            token = {'Authorization': f'Token {Token.objects.create(user=user).key}'}
+            access = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+            bearer = {'Authorization': f'Bearer {access}'}
+
+            scenarios = {
+                'token, DB lookup': (token, {'TOKEN_AUTH_CACHE': {'TTL': 0}}),
+                'token, cached': (token, {}),
+                'JWT': (bearer, {}),
+            }
+            self.stdout.write(f"GET {options['path']}")
+            for name, (headers, overrides) in scenarios.items():
+                token_cache.clear()
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+                with override_settings(**overrides):
+                    for concurrency in options['concurrency']:
+                        self.stdout.write(self.measure(options['path'], headers, options['requests'], concurrency))
+
+    def measure(self, path, headers, total, concurrency):
+        app = WSGIHandler()
+        query_counts = []
+
+        def request():
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                status = wsgi_get(app, path, headers)
+            query_counts.append(counter.count)
+            return status
+
+        for _ in range(20):  # Warm up caches and connections
+            request()
+        query_counts.clear()
+        elapsed, latencies, failed = run_threaded(request, total, concurrency)
+        result = summarize(latencies)
+        line = (
+            f"  clients={concurrency:<4} {total / elapsed:8.1f} req/s  "
+            f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms  queries/request={statistics.fmean(query_counts):.2f}"
+        )
+        return line + (self.style.ERROR(f"  failed={failed}") if failed else '')
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+
+from core.models import Task, Comment
+from core.views import TaskViewSet, TaskFilter, CommentViewSet, CommentFilter
+from core.utils.benchmark import throwaway_database, seed_dataset, time_call, summarize
+
+
+# Indexes added for the TaskFilter / CommentFilter access paths. They replace the
+# single-column foreign key indexes, which the "without" runs put back.
+FILTER_INDEXES = {
+    Task: ['core_task_proj_status_idx', 'core_task_assignee_status_idx'],
+    Comment: ['core_comment_task_created_idx', 'core_comment_proj_created_idx'],
+}
+FOREIGN_KEY_INDEXES = {
+    Task: [models.Index(fields=['project'], name='bench_task_project'), models.Index(fields=['assigned_to'], name='bench_task_assignee')],
+    Comment: [models.Index(fields=['task'], name='bench_comment_task'), models.Index(fields=['project'], name='bench_comment_project')],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and report EXPLAIN plans and latencies of the "
+        "task/comment list filters (as the API builds them) with the composite "
+        "indexes and with plain foreign key indexes instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=200_000)
+        parser.add_argument('--projects', type=int, default=1_000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query.")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['tasks']} tasks and {options['comments']} comments...")
+            users, projects = seed_dataset(
+                users=options['users'], projects=options['projects'],
+                tasks=options['tasks'], comments=options['comments'],
+                log=self.stdout.write,
+            )
+            queries = self.build_queries(users, projects)
+
+            self.set_indexes(enabled=False)
+            before = self.measure(queries, options['repeat'])
+            self.set_indexes(enabled=True)
+            after = self.measure(queries, options['repeat'])
+
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            for label, result in (('foreign key indexes', before[name]), ('composite indexes', after[name])):
+                self.stdout.write(f"  {label}: p50={result['p50_ms']}ms p95={result['p95_ms']}ms")
+                for line in result['plan'].splitlines():
+                    self.stdout.write(f"    {line}")
+            speedup = before[name]['p50_ms'] / after[name]['p50_ms'] if after[name]['p50_ms'] else float('inf')
+            self.stdout.write(self.style.SUCCESS(f"  speedup (p50): {speedup:.1f}x"))
+
+    def build_queries(self, users, projects):
+        """
+        First pages of the task/comment lists, filtered by TaskFilter/CommentFilter,
+        in page-number order (id) and in cursor pagination order (newest first).
+        """
+        project = projects[len(projects) // 2]
+        user = users[len(users) // 2]
+        task = Task.objects.filter(project=project).order_by('id').first()
+        filters = {
+            'tasks ?project=&status=': (TaskFilter, TaskViewSet, {'project': project.id, 'status': 'todo'}),
+            'tasks ?assigned_to=&status=': (TaskFilter, TaskViewSet, {'assigned_to': user.username, 'status': 'in_progress'}),
+            'comments ?task=': (CommentFilter, CommentViewSet, {'task': task.id if task else 0}),
+            'comments ?project=': (CommentFilter, CommentViewSet, {'project': project.id}),
+        }
+        queries = {}
+        for name, (filterset_class, viewset, params) in filters.items():
+            queryset = filterset_class(params, queryset=viewset.queryset.all()).qs
+            queries[name] = queryset[:10]
+            queries[f'{name}&pagination=cursor'] = queryset.order_by('-created_at', '-id')[:10]
+        return queries
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as editor:
+            for model, names in FILTER_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        (editor.add_index if enabled else editor.remove_index)(model, index)
+                for index in FOREIGN_KEY_INDEXES[model]:
+                    (editor.remove_index if enabled else editor.add_index)(model, index)
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def measure(self, queries, repeat):
+        results = {}
+        for name, queryset in queries.items():
+            durations = time_call(lambda: list(queryset.all()), repeat=repeat)
+            results[name] = {**summarize(durations), 'plan': queryset.explain()}
+        return results
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Task, Comment
+from core.querysets import project_queryset
+from core.renderers import ORJSONRenderer
+from core.serializers import ProjectSerializer, TaskSerializer, CommentSerializer
+from core.utils.benchmark import throwaway_database, seed_dataset, time_call, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare the regular ModelSerializer + "
+        "JSONRenderer list path with the values() fast path + ORJSONRenderer, "
+        "reported per 1,000 rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5_000, help="Rows serialized per run.")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs per path.")
+        parser.add_argument('--members-per-project', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with throwaway_database():
+            self.stdout.write(f"Seeding {rows} projects, tasks and comments...")
+            seed_dataset(
+                users=max(options['members_per_project'], 50), projects=rows, tasks=rows, comments=rows,
+                members_per_project=options['members_per_project'],
+            )
+            cases = {
+                'projects': (ProjectSerializer, project_queryset()),
+                'tasks': (TaskSerializer, Task.objects.order_by('id')),
+                'comments': (CommentSerializer, Comment.objects.order_by('id')),
+            }
+            for name, (serializer_class, queryset) in cases.items():
+                queryset = queryset[:rows]
+                regular = lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+                fast = lambda: ORJSONRenderer().render(serializer_class.values_data(queryset.all()))
+                if regular() != fast():
+                    self.stdout.write(self.style.ERROR(f"{name}: fast path output differs"))
+
+                per_1000 = 1000 / rows
+                results = {}
+                for label, path in (('ModelSerializer + json', regular), ('values() + orjson', fast)):
+                    durations = [ms * per_1000 for ms in time_call(path, repeat=options['repeat'])]
+                    results[label] = summarize(durations)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name} (query + serialize + render, per 1,000 rows)"))
+                for label, result in results.items():
+                    self.stdout.write(f"  {label:<24} p50={result['p50_ms']}ms p95={result['p95_ms']}ms")
+                before, after = results['ModelSerializer + json']['p50_ms'], results['values() + orjson']['p50_ms']
+                self.stdout.write(self.style.SUCCESS(f"  speedup (p50): {before / after if after else float('inf'):.1f}x"))
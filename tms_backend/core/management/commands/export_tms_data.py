@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORT_CONTENT_TYPES, export_lines
+from core.models import Project, Task, Comment
+from core.views import ProjectFilter, TaskFilter, CommentFilter
+
+
+EXPORTABLE = {
+    'projects': (Project, ProjectFilter),
+    'tasks': (Task, TaskFilter),
+    'comments': (Comment, CommentFilter),
+}
+
+
+class Command(BaseCommand):
+    help = "Stream projects, tasks or comments as NDJSON or CSV with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORTABLE))
+        parser.add_argument('--output', choices=sorted(EXPORT_CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--file', help="Write to this path instead of stdout.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE',
+            help="FilterSet filter, same names as the API query params (repeatable), e.g. --filter status=done",
+        )
+
+    def handle(self, *args, **options):
+        model, filterset_class = EXPORTABLE[options['resource']]
+
+        filters = {}
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid --filter '{item}', expected NAME=VALUE.")
+            filters[name] = value
+
+        filterset = filterset_class(data=filters, queryset=model.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(f"Invalid filters: {dict(filterset.errors)}")
+
+        lines = export_lines(filterset.qs, options['output'], chunk_size=options['chunk_size'])
+        if options['file']:
+            with open(options['file'], 'w', encoding='utf-8', newline='') as fh:
+                fh.writelines(lines)
+            self.stderr.write(self.style.SUCCESS(f"Exported {options['resource']} to {options['file']}"))
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import deferred_change_seqs
+from core.utils.importer import TMSDataLoader, iter_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load users, projects, tasks and comments from a sample_data.json-style "
+        "document or an NDJSON file (one {\"type\": ..., ...} record per line)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--unusable-passwords', action='store_true',
+            help="Skip password hashing; imported users must reset their password to log in.",
+        )
+        parser.add_argument('--hash-workers', type=int, default=0, help="Processes used to hash passwords.")
+        parser.add_argument(
+            '--skip-signals', action='store_true',
+            help="Don't dispatch bulk_post_save per batch; derived data is rebuilt once at the end instead.",
+        )
+
+    def handle(self, *args, **options):
+        loader = TMSDataLoader(
+            batch_size=options['batch_size'],
+            hash_passwords=not options['unusable_passwords'],
+            hash_workers=options['hash_workers'],
+            send_signals=not options['skip_signals'],
+        )
+
+        start = time.perf_counter()
+        try:
+            # Sync change numbers are taken at the end, so other writers aren't
+            # held up for the length of the import
+            with transaction.atomic(), deferred_change_seqs():
+                for section, record in iter_records(options['path']):
+                    loader.add(section, record)
+                loader.finish()
+                if options['skip_signals']:
+                    call_command('rebuild_search_index', stdout=self.stdout)
+                    call_command('rebuild_project_stats', stdout=self.stdout)
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Import failed, nothing was written: {e!r}")
+        elapsed = time.perf_counter() - start
+
+        for section in loader.ORDER:
+            count, seconds = loader.counts[section], loader.seconds[section]
+            rate = count / seconds if seconds else 0
+            self.stdout.write(f"{section:>9}: {count:>9} rows  {rate:>10.0f} rows/sec")
+        total = sum(loader.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {total} rows in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f} rows/sec)"
+        ))
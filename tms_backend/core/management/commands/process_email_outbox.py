@@ -0,0 +1,54 @@
+import smtplib
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core.utils.notifications import deliver_queued_emails, outbox_setting
+
+
+class Command(BaseCommand):
+    help = "Send queued task notification emails, reusing one SMTP connection across batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Emails claimed per iteration.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when the outbox is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the currently due emails and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or outbox_setting('BATCH_SIZE')
+        connection = get_connection()
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+
+        try:
+            while True:
+                # The connection is only opened (or health-checked) when emails are due
+                try:
+                    result = deliver_queued_emails(connection=connection, batch_size=batch_size)
+                except (smtplib.SMTPException, OSError) as e:
+                    if options['once']:
+                        raise
+                    self.stderr.write(f"SMTP connection failed: {e}")
+                    time.sleep(options['interval'])
+                    continue
+
+                for key in totals:
+                    totals[key] += result[key]
+
+                if any(result.values()):
+                    self.stdout.write(
+                        f"sent={result['sent']} retried={result['retried']} failed={result['failed']}"
+                    )
+                    continue
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: sent={totals['sent']} retried={totals['retried']} failed={totals['failed']}"
+        ))
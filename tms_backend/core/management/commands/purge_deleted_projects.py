@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.purge import purge_deleted_projects
+
+
+class Command(BaseCommand):
+    help = "Delete soft-deleted projects with their tasks and comments, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction.")
+        parser.add_argument('--interval', type=float, default=30.0, help="Seconds to sleep when nothing is waiting.")
+        parser.add_argument('--once', action='store_true', help="Purge the currently deleted projects and exit.")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                # One project per iteration, so projects deleted meanwhile are picked up in order
+                purged = purge_deleted_projects(batch_size=options['batch_size'], limit=1, log=self.stdout.write)
+                total += purged
+                if purged:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} projects."))
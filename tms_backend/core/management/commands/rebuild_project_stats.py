@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_project_stats
+
+
+class Command(BaseCommand):
+    help = "Recount the per-project dashboard counters from the task and comment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects', help="Only this project id (repeatable).")
+
+    def handle(self, *args, **options):
+        rows = rebuild_project_stats(options['projects'])
+        self.stdout.write(self.style.SUCCESS(f"Project stats rebuilt ({rows} counters)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.search import SEARCH_INDEXES, get_search_backend
+from core.versioning import bump_collection
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search indexes from the project, task and comment tables."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        for model in SEARCH_INDEXES:
+            backend.rebuild(model)
+            bump_collection(model)  # ?q= results may change, so drop cached responses
+            self.stdout.write(f"Rebuilt search index for {model._meta.verbose_name_plural}")
+        self.stdout.write(self.style.SUCCESS("Search indexes rebuilt."))
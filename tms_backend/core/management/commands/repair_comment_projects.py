@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.consistency import repair_comment_projects
+
+
+class Command(BaseCommand):
+    help = "Set Comment.project to the comment's task project wherever the two disagree, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the mismatched comments.")
+
+    def handle(self, *args, **options):
+        count = repair_comment_projects(
+            batch_size=options['batch_size'], dry_run=options['dry_run'], log=self.stdout.write,
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{count} comments have a project different from their task's.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {count} comments."))
@@ -0,0 +1,268 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+def metrics_setting(name):
+    defaults = {
+        'ENABLED': False,
+        'LATENCY_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),  # Seconds
+        'QUERY_BUCKETS': (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+    }
+    return getattr(settings, 'METRICS', {}).get(name, defaults[name])
+
+
+# ------------------ HISTOGRAMS ------------------
+# name -> (help text, setting with its bucket bounds)
+HISTOGRAMS = {
+    'tms_request_duration_seconds': ('Total time to build the response.', 'LATENCY_BUCKETS'),
+    'tms_request_db_seconds': ('Time spent executing SQL.', 'LATENCY_BUCKETS'),
+    'tms_request_serialization_seconds': ('Time spent in serializers and renderers.', 'LATENCY_BUCKETS'),
+    'tms_request_queries': ('SQL queries per request.', 'QUERY_BUCKETS'),
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """Per-route histograms for the current process, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (metric, route, action) -> Histogram
+        self._requests = {}    # (route, action, status) -> count
+
+    def record(self, route, action, status, duration, sample):
+        observations = {
+            'tms_request_duration_seconds': duration,
+            'tms_request_db_seconds': sample.db_time,
+            'tms_request_serialization_seconds': sample.serialization_time,
+            'tms_request_queries': sample.queries,
+        }
+        with self._lock:
+            for metric, value in observations.items():
+                key = (metric, route, action)
+                if key not in self._histograms:
+                    self._histograms[key] = Histogram(metric_buckets(metric))
+                self._histograms[key].observe(value)
+            self._requests[(route, action, status)] = self._requests.get((route, action, status), 0) + 1
+
+    def histogram(self, metric, route, action):
+        with self._lock:
+            return self._histograms.get((metric, route, action))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for metric, (help_text, _) in HISTOGRAMS.items():
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+                for (name, route, action), histogram in sorted(self._histograms.items()):
+                    if name != metric:
+                        continue
+                    labels = f'route="{route}",action="{action}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{{{labels}}} {sum(histogram.counts)}')
+            lines += ['# HELP tms_requests_total Requests by route and status code.', '# TYPE tms_requests_total counter']
+            for (route, action, status), count in sorted(self._requests.items()):
+                lines.append(f'tms_requests_total{{route="{route}",action="{action}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+
+def metric_buckets(metric):
+    return metrics_setting(HISTOGRAMS[metric][1])
+
+
+registry = MetricsRegistry()
+
+
+def render_response_cache_stats(stats):
+    """Prometheus lines for core.response_cache.ResponseCache.stats()."""
+    metrics = [
+        ('tms_response_cache_entries', 'gauge', 'Responses held in the cache.', stats['entries']),
+        ('tms_response_cache_bytes', 'gauge', 'Bytes held in the cache.', stats['bytes']),
+        ('tms_response_cache_max_bytes', 'gauge', 'Configured cache budget.', stats['max_bytes']),
+        ('tms_response_cache_hits_total', 'counter', 'Cache lookups answered from the cache.', stats['hits']),
+        ('tms_response_cache_misses_total', 'counter', 'Cache lookups that had to render.', stats['misses']),
+        ('tms_response_cache_evictions_total', 'counter', 'Entries evicted to stay within MAX_BYTES.', stats['evictions']),
+    ]
+    lines = []
+    for name, kind, help_text, value in metrics:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
+
+
+# ------------------ REQUEST SAMPLING ------------------
+class RequestSample:
+    __slots__ = ('queries', 'db_time', 'serialization_time', 'serializing', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.serializing = False
+        self.render_started = None
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+_current_sample = ContextVar('metrics_sample', default=None)
+
+
+def _measure_query(execute, sql, params, many, context):
+    # Installed once per connection; counts towards the sample of the request
+    # whose context runs the query (sync_to_async threads inherit it)
+    sample = _current_sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    return sample.execute(execute, sql, params, many, context)
+
+
+def measure_queries():
+    """Hook the current thread's database connections (idempotent)."""
+    for connection in connections.all():
+        if _measure_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_measure_query)
+
+
+@contextmanager
+def timed_serialization():
+    """Count the enclosed block towards the request's serialization time (outermost block only)."""
+    sample = _current_sample.get()
+    if sample is None or sample.serializing:
+        yield
+        return
+    sample.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sample.serialization_time += time.perf_counter() - start
+        sample.serializing = False
+
+
+class MeasuredSerializerMixin:
+    """
+    Counts time spent in to_representation towards the request's serialization
+    time. Nested and per-item calls are only timed at the outermost level.
+    """
+
+    def to_representation(self, instance):
+        if _current_sample.get() is None:
+            return super().to_representation(instance)
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+def route_labels(request):
+    """(route, action): the router basename and viewset action, or the URL name and method."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', request.method.lower()
+    return resolved_route(match, request.method)
+
+
+def resolved_route(match, method):
+    method = method.lower()
+    basename = getattr(match.func, 'initkwargs', {}).get('basename')
+    actions = getattr(match.func, 'actions', None)
+    if basename and actions:
+        # DRF answers HEAD with the GET action
+        return basename, actions.get(method) or actions.get('get' if method == 'head' else method, method)
+    return match.url_name or match.view_name, method
+
+
+class MetricsMiddleware:
+    """
+    Opt-in (METRICS['ENABLED']) per-route query count, DB time, serialization
+    time and latency histograms, served at /api/_metrics/. Add it first in
+    MIDDLEWARE so the latency covers the other middleware too. Works in sync and
+    async chains, so under ASGI an /api/async/ request isn't run in a thread
+    just for this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_setting('ENABLED'):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sample = RequestSample()
+        token = _current_sample.set(sample)
+        start = time.perf_counter()
+        try:
+            measure_queries()
+            response = self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.record(request, response, sample, start)
+        return response
+
+    async def __acall__(self, request):
+        sample = RequestSample()
+        token = _current_sample.set(sample)
+        start = time.perf_counter()
+        try:
+            # The async ORM queries from the thread sync_to_async runs in, which has
+            # its own connections; one short hop hooks them
+            await sync_to_async(measure_queries)()
+            response = await self.get_response(request)
+        finally:
+            _current_sample.reset(token)
+        self.record(request, response, sample, start)
+        return response
+
+    def record(self, request, response, sample, start):
+        end = time.perf_counter()
+        if sample.render_started is not None:
+            sample.serialization_time += end - sample.render_started
+
+        route, action = route_labels(request)
+        registry.record(route, action, response.status_code, end - start, sample)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        sample = _current_sample.get()
+        if sample is not None:
+            sample.render_started = time.perf_counter()
+        return response
@@ -0,0 +1,45 @@
+from django.db import migrations
+
+
+# table -> (index name, searchable columns); mirrors core.search.SEARCH_INDEXES
+SEARCH_TABLES = {
+    'core_project': ('core_project_fts', ['name', 'description']),
+    'core_task': ('core_task_fts', ['title', 'description']),
+    'core_comment': ('core_comment_fts', ['content']),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, (index, columns) in SEARCH_TABLES.items():
+        if vendor == 'sqlite':
+            cols = ', '.join(columns)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({cols}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            schema_editor.execute(f"INSERT INTO {index}(rowid, {cols}) SELECT id, {cols} FROM {table}")
+        elif vendor == 'postgresql':
+            document = " || ' ' || ".join(f"coalesce({col}, '')" for col in columns)
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {table} USING GIN (to_tsvector('english', {document}))"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for index, _ in SEARCH_TABLES.values():
+        if vendor == 'sqlite':
+            schema_editor.execute(f"DROP TABLE IF EXISTS {index}")
+        elif vendor == 'postgresql':
+            schema_editor.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_project_stats(apps, schema_editor):
+    # Same aggregates as core.stats.rebuild_project_stats, on the historical models
+    Task = apps.get_model('core', 'Task')
+    Comment = apps.get_model('core', 'Comment')
+    ProjectStat = apps.get_model('core', 'ProjectStat')
+
+    rows = []
+    for row in Task.objects.values('project_id', 'status').annotate(n=Count('id')).order_by():
+        rows.append(ProjectStat(project_id=row['project_id'], dimension='status', key=row['status'], count=row['n']))
+    for row in Task.objects.values('project_id', 'assigned_to_id').annotate(n=Count('id')).order_by():
+        key = '' if row['assigned_to_id'] is None else str(row['assigned_to_id'])
+        rows.append(ProjectStat(project_id=row['project_id'], dimension='assignee', key=key, count=row['n']))
+    for row in Comment.objects.values('project_id').annotate(n=Count('id')).order_by():
+        rows.append(ProjectStat(project_id=row['project_id'], dimension='comments', key='', count=row['n']))
+    ProjectStat.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('status', 'Tasks by status'), ('assignee', 'Tasks by assignee'), ('comments', 'Comments')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='core.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'dimension', 'key'), name='core_projectstat_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_project_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 00:15
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_versions(apps, schema_editor):
+    # Existing rows haven't changed since they were created
+    for name in ('Project', 'Task', 'Comment'):
+        apps.get_model('core', name).objects.update(updated_at=F('created_at'))
+    CollectionVersion = apps.get_model('core', 'CollectionVersion')
+    for name in ('core.project', 'core.task', 'core.comment'):
+        CollectionVersion.objects.get_or_create(name=name, defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_project_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_versions, migrations.RunPython.noop),
+    ]
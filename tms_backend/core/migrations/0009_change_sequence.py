@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 01:34
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def backfill_change_seq(apps, schema_editor):
+    # Give existing rows distinct numbers (their ids) so a first sync can be paged
+    head = 0
+    for name in ('Project', 'Task', 'Comment'):
+        model = apps.get_model('core', name)
+        model.objects.update(change_seq=F('id'))
+        head = max(head, model.objects.aggregate(head=Max('id'))['head'] or 0)
+    apps.get_model('core', 'CollectionVersion').objects.update_or_create(
+        name='core.change_seq', defaults={'version': head},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_project_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('project_id', models.BigIntegerField()),
+                ('change_seq', models.BigIntegerField(db_index=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_change_seq, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 02:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_jwt_revocation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='core.project'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='task',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='core.task'),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='project',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to='core.project'),
+        ),
+    ]
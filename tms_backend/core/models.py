@@ -1,5 +1,10 @@
+import threading
+from contextlib import contextmanager
+
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F
+from django.utils import timezone
 
 class User(AbstractUser):
     # Define the possible roles as choices
@@ -22,21 +27,159 @@ class User(AbstractUser):
         choices=ROLE_CHOICES,
         default=DEVELOPER
     )
+    # Stamped on every save and on JWT logout; access tokens issued before it are void (core.authentication)
+    auth_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if not (update_fields and set(update_fields) <= {'last_login'}):
+            self.auth_changed_at = timezone.now()
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'auth_changed_at']
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.username
 
-class Project(models.Model):
+# ------------------ CHANGE SEQUENCE ------------------
+# Every write to a project, task or comment stamps the row's change_seq with the
+# next number of one global counter (a CollectionVersion row), and every delete
+# leaves a Tombstone with one; /api/sync/ returns what changed after a client's
+# number (see core.sync). The counter row stays locked until the writing
+# transaction commits, so numbers become visible in order and a reader never
+# skips a row committed late. The price is that these writes are serialized, so
+# numbers are taken per statement or batch, never per row, and long jobs such
+# as imports take theirs at the very end (see deferred_change_seqs).
+
+CHANGE_SEQUENCE = 'core.change_seq'
+
+_deferred = threading.local()
+
+
+def allocate_change_seqs(count=1, using='default'):
+    """Reserve `count` consecutive numbers and return the highest."""
+    connection = connections[using]
+    now = timezone.now()
+    if connection.vendor in ('sqlite', 'postgresql'):
+        # One statement instead of an UPDATE and a SELECT
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {CollectionVersion._meta.db_table} SET version = version + %s, updated_at = %s "
+                f"WHERE name = %s RETURNING version",
+                [count, now, CHANGE_SEQUENCE],
+            )
+            row = cursor.fetchone()
+        if row:
+            return row[0]
+    counter = CollectionVersion.objects.using(using).filter(name=CHANGE_SEQUENCE)
+    if not counter.update(version=F('version') + count, updated_at=now):
+        CollectionVersion.objects.using(using).get_or_create(name=CHANGE_SEQUENCE, defaults={'version': count})
+    return counter.values_list('version', flat=True).get()
+
+
+def next_change_seq():
+    """
+    Allocate a change sequence number. Call it inside the transaction that
+    writes the rows, once per statement or batch. Inside deferred_change_seqs()
+    it returns a negative placeholder instead, numbered when the block ends.
+    """
+    placeholders = getattr(_deferred, 'placeholders', None)
+    if placeholders is None:
+        return allocate_change_seqs()
+    placeholders.append(-(len(placeholders) + 1))
+    return placeholders[-1]
+
+
+@contextmanager
+def deferred_change_seqs():
+    """
+    For long transactions such as imports: the batches written inside get
+    placeholder numbers (-1, -2, ...), and on a clean exit they are given real,
+    consecutive numbers with one counter update. The counter is then locked only
+    from that update until the commit, not for the whole transaction. Use it
+    inside transaction.atomic().
+    """
+    _deferred.placeholders = placeholders = []
+    try:
+        yield
+    finally:
+        _deferred.placeholders = None
+    if placeholders:
+        # Placeholder -k becomes first + k - 1; batches keep their order
+        before_first = allocate_change_seqs(len(placeholders)) - len(placeholders)
+        for model in (Project, Task, Comment, Tombstone):
+            model._base_manager.filter(change_seq__lt=0).update(change_seq=before_first - F('change_seq'))
+
+
+class ChangeSequenceQuerySet(models.QuerySet):
+    """Stamps change_seq on bulk writes; all rows of one call share a number."""
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db):
+            if 'change_seq' not in kwargs:  # bulk_update() passes its own
+                kwargs['change_seq'] = next_change_seq()
+            return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            change_seq = next_change_seq()
+            for obj in objs:
+                obj.change_seq = change_seq
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            change_seq = next_change_seq()
+            for obj in objs:
+                obj.change_seq = change_seq
+            return super().bulk_update(objs, [*fields, 'change_seq'], *args, **kwargs)
+
+
+class ChangeSequenceMixin:
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            self.change_seq = next_change_seq()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'change_seq' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'change_seq']
+            super().save(*args, **kwargs)
+
+
+# ------------------ SOFT DELETE ------------------
+# Deleting a project only stamps deleted_at; core.purge removes it with its tasks
+# and comments later, in batches. The default managers hide soft-deleted projects
+# and everything in them; `all_objects` still sees every row.
+
+class LiveProjectManager(models.Manager.from_queryset(ChangeSequenceQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class InLiveProjectManager(models.Manager.from_queryset(ChangeSequenceQuerySet)):
+    def get_queryset(self):
+        deleted = Project.all_objects.filter(deleted_at__isnull=False).values('id')
+        return super().get_queryset().exclude(project_id__in=deleted)
+
+
+class Project(ChangeSequenceMixin, models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     users = models.ManyToManyField('User', related_name='projects')  # Tagged users
     created_by = models.ForeignKey(User, related_name='created_projects', on_delete=models.SET_NULL, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also bumped on membership changes (see core.versioning)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Set by DELETE; purged by core.purge
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)  # See next_change_seq
+
+    objects = LiveProjectManager()
+    all_objects = models.Manager.from_queryset(ChangeSequenceQuerySet)()
 
     def __str__(self):
         return self.name
 
-class Task(models.Model):
+class Task(ChangeSequenceMixin, models.Model):
     STATUS_CHOICES = [
         ('todo', 'To Do'),
         ('in_progress', 'In Progress'),
@@ -45,23 +188,176 @@ class Task(models.Model):
 
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
-    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks', db_index=False)  # Leads core_task_proj_status_idx
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='tasks', db_index=False)  # Leads core_task_assignee_status_idx
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='todo')
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_creators')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)  # See next_change_seq
+
+    objects = InLiveProjectManager()
+    all_objects = models.Manager.from_queryset(ChangeSequenceQuerySet)()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the loaded values so core.stats can diff them on save/delete
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (see core.pagination.KeysetPagination)
+            models.Index(fields=['created_at', 'id'], name='core_task_created_idx'),
+            # TaskFilter access paths: ?project=&status= and ?assigned_to=&status=
+            models.Index(fields=['project', 'status', 'created_at'], name='core_task_proj_status_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='core_task_assignee_status_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
-class Comment(models.Model):
+class Comment(ChangeSequenceMixin, models.Model):
     content = models.TextField()
-    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments')
-    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='comments')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments', db_index=False)  # Leads core_comment_task_created_idx
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='comments', db_index=False)  # Leads core_comment_proj_created_idx
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comment_authors')  # or just 'user_comments'
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comment_creators')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(default=0, db_index=True, editable=False)  # See next_change_seq
+
+    objects = InLiveProjectManager()
+    all_objects = models.Manager.from_queryset(ChangeSequenceQuerySet)()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the loaded values so core.stats can diff them on save/delete
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # project is always the task's (see core.consistency); it's stored so
+        # comment listings can filter by project without joining core_task
+        loaded = getattr(self, '_loaded_values', None) or {}
+        task_changed = self._state.adding or loaded.get('task_id') != self.task_id
+        if self.task_id is not None and (task_changed or Comment.task.is_cached(self)):
+            self.project_id = self.task.project_id
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'project' not in update_fields:
+                kwargs['update_fields'] = [*update_fields, 'project']
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (see core.pagination.KeysetPagination)
+            models.Index(fields=['created_at', 'id'], name='core_comment_created_idx'),
+            # CommentFilter access paths: ?task= and ?project=, newest first
+            models.Index(fields=['task', 'created_at'], name='core_comment_task_created_idx'),
+            models.Index(fields=['project', 'created_at'], name='core_comment_proj_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.created_by.username} on {self.task.title}"
 
+
+class ProjectStat(models.Model):
+    """
+    Denormalized per-project counter, maintained incrementally by core.stats.
+    One row per (project, dimension, key): tasks per status, tasks per assignee
+    (key is the user id, '' when unassigned) and the project's comment total.
+    """
+    STATUS = 'status'
+    ASSIGNEE = 'assignee'
+    COMMENTS = 'comments'
+
+    DIMENSION_CHOICES = [
+        (STATUS, 'Tasks by status'),
+        (ASSIGNEE, 'Tasks by assignee'),
+        (COMMENTS, 'Comments'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='stats')
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'dimension', 'key'], name='core_projectstat_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} {self.dimension}[{self.key}] = {self.count}"
+
+
+class CollectionVersion(models.Model):
+    """
+    Version counter for a whole collection (e.g. "core.task"), bumped on every
+    write to it. List endpoints derive their ETag/Last-Modified from it.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class RevokedToken(models.Model):
+    """A logged-out JWT refresh token, kept until it would have expired."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class Tombstone(models.Model):
+    """
+    A deleted project, task or comment, so /api/sync/ can tell clients to drop
+    it. project_id is kept (without a foreign key) to scope it like the row was.
+    """
+    model = models.CharField(max_length=100)  # Collection name, e.g. "core.task"
+    object_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField(db_index=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at #{self.change_seq}"
+
+
+class QueuedEmail(models.Model):
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # Also the lease expiry while sending
+    claim_token = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='core_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
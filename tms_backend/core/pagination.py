@@ -0,0 +1,158 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .exceptions import BadRequestException
+
+# Added by the ?q= search backends; a ranked queryset has its own order
+RANK_ALIAS = 'search_rank'
+
+
+def is_ranked(queryset):
+    query = queryset.query
+    return RANK_ALIAS in query.annotations or RANK_ALIAS in query.extra
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over (created_at, id), newest first.
+
+    Each page is fetched with a WHERE on the last seen (created_at, id) instead of
+    an OFFSET, and no COUNT(*) is issued, so page N costs the same as page 1.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    def page_queryset(self, queryset, request):
+        """The rows of the requested page plus one, which tells whether another page follows."""
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), 'page')
+        self.position, self.reverse = self.decode_cursor(request)
+        position, reverse = self.position, self.reverse
+
+        if reverse:
+            # Walking backwards: read the page in ascending order, then flip it
+            queryset = queryset.order_by('created_at', 'id')
+            if position:
+                created_at, pk = position
+                queryset = queryset.filter(created_at__gte=created_at).filter(
+                    Q(created_at__gt=created_at) | Q(id__gt=pk)
+                )
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+            if position:
+                created_at, pk = position
+                queryset = queryset.filter(created_at__lte=created_at).filter(
+                    Q(created_at__lt=created_at) | Q(id__lt=pk)
+                )
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        """The page itself, from the rows page_queryset() fetched."""
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.first, self.last = (results[0], results[-1]) if results else (None, None)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    # ------------------ CURSOR ENCODING ------------------
+    def encode_cursor(self, obj, reverse):
+        # obj is a model instance, or a values() row on the fast list path
+        created_at, pk = (obj['created_at'], obj['id']) if isinstance(obj, dict) else (obj.created_at, obj.pk)
+        payload = {'t': created_at.isoformat(), 'i': pk}
+        if reverse:
+            payload['r'] = 1
+        cursor = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            position = (datetime.fromisoformat(payload['t']), int(payload['i']))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; keyset pagination when the request asks for
+    it with ?pagination=cursor or carries a ?cursor= from a previous page.
+    Cursors walk (created_at, id), which would throw away a search ranking, so
+    asking for one on a ranked ?q= search is a 400.
+    """
+    mode_query_param = 'pagination'
+    ranked_cursor_message = 'Cursor pagination is not available with ?q=; search results are ordered by rank.'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def get_keyset(self, queryset, request):
+        """The KeysetPagination serving this request, or None for page numbers."""
+        if not self.use_cursor(request):
+            return None
+        if is_ranked(queryset):
+            raise BadRequestException(self.ranked_cursor_message)
+        return KeysetPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.get_keyset(queryset, request)
+        if self.keyset:
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .visibility import project_id_of, visible_project_ids
+
 class IsAdminOrProjectManager(permissions.BasePermission):
     """
     Permission to allow only Admins or Project Managers to view or delete users.
@@ -10,6 +12,26 @@ class IsAdminOrProjectManager(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role in ['Admin', 'Project Manager']
 
 
+class IsAdmin(permissions.BasePermission):
+    """
+    Permission to allow only Admins (or superusers) for every method.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        return user.is_authenticated and (user.role == 'Admin' or user.is_superuser)
+
+
+class IsProjectMember(permissions.BasePermission):
+    """
+    Object-level check that the project (or the task or comment's project) is
+    visible to the user; see core.visibility. Uses the user's cached project-id
+    set, so it adds no query per object.
+    """
+    def has_object_permission(self, request, view, obj):
+        visible = visible_project_ids(request.user)
+        return visible is None or project_id_of(obj) in visible
+
+
 class CanCreateEditDeleteProjects(permissions.BasePermission):
     """
     - Allow read-only (GET, OPTIONS, HEAD) to everyone.
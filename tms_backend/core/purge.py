@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import Project, Task, Comment
+from .search import get_search_backend
+from .signals import bulk_post_delete
+from .sync import record_deletions
+from .versioning import bump_collection
+
+
+# ------------------ PROJECT DELETION ------------------
+# DELETE /api/projects/{id}/ only stamps Project.deleted_at, which hides the
+# project, its tasks and its comments from every default manager at once. The
+# rows are removed afterwards by purge_deleted_projects (see the management
+# command of the same name): comments, then tasks, in primary key batches with
+# one short transaction each, so a large project never holds a write lock for
+# long. Batches are plain DELETEs without per-row signals; the counters go with
+# the project, and nobody can see the rows anymore, so only the search index
+# and the sync tombstones need updating.
+
+def soft_delete_project(project):
+    """Hide `project` and everything in it; the rows are purged later."""
+    project.deleted_at = timezone.now()
+    project.save(update_fields=['deleted_at', 'updated_at'])
+    bump_collection(Task, Comment)
+    events.publish_on_commit([
+        (events.project_channel(project.pk), 'project.deleted', {'id': project.pk}),
+    ])
+
+
+def _delete_in_batches(queryset, batch_size):
+    """Yields the number of rows deleted by each batch until `queryset` is empty."""
+    model = queryset.model
+    while True:
+        rows = list(queryset.order_by('pk').values_list('pk', 'project_id')[:batch_size])
+        if not rows:
+            return
+        pks = [pk for pk, _ in rows]
+        with transaction.atomic():
+            batch = model.all_objects.filter(pk__in=pks)
+            batch._raw_delete(batch.db)
+            record_deletions(model, rows)
+            get_search_backend().remove(model, pks)
+        yield len(rows)
+
+
+def purge_project(project, batch_size=1000, log=None):
+    """
+    Delete a soft-deleted project's comments and tasks in batches, then the
+    project itself. Returns {'comments': n, 'tasks': n}.
+    """
+    counts = {}
+    for name, queryset in (
+        ('comments', Comment.all_objects.filter(task__project_id=project.pk)),
+        ('tasks', Task.all_objects.filter(project_id=project.pk)),
+    ):
+        total, deleted = queryset.count(), 0
+        for n in _delete_in_batches(queryset, batch_size):
+            deleted += n
+            if log:
+                log(f"  project {project.pk}: deleted {deleted}/{total} {name}")
+        counts[name] = deleted
+    # Cascades to the stats counters, memberships and anything created meanwhile
+    project.delete()
+    return counts
+
+
+def purge_deleted_projects(batch_size=1000, limit=None, log=None):
+    """Purge soft-deleted projects, oldest deletion first. Returns the number of projects purged."""
+    projects = Project.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at', 'pk')
+    purged = 0
+    for project in projects[:limit] if limit else projects:
+        counts = purge_project(project, batch_size=batch_size, log=log)
+        purged += 1
+        if log:
+            log(f"Purged project {project.pk} ({counts['tasks']} tasks, {counts['comments']} comments)")
+    return purged
+
+
+# ------------------ BULK DELETE ------------------
+# DELETE /api/tasks/bulk/ removes up to a few hundred tasks with their comments.
+# A queryset delete() would send post_delete per row, and every receiver (stats,
+# search, tombstones, feed events, collection versions) would run once per row.
+# Instead each batch is one plain DELETE and one bulk_post_delete, whose
+# receivers do the same work once for the whole batch.
+
+def _delete_batch(model, instances):
+    model.all_objects.filter(pk__in=[obj.pk for obj in instances])._raw_delete(model.all_objects.db)
+    bulk_post_delete.send(sender=model, instances=instances)
+
+
+def bulk_delete_tasks(queryset, batch_size=500):
+    """Delete the tasks in `queryset` and their comments. Call inside a transaction. Returns the number of tasks deleted."""
+    deleted = 0
+    while True:
+        tasks = list(queryset.order_by('pk')[:batch_size])
+        if not tasks:
+            return deleted
+        comments = list(Comment.all_objects.filter(task_id__in=[task.pk for task in tasks]))
+        for start in range(0, len(comments), batch_size):
+            _delete_batch(Comment, comments[start:start + batch_size])
+        _delete_batch(Task, tasks)
+        deleted += len(tasks)
+        if len(tasks) < batch_size:
+            return deleted
@@ -0,0 +1,25 @@
+from django.db.models import Prefetch
+
+from .models import User, Project
+
+
+# ------------------ QUERY PLANNING ------------------
+# Columns emitted by serializers.UserSerializer; nested user lists only load these.
+USER_SUMMARY_FIELDS = ['id', 'username', 'email', 'role', 'first_name', 'last_name']
+
+
+def user_summary_queryset():
+    return User.objects.only(*USER_SUMMARY_FIELDS).order_by('id')
+
+
+def project_queryset():
+    """
+    Projects with their members loaded up front, so listing a page costs the
+    same number of queries no matter how many projects or members it holds.
+    ProjectSerializer doesn't output created_by, so no user row is joined for it.
+    """
+    return (
+        Project.objects
+        .prefetch_related(Prefetch('users', queryset=user_summary_queryset()))
+        .order_by('id')
+    )
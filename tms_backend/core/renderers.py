@@ -0,0 +1,26 @@
+import orjson
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same bytes with orjson, several times faster on
+    large pages. Datetimes, Decimals, lazy strings etc. still go through DRF's
+    encoder for identical formatting. Indented output (browsable API,
+    `; indent=` media type parameter) and anything orjson rejects (e.g. ints
+    beyond 64 bits) fall back to the stdlib json path.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.ensure_ascii or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=encoders.JSONEncoder().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer: keep the output a strict JavaScript subset
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
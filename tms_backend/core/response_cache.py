@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+
+
+def response_cache_setting(name):
+    defaults = {
+        'ENABLED': True,
+        'MAX_BYTES': 32 * 1024 * 1024,   # Memory budget for cached bodies in each process
+        'MAX_ENTRY_BYTES': 1024 * 1024,  # Larger responses are never cached
+    }
+    return getattr(settings, 'RESPONSE_CACHE', {}).get(name, defaults[name])
+
+
+CachedResponse = namedtuple('CachedResponse', ['content', 'content_type', 'etag', 'last_modified'])
+
+
+class ResponseCache:
+    """
+    In-process LRU of rendered response bodies, bounded by MAX_BYTES.
+
+    Keys embed the collection versions the response was built from (see
+    core.versioning), so a write anywhere in a collection moves readers to new
+    keys and stale entries simply age out; nothing has to be deleted and every
+    worker process stays correct on its own.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> CachedResponse
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def entry_size(key, entry):
+        return len(entry.content) + len(repr(key))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        size = self.entry_size(key, entry)
+        if size > response_cache_setting('MAX_ENTRY_BYTES'):
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self.entry_size(key, old)
+            self._entries[key] = entry
+            self.size += size
+            while self.size > response_cache_setting('MAX_BYTES') and self._entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self.size -= self.entry_size(evicted_key, evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.size,
+                'max_bytes': response_cache_setting('MAX_BYTES'),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+response_cache = ResponseCache()
+
+
+class ResponseCacheMixin:
+    """
+    Serves list and retrieve from response_cache. Goes before
+    ConditionalGetMixin in the bases: it relies on its collection versions,
+    representation fingerprint and validators, and a hit still answers
+    If-None-Match with 304. Responses carry X-Cache: HIT or MISS.
+    """
+
+    def response_cache_key(self):
+        versions = self.get_collection_versions()
+        return (
+            type(self).__name__,
+            self.action,
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            tuple(sorted(versions.items())),
+        ) + self.representation_fingerprint()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, view, request, *args, **kwargs):
+        # The browsable API page shows the logged-in user, so it is never shared
+        if not response_cache_setting('ENABLED') or request.accepted_renderer.format == 'api':
+            return view(request, *args, **kwargs)
+
+        key = self.response_cache_key()
+        entry = response_cache.get(key)
+        if entry is not None:
+            response = self.not_modified(entry.etag, entry.last_modified)
+            if response is None:
+                response = self.with_validators(
+                    HttpResponse(entry.content, content_type=entry.content_type), entry.etag, entry.last_modified,
+                )
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and response.has_header('ETag'):
+            self.render(response)
+            last_modified = response.get('Last-Modified')
+            response_cache.set(key, CachedResponse(
+                content=response.content,
+                content_type=response['Content-Type'],
+                etag=response['ETag'],
+                last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+            ))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def render(self, response):
+        # What APIView.finalize_response and the handler would otherwise do later
+        response.accepted_renderer = self.request.accepted_renderer
+        response.accepted_media_type = self.request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        response.render()
@@ -0,0 +1,161 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Project, Task, Comment
+
+
+# ------------------ SEARCH INDEXES ------------------
+# model -> (index name, searchable fields, per-field weights). The indexes
+# themselves are created by migration 0005_full_text_search.
+SEARCH_INDEXES = {
+    Project: ('core_project_fts', ['name', 'description'], [10.0, 1.0]),
+    Task: ('core_task_fts', ['title', 'description'], [10.0, 1.0]),
+    Comment: ('core_comment_fts', ['content'], [1.0]),
+}
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+class LikeSearchBackend:
+    """Fallback for databases without a full-text engine: AND of icontains over every field."""
+
+    def search(self, queryset, query):
+        _, fields, _ = SEARCH_INDEXES[queryset.model]
+        for term in search_terms(query):
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def index(self, model, instances, created=False):
+        pass
+
+    def remove(self, model, pks):
+        pass
+
+    def rebuild(self, model):
+        pass
+
+
+class SQLiteFTSBackend(LikeSearchBackend):
+    """
+    SQLite FTS5 virtual tables keyed by the row id, kept in sync by the signal
+    receivers in core.signals. Results are ordered by bm25 (lower is better).
+    """
+
+    def match_expression(self, query):
+        terms = search_terms(query)
+        if not terms:
+            return None
+        # Quote every term so user input can't inject FTS syntax; the last term
+        # is matched as a prefix so results appear while the user is typing.
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset
+        index, _, weights = SEARCH_INDEXES[queryset.model]
+        table = queryset.model._meta.db_table
+        bm25_weights = ', '.join(str(weight) for weight in weights)
+        return queryset.extra(
+            tables=[index],
+            where=[f'{index}.rowid = {table}.id', f'{index} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'bm25({index}, {bm25_weights})'},
+            order_by=['search_rank', 'id'],
+        )
+
+    def index(self, model, instances, created=False):
+        """(Re)index `instances`; new rows (`created`) have no entry to delete first."""
+        index, fields, _ = SEARCH_INDEXES[model]
+        instances = [obj for obj in instances if obj.pk is not None]
+        if not instances:
+            return
+        if not created:
+            self.remove(model, [obj.pk for obj in instances])
+        placeholders = ', '.join(['%s'] * (len(fields) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {index}(rowid, {', '.join(fields)}) VALUES ({placeholders})",
+                [[obj.pk] + [getattr(obj, field) or '' for field in fields] for obj in instances],
+            )
+
+    def remove(self, model, pks):
+        index, _, _ = SEARCH_INDEXES[model]
+        pks = list(pks)
+        with connection.cursor() as cursor:
+            # Stay well below SQLite's bound-variable limit
+            for start in range(0, len(pks), 500):
+                chunk = pks[start:start + 500]
+                cursor.execute(
+                    f"DELETE FROM {index} WHERE rowid IN ({', '.join(['%s'] * len(chunk))})", chunk
+                )
+
+    def rebuild(self, model):
+        index, fields, _ = SEARCH_INDEXES[model]
+        cols = ', '.join(fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {index}")
+            cursor.execute(f"INSERT INTO {index}(rowid, {cols}) SELECT id, {cols} FROM {model._meta.db_table}")
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    """
+    Postgres tsvector search backed by GIN expression indexes. The database keeps
+    the indexes current on its own, so index()/remove() have nothing to do.
+    """
+    config = 'english'
+
+    def document(self, model):
+        _, fields, _ = SEARCH_INDEXES[model]
+        # Must match the indexed expression in migration 0005 for the GIN index to be used
+        return " || ' ' || ".join(f'coalesce("{model._meta.db_table}"."{field}", \'\')' for field in fields)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset
+        vector = f"to_tsvector('{self.config}', {self.document(queryset.model)})"
+        tsquery = f"plainto_tsquery('{self.config}', %s)"
+        text = ' '.join(terms)
+        return (
+            queryset
+            .filter(RawSQL(f'{vector} @@ {tsquery}', [text], output_field=BooleanField()))
+            .annotate(search_rank=RawSQL(f'ts_rank({vector}, {tsquery})', [text], output_field=FloatField()))
+            .order_by('-search_rank', 'id')
+        )
+
+
+def get_search_backend():
+    path = getattr(settings, 'TMS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return LikeSearchBackend()
+
+
+# ------------------ FILTER BACKEND ------------------
+class FullTextSearchFilter(BaseFilterBackend):
+    """Ranked full-text search via ?q=, served by the configured search backend."""
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or queryset.model not in SEARCH_INDEXES:
+            return queryset
+        return get_search_backend().search(queryset, query)
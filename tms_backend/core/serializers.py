@@ -3,40 +3,83 @@ from .models import User, Project, Task, Comment
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
+from .fields import PrefetchedPrimaryKeyRelatedField
+from .signals import bulk_post_save
+from .metrics import MeasuredSerializerMixin
+from .fast_serializers import ValuesSerializerMixin
+from .sparse_fields import SparseFieldsSerializerMixin
+from .visibility import validate_visible_project
+from .authentication import add_user_claims, jwt_revocations
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer, TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(MeasuredSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role', 'first_name', 'last_name']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, MeasuredSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     users = UserSerializer(many=True, read_only=True)
-    user_ids = serializers.PrimaryKeyRelatedField(
+    user_ids = PrefetchedPrimaryKeyRelatedField(
         many=True, queryset=User.objects.all(), write_only=True, source='users'
-    )
+    )  # All ids resolved with one IN query
 
     class Meta:
         model = Project
-        fields = ['id', 'name', 'description', 'created_at', 'users', 'user_ids']
+        fields = ['id', 'name', 'description', 'created_at', 'updated_at', 'users', 'user_ids']
+
+
+class ProjectMembersSerializer(serializers.Serializer):
+    """Body of POST/DELETE /api/projects/{id}/members/: the users to add or remove."""
+    user_ids = PrefetchedPrimaryKeyRelatedField(many=True, queryset=User.objects.only('id'), allow_empty=False)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """Creates a validated list of tasks with a single bulk INSERT."""
+
+    def create(self, validated_data):
+        tasks = Task.objects.bulk_create([Task(**attrs) for attrs in validated_data])
+        bulk_post_save.send(sender=Task, instances=tasks, created=True)
+        return tasks
+
 
+class TaskSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, MeasuredSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    expandable_fields = {'assigned_to': UserSerializer, 'created_by': UserSerializer}
 
-class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'status', 'assigned_to', 'project', 'created_by', 'created_at']
+        fields = ['id', 'title', 'description', 'status', 'assigned_to', 'project', 'created_by', 'created_at', 'updated_at']
+        list_serializer_class = TaskListSerializer
+
+    def validate_project(self, project):
+        validate_visible_project(self.context, project.pk, project.pk)
+        return project
 
     def validate(self, attrs):
-        if not attrs.get('assigned_to') or not attrs.get('project'):
+        # Partial updates keep the task's current assignee and project
+        assigned_to = attrs['assigned_to'] if 'assigned_to' in attrs else getattr(self.instance, 'assigned_to_id', None)
+        project = attrs['project'] if 'project' in attrs else getattr(self.instance, 'project_id', None)
+        if not assigned_to or not project:
             raise serializers.ValidationError("Both assigned_to and project must be provided.")
         return attrs
     
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin, ValuesSerializerMixin, MeasuredSerializerMixin, serializers.ModelSerializer):
+    expandable_fields = {'task': TaskSerializer, 'user': UserSerializer, 'created_by': UserSerializer}
+
     class Meta:
         model = Comment
-        fields = ['id', 'content', 'task', 'project', 'user', 'created_by', 'created_at']
-        read_only_fields = ['user', 'created_by', 'created_at']  # Make these read-only
+        fields = ['id', 'content', 'task', 'project', 'user', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['project', 'user', 'created_by', 'created_at', 'updated_at']  # project is derived from the task
+
+    def validate_task(self, task):
+        validate_visible_project(self.context, task.project_id, task.pk)
+        return task
 
     def create(self, validated_data):
         request = self.context.get('request')
@@ -71,3 +114,40 @@ class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role']
+
+
+# ------------------ JWT ------------------
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Issues an access token with the user's current role and version stamp."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if jwt_revocations.is_revoked(refresh):
+            raise InvalidToken('Token has been revoked.')
+        user = User.objects.filter(pk=refresh[jwt_settings.USER_ID_CLAIM]).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise InvalidToken(self.error_messages['no_active_account'])
+        return {'access': str(add_user_claims(refresh.access_token, user))}
+
+
+class ClaimsTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        if jwt_revocations.is_revoked(UntypedToken(attrs['token'])):
+            raise InvalidToken('Token has been revoked.')
+        return {}
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            return RefreshToken(value)
+        except TokenError as e:
+            raise serializers.ValidationError(str(e))
@@ -1,9 +1,283 @@
 from django.conf import settings
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver, Signal
 from rest_framework.authtoken.models import Token
 
+from . import events, stats
+from .consistency import left_projects, move_comments, moved_tasks
+from .authentication import token_cache, jwt_revocations
+from .models import Project, Task, Comment
+from .search import get_search_backend
+from .sync import deletion_change_seq, record_deletions
+from .versioning import bump_collection, touch
+from .visibility import visible_projects
+
+# Sent by bulk write paths (bulk_create / bulk_update), which skip post_save.
+# Receivers get `instances` and `created`.
+bulk_post_save = Signal()
+
+# Sent by core.purge.bulk_delete_tasks once per batch of plain DELETEs, which skip
+# post_delete. Receivers get `instances`, the deleted rows as loaded.
+bulk_post_delete = Signal()
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+# ------------------ TOKEN CACHE INVALIDATION ------------------
+# Any change to a user (role, is_active, ...) must be visible on the next request.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user_tokens(sender, instance=None, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+# User.save() stamped auth_changed_at, which voids the user's JWT access tokens;
+# drop the cached stamp so this worker sees it on the next request
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def revoke_jwt_access_tokens(sender, instance=None, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    jwt_revocations.forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance=None, **kwargs):
+    token_cache.discard(instance.key)
+    token_cache.invalidate_user(instance.user_id)
+
+
+# ------------------ VISIBLE PROJECT SETS ------------------
+# core.visibility caches each user's project ids; drop them when membership changes.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_visible_projects_of_user(sender, instance=None, **kwargs):
+    visible_projects.invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=Project.users.through)
+def invalidate_visible_projects_of_members(sender, instance=None, action='', reverse=False, pk_set=None, **kwargs):
+    if reverse:
+        # user.projects.add(...): only that user's set changes
+        if action in ('post_add', 'post_remove', 'pre_clear'):
+            visible_projects.invalidate(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        visible_projects.invalidate(*(pk_set or ()))
+    elif action == 'pre_clear':
+        visible_projects.invalidate(*instance.users.values_list('pk', flat=True))
+
+
+# ------------------ FULL-TEXT SEARCH SYNC ------------------
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance=None, created=False, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index(sender, [instance], created)
+
+
+@receiver(bulk_post_save, sender=Project)
+@receiver(bulk_post_save, sender=Task)
+@receiver(bulk_post_save, sender=Comment)
+def bulk_index_for_search(sender, instances=(), created=False, **kwargs):
+    get_search_backend().index(sender, instances, created)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def remove_from_search(sender, instance=None, **kwargs):
+    get_search_backend().remove(sender, [instance.pk])
+
+
+@receiver(bulk_post_delete, sender=Task)
+@receiver(bulk_post_delete, sender=Comment)
+def bulk_remove_from_search(sender, instances=(), **kwargs):
+    get_search_backend().remove(sender, [instance.pk for instance in instances])
+
+
+# ------------------ SYNC TOMBSTONES ------------------
+# Deleted rows are reported by /api/sync/ (core.sync); core.purge records its own.
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def leave_tombstone(sender, instance=None, origin=None, using='default', **kwargs):
+    record_deletions(
+        sender, [(instance.pk, instance.pk if sender is Project else instance.project_id)],
+        change_seq=deletion_change_seq(origin, using) if origin is not None else None,
+    )
+
+
+@receiver(bulk_post_delete, sender=Task)
+@receiver(bulk_post_delete, sender=Comment)
+def bulk_leave_tombstones(sender, instances=(), **kwargs):
+    record_deletions(sender, [(instance.pk, instance.project_id) for instance in instances])
+
+
+# A task moved to another project is gone for clients that only see the old one;
+# changes_since skips the tombstone for clients that still see the task.
+@receiver(post_save, sender=Task)
+def tombstone_moved_task(sender, instance=None, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        record_deletions(Task, left_projects([instance]), change_seq=instance.change_seq)
+
+
+@receiver(bulk_post_save, sender=Task)
+def tombstone_moved_tasks(sender, instances=(), created=False, **kwargs):
+    if not created:
+        instances = list(instances)
+        if instances:
+            record_deletions(Task, left_projects(instances), change_seq=instances[0].change_seq)
+
+
+# ------------------ CHANGE FEED ------------------
+# Connected before the stats counters below, which refresh _loaded_values
+# after reading them; the events need the previous status and project.
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+def publish_saved(sender, instance=None, created=False, raw=False, **kwargs):
+    if not raw:
+        events.publish_on_commit(events.saved_events(instance, created))
+
+
+@receiver(bulk_post_save, sender=Task)
+@receiver(bulk_post_save, sender=Comment)
+def publish_bulk_saved(sender, instances=(), created=False, **kwargs):
+    events.publish_on_commit([event for instance in instances for event in events.saved_events(instance, created)])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def publish_deleted(sender, instance=None, **kwargs):
+    events.publish_on_commit(events.deleted_events(instance))
+
+
+@receiver(bulk_post_delete, sender=Task)
+@receiver(bulk_post_delete, sender=Comment)
+def publish_bulk_deleted(sender, instances=(), **kwargs):
+    events.publish_on_commit([event for instance in instances for event in events.deleted_events(instance)])
+
+
+# ------------------ COMMENT PROJECT SYNC ------------------
+# A task moved to another project takes its comments along. Also reads the
+# loaded project, so it has to run before the stats counters below.
+@receiver(post_save, sender=Task)
+def move_comments_with_task(sender, instance=None, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        move_comments(moved_tasks([instance]))
+
+
+@receiver(bulk_post_save, sender=Task)
+def bulk_move_comments_with_tasks(sender, instances=(), created=False, **kwargs):
+    if not created:
+        move_comments(moved_tasks(instances))
+
+
+# ------------------ PROJECT STATS COUNTERS ------------------
+# pre_save runs inside ChangeSequenceMixin.save's transaction, so the row stays
+# locked from this read until the write commits
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Comment)
+def lock_counted_row(sender, instance=None, raw=False, using=None, **kwargs):
+    if not (raw or instance._state.adding):
+        stats.lock_counted_rows(sender, [instance], using)
+
+
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Comment)
+def lock_deleted_row(sender, instance=None, origin=None, using=None, **kwargs):
+    # Cascaded rows were just loaded by the delete itself
+    if origin is instance:
+        stats.lock_counted_rows(sender, [instance], using)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+def count_for_project_stats(sender, instance=None, created=False, raw=False, **kwargs):
+    if not raw:
+        stats.record_saved(sender, [instance], created)
+
+
+@receiver(bulk_post_save, sender=Task)
+@receiver(bulk_post_save, sender=Comment)
+def bulk_count_for_project_stats(sender, instances=(), created=False, **kwargs):
+    stats.record_saved(sender, instances, created)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def uncount_for_project_stats(sender, instance=None, **kwargs):
+    stats.record_deleted(sender, [instance])
+
+
+@receiver(bulk_post_delete, sender=Task)
+@receiver(bulk_post_delete, sender=Comment)
+def bulk_uncount_for_project_stats(sender, instances=(), **kwargs):
+    stats.record_deleted(sender, instances)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remember_assigned_projects(sender, instance=None, **kwargs):
+    instance._stats_projects = stats.projects_assigned_to(instance.pk)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def recount_assigned_projects(sender, instance=None, **kwargs):
+    if getattr(instance, '_stats_projects', None):
+        stats.rebuild_project_stats(instance._stats_projects)
+
+
+# ------------------ COLLECTION VERSIONS (ETag / Last-Modified) ------------------
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+@receiver(bulk_post_save, sender=Project)
+@receiver(bulk_post_save, sender=Task)
+@receiver(bulk_post_save, sender=Comment)
+@receiver(bulk_post_delete, sender=Task)
+@receiver(bulk_post_delete, sender=Comment)
+def bump_collection_version(sender, **kwargs):
+    bump_collection(sender)
+
+
+@receiver(m2m_changed, sender=Project.users.through)
+def touch_projects_on_membership_change(sender, instance=None, action='', reverse=False, pk_set=None, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # user.projects.add(...): the projects are in pk_set (unknown after a clear)
+        projects = Project.objects.filter(pk__in=pk_set) if pk_set else Project.objects.filter(users=instance)
+    else:
+        projects = Project.objects.filter(pk=instance.pk)
+    touch(projects)
+    # Scoped members gain or lose these projects' tasks and comments too
+    bump_collection(Project, Task, Comment)
+
+
+# Projects embed their members, so user changes change the project representation;
+# the user collection itself versions tasks and comments rendered with ?expand=
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def touch_projects_of_user(sender, instance=None, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    bump_collection(sender)
+    if touch(Project.objects.filter(users=instance)):
+        bump_collection(Project)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def touch_rows_of_deleted_user(sender, instance=None, **kwargs):
+    # Membership rows and Task.assigned_to are cleared without signals
+    touch(Project.objects.filter(users=instance))
+    touch(Task.objects.filter(assigned_to=instance))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def bump_collections_of_deleted_user(sender, instance=None, **kwargs):
+    bump_collection(Project, Task, sender)
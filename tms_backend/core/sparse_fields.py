@@ -0,0 +1,143 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .exceptions import BadRequestException
+
+
+# ------------------ SPARSE FIELDSETS / EXPANSION ------------------
+# GET ...?fields=id,title,status  -> only these keys, and only their columns are SELECTed
+# GET ...?expand=assigned_to      -> the user object instead of its id, via select_related
+# Both apply to list and retrieve of the project, task and comment viewsets.
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+# Always loaded, even when not requested: cursor pagination and ETags read them
+KEY_FIELDS = ['id', 'created_at', 'updated_at']
+
+
+def parse_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def readable_fields(serializer_class):
+    return [name for name, field in serializer_class().fields.items() if not field.write_only]
+
+
+def sparse_params(request, serializer_class):
+    """
+    (fields, expand) requested for `serializer_class`, as sorted tuples;
+    fields is None when ?fields= is absent. Unknown names are a 400.
+    """
+    fields = parse_names(request.query_params.get(FIELDS_PARAM))
+    expand = parse_names(request.query_params.get(EXPAND_PARAM))
+
+    available = readable_fields(serializer_class)
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise BadRequestException(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}.")
+    expandable = serializer_class.expandable_fields
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        raise BadRequestException(f"Cannot expand: {', '.join(unknown)}. Expandable: {', '.join(expandable) or 'none'}.")
+    return (tuple(sorted(set(fields))) if fields else None), tuple(sorted(set(expand)))
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Applies context['sparse_fields'] = (fields, expand) to the top-level
+    serializer: expanded fields are replaced by `expandable_fields[name]`
+    (read-only) and the rest are dropped unless listed in `fields`.
+    """
+    expandable_fields = {}  # field name -> serializer class used for ?expand=
+
+    def is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.context.get('sparse_fields')
+        if not sparse or not self.is_top_level():
+            return fields
+        only, expand = sparse
+        for name in expand:
+            if name in fields:
+                fields[name] = self.expandable_fields[name](read_only=True)
+        if only is not None:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
+
+
+def sparse_queryset(queryset, serializer):
+    """
+    Narrow `queryset` to what `serializer` (already sparse) renders: only()
+    the selected columns plus KEY_FIELDS, select_related the expanded foreign
+    keys, and drop prefetches of many-to-many fields that weren't asked for.
+    """
+    model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+    columns = [name for name in KEY_FIELDS if name in model_fields]
+    related, keep_prefetch = [], False
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            keep_prefetch = True
+        elif isinstance(field, serializers.BaseSerializer):
+            related.append(field.source)
+            columns.append(field.source)
+            columns += [
+                f'{field.source}__{child.source}' for child in field.fields.values()
+                if not child.write_only and not isinstance(child, serializers.BaseSerializer)
+            ]
+        elif field.source in model_fields:
+            columns.append(field.source)
+
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    if not keep_prefetch:
+        queryset = queryset.prefetch_related(None)
+    return queryset.only(*dict.fromkeys(columns))
+
+
+class SparseFieldsMixin:
+    """
+    Viewset side of ?fields= / ?expand=: validates them, narrows the queryset,
+    hands them to the serializer through its context and adds the expanded
+    models to the collections behind ETags and cached responses.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_fields(self):
+        """(fields, expand) for this request, or None when neither was given."""
+        if not hasattr(self, '_sparse_fields'):
+            sparse = None
+            if self.action in self.sparse_actions and self.request.method in SAFE_METHODS:
+                fields, expand = sparse_params(self.request, self.get_serializer_class())
+                if fields is not None or expand:
+                    sparse = (fields, expand)
+            self._sparse_fields = sparse
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.get_sparse_fields():
+            context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sparse = self.get_sparse_fields()
+        if not sparse:
+            return queryset
+        return sparse_queryset(queryset, self.get_serializer_class()(context={'sparse_fields': sparse}))
+
+    def get_conditional_collections(self):
+        # Expanded objects are part of the representation, so their writes count too
+        collections = list(super().get_conditional_collections())
+        sparse = self.get_sparse_fields()
+        if sparse:
+            expandable = self.get_serializer_class().expandable_fields
+            collections += [expandable[name].Meta.model for name in sparse[1]]
+        return list(dict.fromkeys(collections))
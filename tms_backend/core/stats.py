@@ -0,0 +1,180 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import User, Task, Comment, ProjectStat
+
+
+# ------------------ COUNTER KEYS ------------------
+# Each counted row contributes +1 to a set of (project_id, dimension, key) counters.
+# On save the counters of the previously loaded values (Model.from_db keeps them
+# in `_loaded_values`) are decremented and those of the new values incremented.
+# Those values are reloaded under a row lock inside the saving transaction (see
+# lock_counted_rows), so two updates of one row can't both diff the same copy.
+TRACKED_FIELDS = {
+    Task: ['project_id', 'status', 'assigned_to_id'],
+    Comment: ['project_id'],
+}
+
+
+def counter_keys(model, values):
+    if model is Task:
+        assignee = '' if values['assigned_to_id'] is None else str(values['assigned_to_id'])
+        return [
+            (values['project_id'], ProjectStat.STATUS, values['status']),
+            (values['project_id'], ProjectStat.ASSIGNEE, assignee),
+        ]
+    return [(values['project_id'], ProjectStat.COMMENTS, '')]
+
+
+def current_values(model, instance):
+    return {field: getattr(instance, field) for field in TRACKED_FIELDS[model]}
+
+
+def loaded_values(model, instance):
+    """Values the row had in the database, or None when they were never (fully) loaded."""
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None or any(field not in loaded for field in TRACKED_FIELDS[model]):
+        return None
+    return {field: loaded[field] for field in TRACKED_FIELDS[model]}
+
+
+def remember_values(model, instance):
+    # After a save the stored row matches the instance, so later saves diff against it
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **current_values(model, instance)}
+
+
+def lock_counted_rows(model, instances, using=None):
+    """
+    Lock the stored rows of `instances` and reload their tracked values into
+    `_loaded_values`. Call it in the transaction that is about to update them:
+    the instances may have been loaded before a concurrent update committed.
+    """
+    instances = [instance for instance in instances if instance.pk is not None]
+    if not instances:
+        return
+    fields = TRACKED_FIELDS[model]
+    rows = (
+        model._base_manager.using(using).select_for_update()
+        .filter(pk__in=[instance.pk for instance in instances]).order_by('pk')
+        .values_list('pk', *fields)
+    )
+    stored = {pk: dict(zip(fields, values)) for pk, *values in rows}
+    for instance in instances:
+        if instance.pk in stored:
+            instance._loaded_values = {**(getattr(instance, '_loaded_values', None) or {}), **stored[instance.pk]}
+
+
+# ------------------ INCREMENTAL UPDATES ------------------
+def apply_deltas(deltas):
+    """Add each non-zero delta to its counter with an UPDATE ... SET count = count + n."""
+    for (project_id, dimension, key), delta in deltas.items():
+        if not delta:
+            continue
+        counter = ProjectStat.objects.filter(project_id=project_id, dimension=dimension, key=key)
+        if counter.update(count=F('count') + delta) or delta < 0:
+            continue
+        # First row for this key; a concurrent writer may create it first
+        try:
+            with transaction.atomic():
+                ProjectStat.objects.create(project_id=project_id, dimension=dimension, key=key, count=delta)
+        except IntegrityError:
+            counter.update(count=F('count') + delta)
+
+
+def record_saved(model, instances, created):
+    deltas, stale_projects = Counter(), set()
+    for instance in instances:
+        if not created:
+            old = loaded_values(model, instance)
+            if old is None:
+                # Previous values unknown (deferred fields): recount that project instead
+                stale_projects.add(instance.project_id)
+                remember_values(model, instance)
+                continue
+            for key in counter_keys(model, old):
+                deltas[key] -= 1
+        for key in counter_keys(model, current_values(model, instance)):
+            deltas[key] += 1
+        remember_values(model, instance)
+
+    apply_deltas(deltas)
+    if stale_projects:
+        rebuild_project_stats(stale_projects)
+
+
+def record_deleted(model, instances):
+    deltas = Counter()
+    for instance in instances:
+        values = loaded_values(model, instance) or current_values(model, instance)
+        for key in counter_keys(model, values):
+            deltas[key] -= 1
+    apply_deltas(deltas)
+
+
+def projects_assigned_to(user_id):
+    """
+    Projects with tasks assigned to the user. Deleting a user nulls
+    Task.assigned_to with a plain UPDATE (no signals), so these projects are
+    recounted once the delete has gone through.
+    """
+    counters = ProjectStat.objects.filter(dimension=ProjectStat.ASSIGNEE, key=str(user_id), count__gt=0)
+    return set(counters.values_list('project_id', flat=True))
+
+
+# ------------------ REBUILD ------------------
+def rebuild_project_stats(project_ids=None):
+    """
+    Recount every counter from the task and comment tables, for the given
+    projects or all of them. Used by the rebuild_project_stats command and as
+    the fallback when incremental maintenance lacks the previous values.
+    """
+    tasks, comments, stats = Task.objects.all(), Comment.objects.all(), ProjectStat.objects.all()
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        tasks = tasks.filter(project_id__in=project_ids)
+        comments = comments.filter(project_id__in=project_ids)
+        stats = stats.filter(project_id__in=project_ids)
+
+    rows = []
+    for row in tasks.values('project_id', 'status').annotate(n=Count('id')).order_by():
+        rows.append(ProjectStat(project_id=row['project_id'], dimension=ProjectStat.STATUS, key=row['status'], count=row['n']))
+    for row in tasks.values('project_id', 'assigned_to_id').annotate(n=Count('id')).order_by():
+        key = '' if row['assigned_to_id'] is None else str(row['assigned_to_id'])
+        rows.append(ProjectStat(project_id=row['project_id'], dimension=ProjectStat.ASSIGNEE, key=key, count=row['n']))
+    for row in comments.values('project_id').annotate(n=Count('id')).order_by():
+        rows.append(ProjectStat(project_id=row['project_id'], dimension=ProjectStat.COMMENTS, key='', count=row['n']))
+
+    with transaction.atomic():
+        stats.delete()
+        ProjectStat.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# ------------------ READ ------------------
+def project_stats(project):
+    """Dashboard payload for one project, read from its counter rows only."""
+    by_status = {value: 0 for value, _ in Task.STATUS_CHOICES}
+    by_assignee, comments = {}, 0
+    for dimension, key, count in project.stats.filter(count__gt=0).values_list('dimension', 'key', 'count'):
+        if dimension == ProjectStat.STATUS:
+            by_status[key] = count
+        elif dimension == ProjectStat.ASSIGNEE:
+            by_assignee[int(key) if key else None] = count
+        else:
+            comments = count
+
+    usernames = dict(User.objects.filter(id__in=[pk for pk in by_assignee if pk]).values_list('id', 'username'))
+    return {
+        'project': project.pk,
+        'tasks': {
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'by_assignee': [
+                {'user': user_id, 'username': usernames.get(user_id), 'count': count}
+                for user_id, count in sorted(by_assignee.items(), key=lambda item: (-item[1], item[0] or 0))
+            ],
+        },
+        'comments': {'total': comments},
+    }
@@ -0,0 +1,146 @@
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CHANGE_SEQUENCE, CollectionVersion, Project, Task, Comment, Tombstone, next_change_seq
+from .querysets import project_queryset
+from .versioning import collection_name
+from .visibility import scope_queryset, visible_project_ids
+
+
+def sync_setting(name):
+    defaults = {
+        'PAGE_SIZE': 500,  # Changed rows per source (projects, tasks, comments, deletions) per response
+    }
+    return getattr(settings, 'SYNC', {}).get(name, defaults[name])
+
+
+# ------------------ DELTA SYNC ------------------
+# GET /api/sync/?since=<watermark> returns the projects, tasks and comments
+# written after the watermark and the ids of those deleted since, by range scans
+# on the indexed change_seq columns and the tombstone table (see
+# models.next_change_seq). The cost follows the number of changes, not the size
+# of the dataset. The watermark is opaque to clients: the last change number
+# they hold plus a digest of the projects they could see. When their visible
+# projects change (or the watermark is missing or unknown) the response is a
+# full sync: every visible row, and the client replaces its local copy. A task
+# or comment moved to another project counts as deleted for clients that only
+# saw the old one.
+
+SYNCED_MODELS = {'projects': Project, 'tasks': Task, 'comments': Comment}
+
+
+def record_deletions(model, rows, change_seq=None):
+    """
+    Leave tombstones for deleted rows, given as (pk, project_id) pairs. Call
+    inside the deleting transaction; pass `change_seq` to share a number already
+    taken for the same deletion.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    if change_seq is None:
+        change_seq = next_change_seq()
+    Tombstone.objects.bulk_create([
+        Tombstone(model=collection_name(model), object_id=pk, project_id=project_id, change_seq=change_seq)
+        for pk, project_id in rows
+    ])
+
+
+def deletion_change_seq(origin, using):
+    """
+    One number for all the rows a single delete() call removes, cascades
+    included: it is kept on `origin` (the instance or queryset delete() was
+    called on) together with an on_commit marker, and reused while that marker
+    shows the same transaction is still open.
+    """
+    connection = transaction.get_connection(using)
+    cached = getattr(origin, '_deletion_change_seq', None)
+    if cached and any(func is cached[1] for _, func, _ in connection.run_on_commit):
+        return cached[0]
+    change_seq, marker = next_change_seq(), (lambda: None)
+    transaction.on_commit(marker, using=using)
+    origin._deletion_change_seq = (change_seq, marker)
+    return change_seq
+
+
+def current_change_seq():
+    return CollectionVersion.objects.filter(name=CHANGE_SEQUENCE).values_list('version', flat=True).first() or 0
+
+
+def scope_digest(user):
+    visible = visible_project_ids(user)
+    if visible is None:
+        return 'all'
+    return hashlib.md5(','.join(map(str, sorted(visible))).encode()).hexdigest()[:12]
+
+
+def make_watermark(change_seq, user):
+    return f'{change_seq}.{scope_digest(user)}'
+
+
+def parse_watermark(watermark, user):
+    """The change number to continue from, or None when the client needs a full sync."""
+    change_seq, _, digest = (watermark or '').partition('.')
+    if not change_seq.isdigit() or digest != scope_digest(user):
+        return None
+    return int(change_seq)
+
+
+def changes_since(user, watermark, page_size=None):
+    """
+    Rows changed after `watermark`, at most about `page_size` per source. A
+    page ends on a change number boundary, so rows written together are never
+    split; `has_more` asks the client to call again with the new watermark.
+    """
+    page_size = page_size or sync_setting('PAGE_SIZE')
+    since = parse_watermark(watermark, user)
+    full = since is None
+    # Numbers up to the counter's committed value all belong to committed rows
+    head = current_change_seq()
+    low = -1 if full else since
+
+    sources = {
+        'projects': scope_queryset(Project.all_objects.all(), user, 'id'),
+        'tasks': scope_queryset(Task.objects.all(), user, 'project_id'),
+        'comments': scope_queryset(Comment.objects.all(), user, 'project_id'),
+    }
+    if full:
+        sources['projects'] = sources['projects'].filter(deleted_at__isnull=True)
+    else:
+        sources['deleted'] = scope_queryset(Tombstone.objects.all(), user, 'project_id')
+
+    until = head
+    for queryset in sources.values():
+        window = queryset.filter(change_seq__gt=low, change_seq__lte=until).order_by('change_seq')
+        beyond = list(window.values_list('change_seq', flat=True)[page_size:page_size + 1])
+        if beyond:
+            until = beyond[0]
+
+    def changed(queryset):
+        return queryset.filter(change_seq__gt=low, change_seq__lte=until).order_by('change_seq', 'id')
+
+    result = {
+        'watermark': make_watermark(until, user),
+        'full': full,
+        'has_more': until < head,
+        'projects': changed(scope_queryset(project_queryset(), user, 'id')),
+        'tasks': changed(sources['tasks']),
+        'comments': changed(sources['comments']),
+        'deleted': {name: [] for name in SYNCED_MODELS},
+    }
+    if not full:
+        names = {collection_name(model): name for name, model in SYNCED_MODELS.items()}
+        for model, object_id in changed(sources['deleted']).values_list('model', 'object_id'):
+            result['deleted'][names[model]].append(object_id)
+        # A moved task or comment leaves a tombstone under its old project; for
+        # clients that still see it the row itself is the change
+        for name in ('tasks', 'comments'):
+            if result['deleted'][name]:
+                present = set(sources[name].filter(id__in=result['deleted'][name]).values_list('id', flat=True))
+                result['deleted'][name] = [pk for pk in result['deleted'][name] if pk not in present]
+        # Soft-deleted projects are gone for clients before they are purged
+        hidden = changed(sources['projects'].filter(deleted_at__isnull=False)).values_list('id', flat=True)
+        result['deleted']['projects'].extend(hidden)
+    return result
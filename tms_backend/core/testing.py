@@ -0,0 +1,45 @@
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from .metrics import resolved_route
+
+
+class QueryBudgetMixin:
+    """
+    APITestCase mixin for the `query_budget` declared on viewsets:
+
+        self.assertWithinQueryBudget('/api/tasks/', HTTP_AUTHORIZATION=...)
+
+    Resolves the viewset action behind the URL, sends the request once to warm
+    per-process caches (tokens), then again with the response cache off and
+    fails if the second one ran more queries than budgeted for that action.
+    Requests that can't be repeated (deletes) pass warm=False; `action` names
+    the budget when one route serves several (DELETE /api/tasks/bulk/ is
+    'bulk_destroy').
+    """
+
+    def assertWithinQueryBudget(self, path, method='get', data=None, action=None, warm=True, **extra):
+        match = resolve(urlsplit(path).path)
+        route, resolved = resolved_route(match, method)
+        action = action or resolved
+        budget = getattr(match.func.cls, 'query_budget', {}).get(action)
+        if budget is None:
+            self.fail(f"{match.func.cls.__name__} declares no query_budget for '{action}'")
+
+        send = getattr(self.client, method.lower())
+        with override_settings(RESPONSE_CACHE={'ENABLED': False}):
+            if warm:
+                send(path, data, **extra)
+            with CaptureQueriesContext(connection) as context:
+                response = send(path, data, **extra)
+
+        self.assertLess(response.status_code, 400, f"{method.upper()} {path} returned {response.status_code}")
+        queries = len(context.captured_queries)
+        if queries > budget:
+            listing = '\n'.join(f"  {query['sql']}" for query in context.captured_queries)
+            self.fail(f"{route}-{action} ran {queries} queries, budget is {budget}:\n{listing}")
+        return response
@@ -0,0 +1,82 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment
+
+
+# The sync endpoints are compared uncached so both paths really run their queries
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class AsyncReadPathTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.project = Project.objects.create(name='Website redesign', description='Marketing site')
+        self.project.users.add(self.user)
+        for i in range(12):
+            task = Task.objects.create(
+                title=f'Task {i}', status='done' if i % 3 == 0 else 'todo',
+                project=self.project, assigned_to=self.user, created_by=self.user,
+            )
+        Comment.objects.create(content='Looks good', task=task, project=self.project, user=self.user, created_by=self.user)
+
+    def assert_same_as_sync(self, path):
+        sync = self.client.get(f'/api/{path}')
+        asynchronous = self.client.get(f'/api/async/{path}')
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        data, expected = asynchronous.json(), sync.json()
+        if isinstance(expected, dict) and 'next' in expected:
+            for key in ('next', 'previous'):
+                expected[key] = expected[key] and expected[key].replace('/api/', '/api/async/')
+        self.assertEqual(data, expected)
+        return data
+
+    def test_lists_match_sync_viewsets(self):
+        data = self.assert_same_as_sync('tasks/')
+        self.assertEqual(data['count'], 12)
+        self.assertEqual(len(data['results']), 10)
+        self.assert_same_as_sync('tasks/?page=2')
+        self.assert_same_as_sync('projects/')
+        self.assert_same_as_sync('comments/')
+
+    def test_filters_and_search_match_sync_viewsets(self):
+        self.assertEqual(self.assert_same_as_sync('tasks/?status=done')['count'], 4)
+        self.assert_same_as_sync(f'tasks/?project={self.project.id}&title=Task 1')
+        self.assertEqual(self.assert_same_as_sync('projects/?q=website')['count'], 1)
+
+    def test_sparse_fields_and_cursor_pages_match_sync_viewsets(self):
+        self.assert_same_as_sync('tasks/?fields=id,title&expand=assigned_to')
+        self.assert_same_as_sync(f'tasks/{Task.objects.first().id}/?fields=id,status')
+        first = self.assert_same_as_sync('tasks/?pagination=cursor')
+        self.assertEqual(len(first['results']), 10)
+        cursor = first['next'].split('cursor=')[1]
+        self.assertEqual(len(self.assert_same_as_sync(f'tasks/?cursor={cursor}')['results']), 2)
+        # Bad parameters are refused the same way
+        self.assert_same_as_sync('tasks/?fields=nope')
+        self.assert_same_as_sync('tasks/?q=task&pagination=cursor')
+
+    def test_retrieve(self):
+        task = Task.objects.first()
+        self.assert_same_as_sync(f'tasks/{task.id}/')
+        self.assert_same_as_sync(f'projects/{self.project.id}/')
+        response = self.client.get('/api/async/tasks/99999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_page_and_bad_token(self):
+        self.assertEqual(self.client.get('/api/async/tasks/?page=9').status_code, status.HTTP_404_NOT_FOUND)
+        self.client.credentials(HTTP_AUTHORIZATION='Token nope')
+        response = self.client.get('/api/async/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'detail': 'Invalid token.'})
+
+    def test_read_only(self):
+        response = self.client.post('/api/async/tasks/', {'title': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_served_under_async_client(self):
+        response = await self.async_client.get('/api/async/tasks/', headers={'authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 12)
@@ -0,0 +1,202 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import RevocationList, token_cache, jwt_revocations
+from core.checks import check_shared_caches
+from core.models import User, Project, Task
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username='dev', password='1234', role='Developer')
+        self.project = Project.objects.create(name='Proj', description='Desc')
+        self.project.users.add(self.user)
+        self.token = Token.objects.get(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def token_queries(self, url='/api/auth/profile/'):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, [q for q in context.captured_queries if 'authtoken_token' in q['sql']]
+
+    def create_task(self):
+        return self.client.post('/api/tasks/', {
+            'title': 'T', 'status': 'todo', 'assigned_to': self.user.id,
+            'project': self.project.id, 'created_by': self.user.id,
+        })
+
+    def test_repeat_requests_skip_token_lookup(self):
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_role_change_applies_immediately(self):
+        self.assertEqual(self.create_task().status_code, 201)
+
+        self.user.role = User.CLIENT
+        self.user.save()
+
+        self.assertEqual(self.create_task().status_code, 403)
+        self.assertEqual(self.client.get('/api/auth/profile/').data['role'], User.CLIENT)
+
+    def test_deleted_token_is_rejected(self):
+        self.token_queries()
+        self.token.delete()
+
+        response, _ = self.token_queries()
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.token_queries()
+        self.user.is_active = False
+        self.user.save()
+
+        response, _ = self.token_queries()
+        self.assertEqual(response.status_code, 401)
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        first = token_cache.set(self.token.key, Token.objects.select_related('user').get(key=self.token.key))
+        first.user.role = User.ADMIN
+        self.assertEqual(token_cache.get(self.token.key).user.role, User.DEVELOPER)
+
+    def test_lru_evicts_oldest_token(self):
+        other = User.objects.create_user(username='other', password='1234')
+        # The in-process tier on its own
+        with self.settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 1, 'SHARED_CACHE': None}):
+            token_cache.set(self.token.key, self.token)
+            token_cache.set(other.auth_token.key, other.auth_token)
+            self.assertIsNone(token_cache.get(self.token.key))
+            self.assertIsNotNone(token_cache.get(other.auth_token.key))
+
+
+class SharedTokenCacheTests(APITestCase):
+    def setUp(self):
+        self.settings_override = self.settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tokens'},
+            },
+            TOKEN_AUTH_CACHE={'SHARED_CACHE': 'tokens'},
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        token_cache.clear()
+
+        self.user = User.objects.create_user(username='dev', password='1234', role='Developer')
+        self.token = Token.objects.get(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_other_worker_is_served_from_shared_tier(self):
+        self.client.get('/api/auth/profile/')
+        token_cache.clear()  # a fresh worker process has an empty local tier
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('authtoken_token' in q['sql'] for q in context.captured_queries))
+
+    def test_invalidation_from_other_worker_drops_local_entry(self):
+        self.client.get('/api/auth/profile/')
+        # Another worker changes the role: the row is updated and the version stamp bumped,
+        # but this process never sees a signal for it.
+        User.objects.filter(pk=self.user.pk).update(role=User.CLIENT)
+        token_cache.shared.set(token_cache._version_key(self.user.pk), 'bumped-elsewhere', None)
+
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['role'], User.CLIENT)
+
+
+    def test_deploy_check_requires_a_shared_token_cache(self):
+        def failing(backend, **token_auth_cache):
+            caches = {'tokens': {'BACKEND': backend, 'LOCATION': 'redis://localhost'}}
+            with override_settings(CACHES=caches, TOKEN_AUTH_CACHE={'SHARED_CACHE': 'tokens', **token_auth_cache}):
+                return any(e.msg.startswith("TOKEN_AUTH_CACHE['SHARED_CACHE']") for e in check_shared_caches(None))
+
+        self.assertFalse(failing('django.core.cache.backends.redis.RedisCache'))
+        self.assertTrue(failing('django.core.cache.backends.locmem.LocMemCache'))
+        self.assertTrue(failing('django.core.cache.backends.redis.RedisCache', SHARED_CACHE=None))
+
+
+class JWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        jwt_revocations.clear()
+        self.user = User.objects.create_user(username='dev', password='1234', role='Developer')
+        self.project = Project.objects.create(name='Proj', description='Desc')
+        self.project.users.add(self.user)
+        self.tokens = self.client.post('/api/auth/jwt/login/', {'username': 'dev', 'password': '1234'}).data
+
+    def bearer(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+
+    def create_task(self):
+        return self.client.post('/api/tasks/', {
+            'title': 'T', 'status': 'todo', 'assigned_to': self.user.id,
+            'project': self.project.id, 'created_by': self.user.id,
+        })
+
+    def test_access_token_carries_the_role(self):
+        self.assertEqual(AccessToken(self.tokens['access'])['role'], 'Developer')
+        self.bearer(self.tokens['access'])
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in context.captured_queries if 'core_user' in q['sql'] or 'authtoken_token' in q['sql']])
+
+    def test_writes_use_the_token_user(self):
+        self.bearer(self.tokens['access'])
+        response = self.create_task()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.get(pk=response.data['id']).created_by, self.user)
+
+    def test_user_changes_void_access_tokens_until_refresh(self):
+        self.user.role = User.CLIENT
+        self.user.save()
+        self.bearer(self.tokens['access'])
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+        access = self.client.post('/api/auth/jwt/refresh/', {'refresh': self.tokens['refresh']}).data['access']
+        self.assertEqual(AccessToken(access)['role'], User.CLIENT)
+        self.bearer(access)
+        self.assertEqual(self.create_task().status_code, 403)
+
+    def test_tokens_outlive_the_worker_that_issued_them(self):
+        jwt_revocations.clear()  # Another worker, or a restart
+        self.bearer(self.tokens['access'])
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 200)
+
+        self.user.role = User.CLIENT
+        self.user.save()
+        jwt_revocations.clear()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_revocations_reach_other_workers(self):
+        other_worker = RevocationList()
+        issued = AccessToken(self.tokens['access'])['ver']
+        self.assertEqual(other_worker.user_version(self.user.pk), issued)
+        self.user.save()  # Signals reach this worker's jwt_revocations only
+        self.assertNotEqual(other_worker.user_version(self.user.pk), issued)
+
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertTrue(any(e.msg.startswith("JWT_REVOCATION['SHARED_CACHE']") for e in check_shared_caches(None)))
+
+    def test_logout_revokes_both_tokens(self):
+        self.bearer(self.tokens['access'])
+        response = self.client.post('/api/auth/jwt/logout/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(response.status_code, 205)
+
+        jwt_revocations.clear()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.post('/api/auth/jwt/refresh/', {'refresh': self.tokens['refresh']}).status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/jwt/verify/', {'token': self.tokens['access']}).status_code, 401)
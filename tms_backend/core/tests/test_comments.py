@@ -1,3 +1,8 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from core.models import User, Task, Project, Comment
 from rest_framework.authtoken.models import Token
@@ -8,6 +13,7 @@ class CommentTests(APITestCase):
         self.user = User.objects.create_user(username="commenter", password="1234", role="Developer")
         self.admin_user = User.objects.create_user(username="admin", password="1234", role="Admin")
         self.project = Project.objects.create(name="P", description="D")
+        self.project.users.add(self.user)
         self.task = Task.objects.create(
             title="T", description="D", status="To Do",
             assigned_to=self.user, project=self.project,
@@ -58,3 +64,73 @@ class CommentTests(APITestCase):
         response = self.client.delete(f"/api/comments/{comment.id}/")
         self.assertEqual(response.status_code, 204)
 
+
+    def test_list_comments_with_cursor(self):
+        for i in range(12):
+            Comment.objects.create(
+                content=f"C{i}", task=self.task, project=self.project,
+                user=self.user, created_by=self.user
+            )
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        first = self.client.get("/api/comments/?pagination=cursor")
+        second = self.client.get(first.data['next'])
+
+        self.assertEqual([c['content'] for c in first.data['results']], [f"C{i}" for i in range(11, 1, -1)])
+        self.assertEqual([c['content'] for c in second.data['results']], ["C1", "C0"])
+        self.assertIsNone(second.data['next'])
+
+
+class CommentProjectTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="commenter", password="1234", role="Developer")
+        self.token = Token.objects.get(user=self.user)
+        self.project = Project.objects.create(name="P", description="D")
+        self.other = Project.objects.create(name="Other", description="D")
+        self.user.projects.add(self.project, self.other)
+        self.task = Task.objects.create(title="T", project=self.project, assigned_to=self.user, created_by=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def comments_total(self, project):
+        return self.client.get(f"/api/projects/{project.id}/stats/").data['comments']['total']
+
+    def test_project_is_derived_from_the_task(self):
+        response = self.client.post("/api/comments/", {"content": "Hi", "task": self.task.id, "project": self.other.id})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['project'], self.project.id)
+        comment = Comment.objects.create(content="ORM", task=self.task, project=self.other, user=self.user, created_by=self.user)
+        self.assertEqual(Comment.objects.get(pk=comment.pk).project_id, self.project.id)
+
+    def test_moving_a_task_moves_its_comments(self):
+        for i in range(3):
+            Comment.objects.create(content=f"C{i}", task=self.task, user=self.user, created_by=self.user)
+        response = self.client.patch(f"/api/tasks/{self.task.id}/", {"project": self.other.id})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(set(Comment.objects.values_list('project_id', flat=True)), {self.other.id})
+        self.assertEqual((self.comments_total(self.project), self.comments_total(self.other)), (0, 3))
+        response = self.client.get(f"/api/comments/?project={self.other.id}")
+        self.assertEqual(response.data['count'], 3)
+
+        self.client.patch("/api/tasks/bulk/", [{"id": self.task.id, "project": self.project.id}], format='json')
+        self.assertEqual(Comment.objects.filter(project=self.project).count(), 3)
+        self.assertEqual((self.comments_total(self.project), self.comments_total(self.other)), (3, 0))
+
+    def test_project_filter_uses_the_comment_column(self):
+        Comment.objects.create(content="Hi", task=self.task, user=self.user, created_by=self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f"/api/comments/?project={self.project.id}")
+        self.assertEqual(response.data['count'], 1)
+        self.assertFalse(any('core_task' in query['sql'] for query in context.captured_queries))
+
+    def test_repair_command_fixes_existing_rows(self):
+        comments = [Comment.objects.create(content=f"C{i}", task=self.task, user=self.user, created_by=self.user) for i in range(5)]
+        Comment.objects.filter(pk__in=[c.pk for c in comments[:3]]).update(project=self.other)  # Written before the fix
+        call_command('rebuild_project_stats', stdout=StringIO())
+
+        out = StringIO()
+        call_command('repair_comment_projects', '--dry-run', stdout=out)
+        self.assertIn('3 comments', out.getvalue())
+        call_command('repair_comment_projects', '--batch-size', '2', stdout=out)
+        self.assertIn('Repaired 3 comments.', out.getvalue())
+        self.assertFalse(Comment.objects.exclude(project=self.project).exists())
+        self.assertEqual((self.comments_total(self.project), self.comments_total(self.other)), (5, 0))
@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='password', role='Project Manager')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.client.force_authenticate(user=self.manager)
+        self.project = Project.objects.create(name='Proj', description='Desc')
+        self.task = Task.objects.create(title='T', project=self.project, assigned_to=self.dev, created_by=self.manager)
+
+    def get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        response = self.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get('/api/tasks/', if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+        # Only the collection version lookup; the task table isn't touched
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('core_task', ctx.captured_queries[0]['sql'])
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.get('/api/tasks/')['ETag']
+        Task.objects.create(title='New', project=self.project, created_by=self.manager)
+        response = self.get('/api/tasks/', if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_list_etag_depends_on_query_and_role(self):
+        etag = self.get('/api/tasks/')['ETag']
+        self.assertNotEqual(self.get('/api/tasks/?status=done')['ETag'], etag)
+        self.client.force_authenticate(user=self.dev)
+        self.assertEqual(self.get('/api/tasks/', if_none_match=etag).status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_and_last_modified(self):
+        url = f'/api/tasks/{self.task.id}/'
+        response = self.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.get(url, if_modified_since=last_modified).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'status': 'done'})
+        response = self.get(url, if_none_match=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'done')
+
+    def test_bulk_update_changes_detail_etag(self):
+        url = f'/api/tasks/{self.task.id}/'
+        etag = self.get(url)['ETag']
+        self.client.patch('/api/tasks/bulk/', [{'id': self.task.id, 'status': 'in_progress'}], format='json')
+        self.assertEqual(self.get(url, if_none_match=etag).status_code, status.HTTP_200_OK)
+
+    def test_membership_and_member_changes_invalidate_projects(self):
+        url = f'/api/projects/{self.project.id}/'
+        list_etag, detail_etag = self.get('/api/projects/')['ETag'], self.get(url)['ETag']
+
+        self.project.users.add(self.dev)
+        self.assertEqual(self.get('/api/projects/', if_none_match=list_etag).status_code, status.HTTP_200_OK)
+        detail = self.get(url, if_none_match=detail_etag)
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+
+        # Projects embed their members, so renaming one changes the project too
+        self.dev.first_name = 'Renamed'
+        self.dev.save()
+        self.assertEqual(self.get(url, if_none_match=detail['ETag']).status_code, status.HTTP_200_OK)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.events import InProcessBroker, RESET, get_broker, project_channel
+from core.feeds import websocket_application
+from core.models import User, Project, Task, Comment
+from core.serializers import ClaimsTokenObtainPairSerializer
+
+
+class BrokerTests(TestCase):
+    async def test_subscribers_receive_published_events(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe('project:1')
+        other = broker.subscribe('project:2')
+        broker.publish('project:1', 'task.created', {'id': 1})
+
+        event = await subscription.next(timeout=1)
+        self.assertEqual((event.type, event.data), ('task.created', {'id': 1}))
+        self.assertIsNone(await other.next(timeout=0.05))
+        subscription.close()
+        other.close()
+
+    async def test_resume_replays_missed_events(self):
+        broker = InProcessBroker()
+        first = broker.publish('project:1', 'task.created', {'id': 1})
+        broker.publish('project:2', 'task.created', {'id': 2})
+        broker.publish('project:1', 'task.updated', {'id': 1})
+
+        subscription = broker.subscribe('project:1', last_event_id=first.id)
+        event = await subscription.next(timeout=1)
+        self.assertEqual(event.type, 'task.updated')
+        self.assertIsNone(await subscription.next(timeout=0.05))
+        subscription.close()
+
+    @override_settings(CHANGE_FEED={'HISTORY': 2})
+    async def test_unknown_or_expired_id_gets_reset(self):
+        broker = InProcessBroker()
+        first = broker.publish('project:1', 'task.created', {'id': 1})
+        for i in range(3):
+            broker.publish('project:1', 'task.updated', {'id': 1})
+
+        for last_event_id in (first.id, 'other-epoch-5'):
+            subscription = broker.subscribe('project:1', last_event_id=last_event_id)
+            event = await subscription.next(timeout=1)
+            self.assertEqual(event.type, RESET)
+            subscription.close()
+
+    @override_settings(CHANGE_FEED={'QUEUE_SIZE': 2})
+    async def test_slow_subscriber_is_reset(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe('project:1')
+        for i in range(5):
+            broker.publish('project:1', 'task.updated', {'id': i})
+        await asyncio.sleep(0)
+        event = await subscription.next(timeout=1)
+        self.assertEqual(event.type, RESET)
+        subscription.close()
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='password', role='Project Manager')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.token = Token.objects.get(user=self.manager).key
+        self.project = Project.objects.create(name='Feed')
+        self.other = Project.objects.create(name='Other')
+        self.task = Task.objects.create(title='T', project=self.project, assigned_to=self.dev, created_by=self.manager)
+
+    def last_events(self, project, count):
+        history = get_broker()._history.get(project_channel(project.id), [])
+        return [(event.type, event.data) for event in list(history)[-count:]]
+
+    def test_writes_publish_events_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(user=self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/tasks/{self.task.id}/', {'status': 'done'})
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/tasks/{self.task.id}/', {'title': 'Renamed'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(content='Hi', task=self.task, project=self.project, user=self.dev, created_by=self.dev)
+
+        (status_type, status_data), (update_type, _), (comment_type, comment_data) = self.last_events(self.project, 3)
+        self.assertEqual(status_type, 'task.status_changed')
+        self.assertEqual((status_data['status'], status_data['previous_status']), ('done', 'todo'))
+        self.assertEqual(update_type, 'task.updated')
+        self.assertEqual((comment_type, comment_data['task']), ('comment.created', self.task.id))
+
+        # Moving a task is announced on both projects; deleting it on its project
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch(f'/api/tasks/{self.task.id}/', {'project': self.other.id})
+        self.assertEqual(self.last_events(self.project, 1)[0][0], 'task.updated')
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete(f'/api/tasks/{self.task.id}/')
+        self.assertEqual(self.last_events(self.other, 1), [('task.deleted', {'id': self.task.id, 'project': self.other.id})])
+
+    def test_bulk_writes_publish_events(self):
+        client = APIClient()
+        client.force_authenticate(user=self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.patch('/api/tasks/bulk/', [{'id': self.task.id, 'status': 'in_progress'}], format='json')
+        self.assertEqual(self.last_events(self.project, 1)[0][0], 'task.status_changed')
+
+    def test_rolled_back_writes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Task.objects.create(title='Never', project=self.project, created_by=self.manager)
+        self.assertEqual(len(callbacks), 1)  # Only runs if the transaction commits
+
+    async def test_sse_stream_replays_and_pushes(self):
+        first = get_broker().publish(project_channel(self.project.id), 'task.created', {'id': 1})
+        get_broker().publish(project_channel(self.project.id), 'task.updated', {'id': 1})
+
+        response = await self.async_client.get(
+            f'/api/projects/{self.project.id}/events/',
+            headers={'authorization': f'Token {self.token}', 'last-event-id': first.id},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'retry:', await anext(stream))
+        replayed = (await anext(stream)).decode()
+        self.assertIn('event: task.updated', replayed)
+
+        pushed = get_broker().publish(project_channel(self.project.id), 'comment.created', {'id': 7})
+        message = (await asyncio.wait_for(anext(stream), 1)).decode()
+        self.assertIn(f'id: {pushed.id}', message)
+        self.assertIn('data: {"id": 7}', message)
+        await stream.aclose()
+
+    async def test_sse_requires_token_and_existing_project(self):
+        response = await self.async_client.get(f'/api/projects/{self.project.id}/events/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(f'/api/projects/9999/events/?token={self.token}')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_sse_accepts_jwt_bearer_tokens(self):
+        access = ClaimsTokenObtainPairSerializer.get_token(self.manager).access_token
+        response = await self.async_client.get(
+            f'/api/projects/{self.project.id}/events/', headers={'authorization': f'Bearer {access}'},
+        )
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'retry:', await anext(stream))
+        await stream.aclose()
+        response = await self.async_client.get(f'/api/projects/{self.project.id}/events/?access_token=nope')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_sse_stream_ends_when_the_project_is_no_longer_visible(self):
+        await sync_to_async(self.project.users.add)(self.dev)
+        dev_token = (await Token.objects.aget(user=self.dev)).key
+        response = await self.async_client.get(f'/api/projects/{self.project.id}/events/?token={dev_token}')
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+
+        get_broker().publish(project_channel(self.project.id), 'task.created', {'id': 1})
+        self.assertIn(b'task.created', await asyncio.wait_for(anext(stream), 1))
+        await sync_to_async(self.project.users.remove)(self.dev)
+        get_broker().publish(project_channel(self.project.id), 'task.created', {'id': 2})
+        with self.assertRaises(StopAsyncIteration):
+            await asyncio.wait_for(anext(stream), 1)
+
+    async def test_websocket_feed(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            'type': 'websocket',
+            'path': f'/ws/projects/{self.project.id}/',
+            'query_string': f'token={self.token}'.encode(),
+            'headers': [],
+        }
+        await incoming.put({'type': 'websocket.connect'})
+        app = asyncio.ensure_future(websocket_application(scope, incoming.get, outgoing.put))
+
+        self.assertEqual((await asyncio.wait_for(outgoing.get(), 1))['type'], 'websocket.accept')
+        event = get_broker().publish(project_channel(self.project.id), 'task.created', {'id': 3})
+        message = await asyncio.wait_for(outgoing.get(), 1)
+        self.assertEqual(json.loads(message['text']), {'id': event.id, 'type': 'task.created', 'data': {'id': 3}})
+
+        await incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(app, 1)
+
+    async def test_websocket_closes_after_project_deletion(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            'type': 'websocket',
+            'path': f'/ws/projects/{self.project.id}/',
+            'headers': [(b'authorization', f'Token {self.token}'.encode())],
+        }
+        await incoming.put({'type': 'websocket.connect'})
+        app = asyncio.ensure_future(websocket_application(scope, incoming.get, outgoing.put))
+        self.assertEqual((await asyncio.wait_for(outgoing.get(), 1))['type'], 'websocket.accept')
+
+        get_broker().publish(project_channel(self.project.id), 'project.deleted', {'id': self.project.id})
+        self.assertEqual(json.loads((await asyncio.wait_for(outgoing.get(), 1))['text'])['type'], 'project.deleted')
+        self.assertEqual(await asyncio.wait_for(outgoing.get(), 1), {'type': 'websocket.close', 'code': 4404})
+        await asyncio.wait_for(app, 1)
+
+    async def test_websocket_rejects_bad_token(self):
+        incoming, outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {'type': 'websocket', 'path': f'/ws/projects/{self.project.id}/', 'query_string': b'token=nope', 'headers': []}
+        await incoming.put({'type': 'websocket.connect'})
+        await websocket_application(scope, incoming.get, outgoing.put)
+        self.assertEqual(await outgoing.get(), {'type': 'websocket.close', 'code': 4401})
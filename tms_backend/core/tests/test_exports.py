@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import User, Project, Task, Comment
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='dev', role='Developer')
+        self.other = User.objects.create_user(username='dev2', password='dev', role='Developer')
+        self.project = Project.objects.create(name='Website', description='Redesign', created_by=self.user)
+        self.project.users.set([self.user, self.other])
+        self.tasks = [
+            Task.objects.create(
+                title=f'Task {i}', project=self.project, created_by=self.user,
+                assigned_to=self.user, status='done' if i % 2 else 'todo',
+            )
+            for i in range(25)
+        ]
+        Comment.objects.create(content='Looks good', task=self.tasks[0], project=self.project, user=self.user, created_by=self.user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def read_stream(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_is_unpaginated(self):
+        body = self.read_stream(self.client.get('/api/tasks/export/'))
+        rows = [json.loads(line) for line in body.splitlines()]
+
+        self.assertEqual(len(rows), 25)
+        list_item = self.client.get(f'/api/tasks/{self.tasks[0].id}/').data
+        self.assertEqual(rows[0], dict(list_item))
+
+    def test_export_honors_filters(self):
+        body = self.read_stream(self.client.get('/api/tasks/export/?status=done'))
+        self.assertEqual(len(body.splitlines()), 12)
+
+    def test_csv_export(self):
+        response = self.client.get('/api/projects/export/?output=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self.read_stream(response))))
+
+        self.assertEqual(rows[0], ['id', 'name', 'description', 'created_at', 'updated_at', 'created_by', 'user_ids'])
+        self.assertEqual(rows[1][1], 'Website')
+        self.assertEqual(rows[1][6], f'{self.user.id};{self.other.id}')
+
+    def test_project_export_uses_one_membership_query_per_chunk(self):
+        for i in range(5):
+            Project.objects.create(name=f'P{i}').users.set([self.user])
+        with self.assertNumQueries(2):
+            body = self.read_stream(self.client.get('/api/projects/export/'))
+        self.assertEqual(len(body.splitlines()), 6)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/comments/export/?output=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_tms_data', 'comments', '--filter', f'task={self.tasks[0].id}', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['content'] for row in rows], ['Looks good'])
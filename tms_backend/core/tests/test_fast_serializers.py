@@ -0,0 +1,72 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment
+from core.renderers import ORJSONRenderer
+from core.serializers import ProjectSerializer, TaskSerializer, CommentSerializer
+
+
+class FastSerializationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.other = User.objects.create_user(username='other', password='password', role='Client')
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.project = Project.objects.create(name='Website', description='Redesign', created_by=self.user)
+        self.project.users.set([self.other, self.user])
+        Project.objects.create(name='Empty', description='No members')
+        for i in range(12):
+            task = Task.objects.create(
+                title=f'Task {i}', status='done' if i % 2 else 'todo', project=self.project,
+                assigned_to=self.user if i % 3 else None, created_by=self.user,
+            )
+            Comment.objects.create(content=f'Comment {i}', task=task, user=self.user, created_by=self.user)
+
+    def test_values_data_matches_serializer_output(self):
+        for serializer_class, model in ((ProjectSerializer, Project), (TaskSerializer, Task), (CommentSerializer, Comment)):
+            with self.subTest(serializer=serializer_class.__name__):
+                queryset = model.objects.order_by('id')
+                expected = serializer_class(queryset, many=True).data
+                self.assertEqual(serializer_class.values_data(queryset), [dict(item) for item in expected])
+
+    def test_list_endpoints_match_the_regular_path(self):
+        paths = [
+            '/api/projects/', '/api/tasks/', '/api/tasks/?page=2', '/api/tasks/?status=done',
+            '/api/comments/?pagination=cursor', f'/api/comments/?project={self.project.id}', '/api/tasks/?q=task',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                with override_settings(RESPONSE_CACHE={'ENABLED': False}):
+                    fast = self.client.get(path)
+                    with override_settings(FAST_SERIALIZATION={'ENABLED': False}):
+                        regular = self.client.get(path)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, regular.content)
+
+    def test_cursor_pages_follow_on(self):
+        first = self.client.get('/api/comments/?pagination=cursor')
+        second = self.client.get(first.data['next'])
+        contents = [c['content'] for c in first.data['results'] + second.data['results']]
+        self.assertEqual(contents, [f'Comment {i}' for i in range(11, -1, -1)])
+
+
+class ORJSONRendererTests(TestCase):
+    def test_output_matches_json_renderer(self):
+        data = {
+            'text': 'naïve   line', 'number': 3, 'ratio': 0.5, 'none': None, 'list': [1, 'two'],
+            'when': datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2025, 1, 2), 'price': Decimal('1.50'), 1: 'int key',
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_and_oversized_ints_fall_back(self):
+        data = {'big': 2 ** 70, 'a': [1]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = 'application/json; indent=2'
+        self.assertEqual(ORJSONRenderer().render(data, indented), JSONRenderer().render(data, indented))
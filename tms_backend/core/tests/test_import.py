@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.models import User, Project, Task, Comment
+from core.utils.importer import iter_json_document
+
+SAMPLE_DATA = os.path.join(settings.BASE_DIR.parent, 'sample_data.json')
+
+
+class LoadTMSDataTests(TestCase):
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def load(self, path, *args):
+        out = io.StringIO()
+        call_command('load_tms_data', path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_load_sample_data(self):
+        output = self.load(SAMPLE_DATA)
+
+        self.assertIn('rows/sec', output)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Token.objects.count(), 5)
+        self.assertEqual(Project.objects.count(), 2)
+        self.assertEqual(Task.objects.count(), 3)
+        self.assertEqual(Comment.objects.count(), 3)
+
+        website = Project.objects.get(name='Website Redesign')
+        self.assertEqual(
+            sorted(website.users.values_list('username', flat=True)),
+            ['client_user', 'dev_user', 'lead_user', 'pm_user'],
+        )
+        task = Task.objects.get(title='Setup backend')
+        self.assertEqual((task.status, task.assigned_to.username, task.created_by.username), ('in_progress', 'dev_user', 'lead_user'))
+
+        # Passwords are hashed, so imported users can log in right away
+        response = APIClient().post('/api/auth/login/', {'username': 'dev_user', 'password': 'devpass123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], User.objects.get(username='dev_user').auth_token.key)
+
+    def test_load_ndjson_in_batches_without_signals(self):
+        lines = [{'type': 'user', 'username': f'user{i}', 'role': 'Developer'} for i in range(7)]
+        lines += [{'type': 'project', 'name': 'Roadmap', 'user_ids': [1, 2, 2]}]
+        lines += [
+            {'type': 'task', 'title': f'Milestone {i}', 'project': 1, 'assigned_to': i + 1, 'created_by': 1}
+            for i in range(5)
+        ]
+        lines += [{'type': 'comment', 'content': 'On it', 'task': 5, 'user': 3}]
+        path = self.write_file('.ndjson', '\n'.join(json.dumps(line) for line in lines))
+
+        self.load(path, '--batch-size', '3', '--unusable-passwords', '--skip-signals')
+
+        self.assertEqual(Task.objects.count(), 5)
+        self.assertEqual(Project.objects.get().users.count(), 2)
+        comment = Comment.objects.get()
+        self.assertEqual((comment.task.title, comment.project.name, comment.created_by.username), ('Milestone 4', 'Roadmap', 'user2'))
+        self.assertFalse(User.objects.get(username='user0').has_usable_password())
+
+        # Search index is rebuilt once after a load that skipped signals
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(username='user0'))
+        self.assertEqual(len(client.get('/api/tasks/?q=milestone').data['results']), 5)
+
+    def test_existing_usernames_are_reused(self):
+        existing = User.objects.create_user(username='dev_user', password='x')
+        self.load(SAMPLE_DATA, '--unusable-passwords')
+
+        self.assertEqual(User.objects.filter(username='dev_user').count(), 1)
+        self.assertEqual(Task.objects.filter(assigned_to=existing).count(), 2)
+
+    def test_bad_reference_rolls_back(self):
+        path = self.write_file('.ndjson', '\n'.join([
+            json.dumps({'type': 'user', 'username': 'solo'}),
+            json.dumps({'type': 'project', 'name': 'P', 'user_ids': [1]}),
+            json.dumps({'type': 'task', 'title': 'T', 'project': 2, 'created_by': 1}),
+        ]))
+        with self.assertRaisesMessage(Exception, 'projects #2'):
+            self.load(path, '--unusable-passwords')
+        self.assertFalse(User.objects.filter(username='solo').exists())
+
+    def test_unknown_status_is_rejected(self):
+        path = self.write_file('.ndjson', '\n'.join([
+            json.dumps({'type': 'user', 'username': 'solo'}),
+            json.dumps({'type': 'project', 'name': 'P', 'user_ids': [1]}),
+            json.dumps({'type': 'task', 'title': 'A', 'status': 'In Progress', 'project': 1, 'created_by': 1}),
+            json.dumps({'type': 'task', 'title': 'B', 'status': 'blocked', 'project': 1, 'created_by': 1}),
+        ]))
+        with self.assertRaisesMessage(Exception, "Task #2: unknown status 'blocked'"):
+            self.load(path, '--unusable-passwords')
+        self.assertFalse(Task.objects.exists())
+
+    def test_streaming_reader_handles_small_chunks(self):
+        with open(SAMPLE_DATA, encoding='utf-8') as fh:
+            expected = json.load(fh)
+        with open(SAMPLE_DATA, encoding='utf-8') as fh:
+            records = list(iter_json_document(fh, chunk_size=7))
+
+        self.assertEqual([r for s, r in records if s == 'tasks'], expected['tasks'])
+        self.assertEqual(len(records), sum(len(expected[k]) for k in ('users', 'projects', 'tasks', 'comments')))
@@ -0,0 +1,114 @@
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.metrics import MetricsMiddleware, registry
+from core.models import User, Project, Task, Comment
+from core.testing import QueryBudgetMixin
+from core.views import TaskViewSet
+
+
+@override_settings(METRICS={'ENABLED': True})
+class MetricsMiddlewareTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.project = Project.objects.create(name='Metrics')
+        self.task = Task.objects.create(title='T', project=self.project, assigned_to=self.dev, created_by=self.admin)
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Token {Token.objects.get(user=user).key}'}
+
+    def test_records_per_route_histograms(self):
+        self.client.get('/api/tasks/', **self.auth(self.dev))
+        self.client.get(f'/api/tasks/{self.task.id}/', **self.auth(self.dev))
+        self.client.get(f'/api/projects/{self.project.id}/stats/', **self.auth(self.dev))
+
+        queries = registry.histogram('tms_request_queries', 'task', 'list')
+        self.assertEqual(sum(queries.counts), 1)
+        self.assertGreater(queries.sum, 0)
+        self.assertGreater(registry.histogram('tms_request_db_seconds', 'task', 'list').sum, 0)
+        self.assertGreater(registry.histogram('tms_request_serialization_seconds', 'task', 'list').sum, 0)
+        self.assertIsNotNone(registry.histogram('tms_request_duration_seconds', 'task', 'retrieve'))
+        self.assertIsNotNone(registry.histogram('tms_request_duration_seconds', 'project', 'stats'))
+
+    async def test_records_async_routes_without_a_thread_hop(self):
+        token = await Token.objects.aget(user=self.dev)
+        response = await self.async_client.get('/api/async/tasks/', headers={'authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        queries = registry.histogram('tms_request_queries', 'async-task-list', 'get')
+        self.assertEqual(sum(queries.counts), 1)
+        self.assertGreater(queries.sum, 0)
+        self.assertGreater(registry.histogram('tms_request_duration_seconds', 'async-task-list', 'get').sum, 0)
+
+    def test_middleware_is_sync_and_async_capable(self):
+        async def get_response(request):
+            return None
+
+        self.assertTrue(iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(MetricsMiddleware(lambda request: None)))
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get('/api/tasks/', **self.auth(self.dev))
+        response = self.client.get('/api/_metrics/', **self.auth(self.dev))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get('/api/_metrics/', **self.auth(self.admin))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE tms_request_duration_seconds histogram', body)
+        self.assertIn('tms_request_queries_bucket{route="task",action="list",le="+Inf"} 1', body)
+        self.assertIn('tms_requests_total{route="task",action="list",status="200"} 1', body)
+        self.assertIn('tms_response_cache_hits_total', body)
+
+    @override_settings(METRICS={'ENABLED': False})
+    def test_disabled_by_default(self):
+        self.client.get('/api/tasks/', **self.auth(self.dev))
+        self.assertIsNone(registry.histogram('tms_request_duration_seconds', 'task', 'list'))
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.get(user=self.admin).key}'}
+        members = [User.objects.create_user(username=f'member{i}', password='password') for i in range(5)]
+        for p in range(3):
+            project = Project.objects.create(name=f'Project {p}', created_by=self.admin)
+            project.users.set(members)
+            for t in range(5):
+                task = Task.objects.create(title=f'Task {t}', project=project, assigned_to=members[t], created_by=self.admin)
+                Comment.objects.create(content='Hi', task=task, project=project, user=members[t], created_by=self.admin)
+
+    def test_viewsets_stay_within_query_budgets(self):
+        for resource, model in (('users', User), ('projects', Project), ('tasks', Task), ('comments', Comment)):
+            with self.subTest(resource=resource):
+                self.assertWithinQueryBudget(f'/api/{resource}/', **self.auth)
+                self.assertWithinQueryBudget(f'/api/{resource}/{model.objects.first().pk}/', **self.auth)
+        self.assertWithinQueryBudget(f'/api/projects/{Project.objects.first().pk}/members/', **self.auth)
+
+    def test_bulk_destroy_stays_within_query_budget(self):
+        project = Project.objects.first()
+        tasks = Task.objects.bulk_create(
+            Task(title=f'Bulk {i}', project=project, created_by=self.admin) for i in range(100)
+        )
+        Comment.objects.bulk_create(
+            Comment(content='Hi', task=task, project=project, user=self.admin, created_by=self.admin) for task in tasks
+        )
+        self.assertWithinQueryBudget(
+            '/api/tasks/bulk/', 'delete', {'ids': [task.pk for task in tasks]},
+            action='bulk_destroy', warm=False, format='json', **self.auth,
+        )
+        self.assertFalse(Task.objects.filter(pk__in=[task.pk for task in tasks]).exists())
+
+    def test_exceeding_the_budget_fails_with_the_queries(self):
+        with mock.patch.object(TaskViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaisesRegex(AssertionError, r'task-list ran \d+ queries, budget is 1'):
+                self.assertWithinQueryBudget('/api/tasks/', **self.auth)
@@ -1,7 +1,14 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
-from core.models import Project, User
+from io import StringIO
+from core.models import Project, User, Task, Comment
+from django.core.management import call_command
 from rest_framework.authtoken.models import Token
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from core.authentication import token_cache
+from core.purge import purge_project
 
 class ProjectTests(APITestCase):
     def setUp(self):
@@ -83,3 +90,194 @@ class ProjectTests(APITestCase):
     def test_create_project_with_trailing_slash(self):
         response = self.client.post('/api/projects/', self.project_data, HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+# Measures the queries behind a response, so the response cache is kept out of the way
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class ProjectQueryCountTests(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.admin_token, _ = Token.objects.get_or_create(user=self.admin_user)
+        token_cache.clear()
+
+    def create_projects(self, count, members_per_project):
+        offset = User.objects.count()
+        members = [
+            User.objects.create(username=f'member_{offset + i}', role='Developer')
+            for i in range(members_per_project)
+        ]
+        for i in range(count):
+            project = Project.objects.create(name=f'Project {i}', created_by=self.admin_user)
+            project.users.set(members)
+
+    def count_queries(self, url):
+        # Warm the token cache so only the project queries are compared
+        self.client.get(url, HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    # Listing a page costs the same whatever the page size and member count
+    def test_project_list_query_count_is_constant(self):
+        self.create_projects(count=1, members_per_project=1)
+        small = self.count_queries('/api/projects/')
+
+        self.create_projects(count=9, members_per_project=25)
+        large = self.count_queries('/api/projects/')
+
+        self.assertEqual(small, large)
+
+    # Retrieving a single project does not grow with its member count
+    def test_project_detail_query_count_is_constant(self):
+        self.create_projects(count=1, members_per_project=1)
+        small_project = Project.objects.latest('id')
+        small = self.count_queries(f'/api/projects/{small_project.id}/')
+
+        self.create_projects(count=1, members_per_project=40)
+        large_project = Project.objects.latest('id')
+        large = self.count_queries(f'/api/projects/{large_project.id}/')
+
+        self.assertEqual(small, large)
+        response = self.client.get(f'/api/projects/{large_project.id}/', HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        self.assertEqual(len(response.data['users']), 40)
+
+    # created_by isn't serialized, so loading a project doesn't join its user
+    def test_project_detail_does_not_load_creator(self):
+        self.create_projects(count=1, members_per_project=1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'/api/projects/{Project.objects.get().id}/', HTTP_AUTHORIZATION=f'Token {self.admin_token.key}')
+        project_queries = [q['sql'] for q in context.captured_queries if q['sql'].startswith('SELECT "core_project"')]
+        self.assertTrue(project_queries)
+        self.assertFalse([sql for sql in project_queries if 'JOIN "core_user"' in sql])
+
+    # Member ids are resolved with one IN query, however many are sent
+    def count_create_queries(self, user_ids):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/projects/', {'name': 'Org', 'description': 'All hands', 'user_ids': user_ids},
+                format='json', HTTP_AUTHORIZATION=f'Token {self.admin_token.key}',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['users']), len(set(user_ids)))
+        return len(context.captured_queries)
+
+    def test_member_ids_are_validated_in_one_query(self):
+        users = [User(username=f'org_{i}', role='Developer') for i in range(60)]
+        User.objects.bulk_create(users)
+        ids = list(User.objects.filter(username__startswith='org_').values_list('id', flat=True))
+
+        self.count_create_queries(ids[:1])  # Warm the token cache
+        self.assertEqual(self.count_create_queries(ids[:2]), self.count_create_queries(ids))
+
+    def test_all_missing_member_ids_are_reported(self):
+        response = self.client.post(
+            '/api/projects/', {'name': 'Org', 'description': '', 'user_ids': [self.admin_user.id, 9998, 9999]},
+            format='json', HTTP_AUTHORIZATION=f'Token {self.admin_token.key}',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['user_ids'], ['Invalid pk(s) [9998, 9999] - object(s) do not exist.'])
+
+
+class ProjectMembersTests(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.project = Project.objects.create(name='Org', description='', created_by=self.admin_user)
+        User.objects.bulk_create([User(username=f'member_{i}', role='Developer') for i in range(30)])
+        self.ids = list(User.objects.filter(username__startswith='member_').order_by('id').values_list('id', flat=True))
+        self.client.force_authenticate(user=self.admin_user)
+
+    def members_url(self):
+        return f'/api/projects/{self.project.id}/members/'
+
+    def change(self, method, user_ids):
+        send = getattr(self.client, method)
+        with CaptureQueriesContext(connection) as context:
+            response = send(self.members_url(), {'user_ids': user_ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        return len(context.captured_queries)
+
+    def test_add_and_remove_a_delta(self):
+        self.project.users.add(self.dev)
+        few = self.change('post', self.ids[:2])
+        many = self.change('post', self.ids[2:])
+        self.assertEqual(few, many)
+        self.assertEqual(self.project.users.count(), 31)
+
+        self.assertEqual(self.change('delete', self.ids[:2]), self.change('delete', self.ids[2:]))
+        self.assertEqual(list(self.project.users.all()), [self.dev])
+
+    def test_members_are_paginated(self):
+        self.project.users.add(*self.ids)
+        response = self.client.get(self.members_url())
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual([u['id'] for u in response.data['results']], self.ids[:10])
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 10)
+
+    def test_changes_reach_project_responses(self):
+        etag = self.client.get(f'/api/projects/{self.project.id}/')['ETag']
+        self.change('post', self.ids[:3])
+        response = self.client.get(f'/api/projects/{self.project.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['users']), 3)
+
+    def test_only_managers_change_members(self):
+        self.project.users.add(self.dev)
+        self.client.force_authenticate(user=self.dev)
+        self.assertEqual(self.client.get(self.members_url()).status_code, status.HTTP_200_OK)
+        response = self.client.post(self.members_url(), {'user_ids': self.ids[:1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post(self.members_url(), {'user_ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProjectDeletionTests(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.project = Project.objects.create(name='Doomed', description='')
+        self.kept = Project.objects.create(name='Kept', description='')
+        for project in (self.project, self.kept):
+            for i in range(5):
+                task = Task.objects.create(title=f'{project.name} {i}', project=project, created_by=self.admin_user)
+                Comment.objects.create(content='Hi', task=task, user=self.admin_user, created_by=self.admin_user)
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_delete_hides_the_project_at_once(self):
+        task = Task.objects.filter(project=self.project).first()
+        self.client.get('/api/tasks/')  # Cache the list
+        response = self.client.delete(f'/api/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(f'/api/tasks/{task.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/tasks/').data['count'], 5)
+        self.assertEqual(self.client.get('/api/comments/').data['count'], 5)
+        response = self.client.post('/api/tasks/', {
+            'title': 'Late', 'project': self.project.id, 'assigned_to': self.admin_user.id, 'created_by': self.admin_user.id,
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # Nothing is removed until the purge runs
+        self.assertEqual(Task.all_objects.filter(project=self.project).count(), 5)
+
+    def test_purge_deletes_in_batches(self):
+        self.client.delete(f'/api/projects/{self.project.id}/')
+        progress = []
+        with CaptureQueriesContext(connection) as context:
+            counts = purge_project(Project.all_objects.get(pk=self.project.pk), batch_size=2, log=progress.append)
+        self.assertEqual(counts, {'comments': 5, 'tasks': 5})
+        self.assertEqual(progress[-1], f'  project {self.project.pk}: deleted 5/5 tasks')
+        self.assertEqual(len(progress), 6)
+        deletes = [q['sql'] for q in context.captured_queries if q['sql'].startswith('DELETE FROM "core_task"')]
+        self.assertEqual(len(deletes), 3)
+
+        self.assertFalse(Project.all_objects.filter(pk=self.project.pk).exists())
+        self.assertEqual(Task.all_objects.count(), 5)
+        self.assertEqual(Comment.all_objects.count(), 5)
+
+    def test_purge_command(self):
+        self.client.delete(f'/api/projects/{self.project.id}/')
+        out = StringIO()
+        call_command('purge_deleted_projects', '--once', stdout=out)
+        self.assertIn('Purged 1 projects.', out.getvalue())
+        self.assertEqual(list(Project.all_objects.all()), [self.kept])
@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment
+from core.response_cache import response_cache, ResponseCache, CachedResponse
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.manager = User.objects.create_user(username='manager', password='password', role='Project Manager')
+        self.other_manager = User.objects.create_user(username='manager2', password='password', role='Project Manager')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.client.force_authenticate(user=self.manager)
+        self.project = Project.objects.create(name='Proj', description='Desc')
+        self.task = Task.objects.create(title='T', project=self.project, assigned_to=self.dev, created_by=self.manager)
+
+    def test_repeat_read_is_served_from_cache(self):
+        first = self.client.get('/api/tasks/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get('/api/tasks/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(len(ctx.captured_queries), 1)  # Collection version lookup only
+
+        self.assertEqual(response_cache.stats()['hits'], 1)
+        self.assertEqual(response_cache.stats()['misses'], 1)
+
+    def test_cache_hit_still_answers_304(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        response = self.client.get('/api/tasks/', headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_key_covers_params_page_and_role(self):
+        self.client.get('/api/tasks/')
+        self.assertEqual(self.client.get('/api/tasks/?status=done')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/tasks/?page=1')['X-Cache'], 'MISS')
+
+        # Same role shares the entry, another role does not
+        self.client.force_authenticate(user=self.other_manager)
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'HIT')
+        self.client.force_authenticate(user=self.dev)
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'MISS')
+
+    def test_writes_invalidate_their_collection_only(self):
+        self.client.get('/api/tasks/')
+        self.client.get(f'/api/tasks/{self.task.id}/')
+        self.client.get('/api/comments/')
+
+        self.client.patch(f'/api/tasks/{self.task.id}/', {'status': 'done'})
+        detail = self.client.get(f'/api/tasks/{self.task.id}/')
+        self.assertEqual(detail['X-Cache'], 'MISS')
+        self.assertEqual(detail.data['status'], 'done')
+        self.assertEqual(self.client.get('/api/tasks/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/comments/')['X-Cache'], 'HIT')
+
+        Comment.objects.create(content='c', task=self.task, project=self.project, user=self.dev, created_by=self.dev)
+        response = self.client.get('/api/comments/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_membership_change_invalidates_projects(self):
+        self.client.get(f'/api/projects/{self.project.id}/')
+        self.project.users.add(self.dev)
+        response = self.client.get(f'/api/projects/{self.project.id}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([user['id'] for user in response.data['users']], [self.dev.id])
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_can_be_disabled(self):
+        self.client.get('/api/tasks/')
+        response = self.client.get('/api/tasks/')
+        self.assertNotIn('X-Cache', response)
+
+
+class ResponseCacheEvictionTests(APITestCase):
+    @override_settings(RESPONSE_CACHE={'MAX_BYTES': 300, 'MAX_ENTRY_BYTES': 200})
+    def test_lru_eviction_respects_memory_budget(self):
+        cache = ResponseCache()
+        for i in range(5):
+            cache.set(('key', i), CachedResponse(b'x' * 100, 'application/json', '"e"', None))
+        self.assertLessEqual(cache.stats()['bytes'], 300)
+        self.assertEqual(cache.stats()['evictions'], 3)
+        self.assertIsNone(cache.get(('key', 0)))
+        self.assertIsNotNone(cache.get(('key', 4)))
+
+        cache.set(('big', 0), CachedResponse(b'x' * 500, 'application/json', '"e"', None))
+        self.assertIsNone(cache.get(('big', 0)))
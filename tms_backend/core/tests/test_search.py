@@ -0,0 +1,89 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import User, Project, Task, Comment
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='dev', role='Developer')
+        self.project = Project.objects.create(name='Website Redesign', description='Corporate website refresh')
+        self.other = Project.objects.create(name='Mobile App', description='Launch the app; mention website once')
+        self.user.projects.add(self.project, self.other)
+        self.task = Task.objects.create(
+            title='Create wireframes', description='Homepage wireframes for the website',
+            project=self.project, created_by=self.user,
+        )
+        Task.objects.create(title='Setup backend', description='Django', project=self.project, created_by=self.user)
+        self.comment = Comment.objects.create(
+            content='Wireframes look good, proceed to design.', task=self.task,
+            project=self.project, user=self.user, created_by=self.user,
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def search(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_tasks_are_searchable(self):
+        results = self.search('/api/tasks/?q=wireframes')
+        self.assertEqual([t['id'] for t in results], [self.task.id])
+
+    def test_cursor_pagination_is_refused_for_ranked_results(self):
+        response = self.client.get('/api/tasks/?q=wireframes&pagination=cursor')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordered by rank', str(response.data))
+        # Without ?q= the same request pages by cursor as usual
+        self.assertEqual(self.client.get('/api/tasks/?pagination=cursor').status_code, 200)
+
+    def test_results_are_ranked(self):
+        # A match in the name outranks a passing mention in the description
+        results = self.search('/api/projects/?q=website')
+        self.assertEqual([p['id'] for p in results], [self.project.id, self.other.id])
+
+    def test_prefix_and_multiple_terms(self):
+        self.assertEqual(len(self.search('/api/comments/?q=wirefr')), 1)
+        self.assertEqual(len(self.search('/api/comments/?q=wireframes design')), 1)
+        self.assertEqual(len(self.search('/api/comments/?q=wireframes backend')), 0)
+
+    def test_search_combines_with_filters(self):
+        results = self.search(f'/api/tasks/?q=wireframes&project={self.other.id}')
+        self.assertEqual(results, [])
+
+    def test_fts_syntax_in_query_is_not_interpreted(self):
+        self.assertEqual(self.search('/api/tasks/?q="wireframes" OR NEAR('), [])
+        self.assertEqual(len(self.search('/api/tasks/?q=wireframes)')), 1)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.task.title = 'Draw mockups'
+        self.task.description = ''
+        self.task.save()
+        self.assertEqual(self.search('/api/tasks/?q=wireframes'), [])
+        self.assertEqual(len(self.search('/api/tasks/?q=mockups')), 1)
+
+        self.comment.delete()
+        self.assertEqual(self.search('/api/comments/?q=wireframes'), [])
+
+    def test_new_rows_are_indexed_without_a_delete(self):
+        with CaptureQueriesContext(connection) as context:
+            task = Task.objects.create(title='Sketch logo', project=self.project, created_by=self.user)
+        self.assertFalse([q for q in context.captured_queries if q['sql'].startswith('DELETE FROM core_task_fts')])
+        self.assertEqual([t['id'] for t in self.search('/api/tasks/?q=logo')], [task.id])
+
+    def test_rebuild_search_index(self):
+        Task.objects.filter(id=self.task.id).update(title='Bulk renamed')  # bypasses signals
+        self.assertEqual(self.search('/api/tasks/?q=renamed'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('/api/tasks/?q=renamed')), 1)
+
+    def test_like_backend_fallback(self):
+        with self.settings(TMS_SEARCH_BACKEND='core.search.LikeSearchBackend'):
+            results = self.search('/api/tasks/?q=homepage website')
+        self.assertEqual([t['id'] for t in results], [self.task.id])
@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='dev', password='password', role='Developer', first_name='Dev')
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+        self.project = Project.objects.create(name='Website', description='Redesign', created_by=self.user)
+        self.project.users.add(self.user)
+        for i in range(5):
+            task = Task.objects.create(
+                title=f'Task {i}', description='x' * 50, status='todo', project=self.project,
+                assigned_to=None if i % 2 else self.user, created_by=self.user,
+            )
+            Comment.objects.create(content=f'Comment {i}', task=task, user=self.user, created_by=self.user)
+        self.task = task
+
+    def test_fields_trim_the_payload_and_the_select(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/tasks/?fields=id,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+        select = next(q['sql'] for q in queries.captured_queries if 'FROM "core_task"' in q['sql'] and 'COUNT' not in q['sql'])
+        self.assertIn('"core_task"."title"', select)
+        self.assertNotIn('"core_task"."description"', select)
+
+        response = self.client.get(f'/api/projects/{self.project.id}/?fields=name')
+        self.assertEqual(response.data, {'name': 'Website'})
+
+    def test_expand_joins_the_related_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/tasks/{self.task.id}/?expand=assigned_to&fields=id,assigned_to')
+        self.assertEqual(response.data['assigned_to']['username'], 'dev')
+        self.assertTrue(any('JOIN "core_user"' in q['sql'] for q in queries.captured_queries))
+
+        response = self.client.get('/api/comments/?expand=task,user&fields=content,task,user')
+        first = response.data['results'][0]
+        self.assertEqual(first['task']['title'], 'Task 0')
+        self.assertEqual(first['user']['first_name'], 'Dev')
+
+    def test_unknown_names_are_rejected(self):
+        self.assertEqual(self.client.get('/api/tasks/?fields=id,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/?expand=project').status_code, 400)
+
+    def test_fast_path_matches_the_serializer(self):
+        paths = [
+            '/api/tasks/?fields=id,title,status', '/api/tasks/?expand=assigned_to,created_by',
+            '/api/comments/?expand=task&fields=id,task&pagination=cursor', '/api/projects/?fields=name,users',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                with override_settings(RESPONSE_CACHE={'ENABLED': False}):
+                    fast = self.client.get(path)
+                    with override_settings(FAST_SERIALIZATION={'ENABLED': False}):
+                        regular = self.client.get(path)
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, regular.content)
+
+    def test_expanded_user_changes_invalidate_validators(self):
+        path = f'/api/tasks/{self.task.id}/?expand=assigned_to'
+        first = self.client.get(path)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        second = self.client.get(path)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second.data['assigned_to']['first_name'], 'Renamed')
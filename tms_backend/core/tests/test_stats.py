@@ -0,0 +1,127 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment, ProjectStat
+from core.stats import project_stats, rebuild_project_stats
+
+
+class ProjectStatsTests(APITestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='manager', password='password', role='Project Manager')
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.token = Token.objects.get(user=self.manager)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.project = Project.objects.create(name='Dashboard', created_by=self.manager)
+        self.other = Project.objects.create(name='Other', created_by=self.manager)
+
+    def stats(self, project=None):
+        response = self.client.get(f'/api/projects/{(project or self.project).id}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assert_matches_recount(self):
+        incremental = [project_stats(project) for project in (self.project, self.other)]
+        rebuild_project_stats()
+        self.assertEqual(incremental, [project_stats(project) for project in (self.project, self.other)])
+
+    def test_counts_follow_api_writes(self):
+        response = self.client.post('/api/tasks/', {
+            'title': 'A', 'project': self.project.id, 'assigned_to': self.dev.id, 'created_by': self.manager.id,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task_id = response.data['id']
+        Task.objects.create(title='B', project=self.project, created_by=self.manager)
+        self.client.post('/api/comments/', {'content': 'Hi', 'task': task_id, 'project': self.project.id})
+
+        data = self.stats()
+        self.assertEqual(data['tasks']['total'], 2)
+        self.assertEqual(data['tasks']['by_status'], {'todo': 2, 'in_progress': 0, 'done': 0})
+        self.assertEqual(data['tasks']['by_assignee'], [
+            {'user': None, 'username': None, 'count': 1},
+            {'user': self.dev.id, 'username': 'dev', 'count': 1},
+        ])
+        self.assertEqual(data['comments']['total'], 1)
+
+        # Status change and move to another project
+        self.client.patch(f'/api/tasks/{task_id}/', {'status': 'done'})
+        self.assertEqual(self.stats()['tasks']['by_status']['done'], 1)
+        self.client.patch(f'/api/tasks/{task_id}/', {'project': self.other.id})
+        self.assertEqual(self.stats()['tasks']['total'], 1)
+        self.assertEqual(self.stats(self.other)['tasks']['by_status']['done'], 1)
+
+        # Deleting the task cascades to its comment
+        self.client.delete(f'/api/tasks/{task_id}/')
+        self.assertEqual(self.stats(self.other)['tasks']['total'], 0)
+        self.assertEqual(self.stats()['comments']['total'], 0)
+        self.assert_matches_recount()
+
+    def test_counts_follow_bulk_writes(self):
+        response = self.client.post('/api/tasks/bulk/', [
+            {'title': f'T{i}', 'project': self.project.id, 'assigned_to': self.dev.id, 'created_by': self.manager.id}
+            for i in range(5)
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = [task['id'] for task in response.data]
+
+        self.client.patch('/api/tasks/bulk/', [{'id': pk, 'status': 'in_progress'} for pk in ids[:3]], format='json')
+        self.client.delete('/api/tasks/bulk/', {'ids': ids[3:]}, format='json')
+
+        data = self.stats()
+        self.assertEqual(data['tasks']['by_status'], {'todo': 0, 'in_progress': 3, 'done': 0})
+        self.assertEqual(data['tasks']['by_assignee'], [{'user': self.dev.id, 'username': 'dev', 'count': 3}])
+        self.assert_matches_recount()
+
+    def test_updates_from_stale_copies_do_not_drift(self):
+        task = Task.objects.create(title='A', project=self.project, created_by=self.manager)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+
+        # Both copies were loaded as todo; the second saves after the first committed
+        first.status = 'in_progress'
+        first.save()
+        second.status = 'done'
+        second.save()
+        self.assertEqual(self.stats()['tasks']['by_status'], {'todo': 0, 'in_progress': 0, 'done': 1})
+
+        first.delete()
+        self.assertEqual(self.stats()['tasks']['total'], 0)
+        self.assert_matches_recount()
+
+    def test_deleting_assignee_moves_tasks_to_unassigned(self):
+        Task.objects.create(title='A', project=self.project, assigned_to=self.dev, created_by=self.manager)
+        self.dev.delete()
+        data = self.stats()
+        self.assertEqual(data['tasks']['by_assignee'], [{'user': None, 'username': None, 'count': 1}])
+        self.assert_matches_recount()
+
+    def test_rebuild_command_repairs_drift(self):
+        task = Task.objects.create(title='A', project=self.project, created_by=self.manager)
+        Comment.objects.create(content='c', task=task, project=self.project, user=self.dev, created_by=self.dev)
+        expected = self.stats()
+
+        ProjectStat.objects.all().update(count=99)
+        call_command('rebuild_project_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), expected)
+
+    def test_stats_query_count_does_not_grow_with_tasks(self):
+        def count_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.stats()
+            return len(ctx.captured_queries)
+
+        Task.objects.create(title='A', project=self.project, assigned_to=self.dev, created_by=self.manager)
+        self.stats()  # Warm the token cache
+        few = count_queries()
+        Task.objects.bulk_create([Task(title=f'T{i}', project=self.project, created_by=self.manager) for i in range(50)])
+        rebuild_project_stats()
+        self.assertEqual(count_queries(), few)
+        self.assertEqual(self.stats()['tasks']['total'], 51)
+
+    def test_stats_for_missing_project(self):
+        response = self.client.get('/api/projects/9999/stats/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
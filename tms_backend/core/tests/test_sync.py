@@ -0,0 +1,143 @@
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from core.models import User, Project, Task, Comment, Tombstone, deferred_change_seqs
+from core.purge import purge_deleted_projects
+from core.visibility import visible_projects
+
+
+class SyncTests(APITestCase):
+    def setUp(self):
+        visible_projects.clear()
+        self.admin = User.objects.create_user(username='admin', password='password', role='Admin')
+        self.project = Project.objects.create(name='P', description='')
+        self.tasks = [Task.objects.create(title=f'T{i}', project=self.project, created_by=self.admin) for i in range(3)]
+        self.comment = Comment.objects.create(content='Hi', task=self.tasks[0], user=self.admin, created_by=self.admin)
+        self.client.force_authenticate(user=self.admin)
+
+    def sync(self, watermark=None):
+        response = self.client.get('/api/sync/', {'since': watermark} if watermark else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, rows):
+        return [row['id'] for row in rows]
+
+    def test_full_then_delta(self):
+        first = self.sync()
+        self.assertTrue(first['full'])
+        self.assertEqual(self.ids(first['tasks']), [t.id for t in self.tasks])
+        self.assertEqual(self.ids(first['comments']), [self.comment.id])
+
+        self.assertEqual(self.ids(self.sync(first['watermark'])['tasks']), [])
+
+        self.tasks[1].status = 'done'
+        self.tasks[1].save()
+        deleted_id = self.tasks[2].id
+        self.tasks[2].delete()
+        delta = self.sync(first['watermark'])
+        self.assertFalse(delta['full'])
+        self.assertEqual([(t['id'], t['status']) for t in delta['tasks']], [(self.tasks[1].id, 'done')])
+        self.assertEqual(delta['deleted'], {'projects': [], 'tasks': [deleted_id], 'comments': []})
+        self.assertEqual(delta['projects'], [])
+
+    def test_delta_cost_does_not_grow_with_the_dataset(self):
+        watermark = self.sync()['watermark']
+        self.tasks[0].save()
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(len(self.sync(watermark)['tasks']), 1)
+            return len(context.captured_queries)
+
+        small = count_queries()
+        Task.objects.bulk_create([Task(title=f'Old {i}', project=self.project, created_by=self.admin) for i in range(50)])
+        watermark = self.sync(self.sync()['watermark'])['watermark']
+        self.tasks[0].save()
+        self.assertEqual(count_queries(), small)
+
+    @override_settings(SYNC={'PAGE_SIZE': 2})
+    def test_pages_end_on_change_boundaries(self):
+        watermark = self.sync()['watermark']
+        Task.objects.bulk_create([Task(title=f'Bulk {i}', project=self.project, created_by=self.admin) for i in range(3)])
+        single = Task.objects.create(title='Single', project=self.project, created_by=self.admin)
+
+        pages = []
+        while True:
+            page = self.sync(watermark)
+            pages.append([t['title'] for t in page['tasks']])
+            watermark = page['watermark']
+            if not page['has_more']:
+                break
+        # The bulk insert shares one change number, so it is not split across pages
+        self.assertEqual(pages, [['Bulk 0', 'Bulk 1', 'Bulk 2'], [single.title]])
+
+    def test_project_deletion_and_purge(self):
+        watermark = self.sync()['watermark']
+        self.client.delete(f'/api/projects/{self.project.id}/')
+        delta = self.sync(watermark)
+        self.assertEqual(delta['deleted']['projects'], [self.project.id])
+        self.assertEqual(delta['tasks'], [])
+
+        purge_deleted_projects()
+        deleted = self.sync(delta['watermark'])['deleted']
+        self.assertEqual(deleted['tasks'], [t.id for t in self.tasks])
+        self.assertEqual(deleted['comments'], [self.comment.id])
+        self.assertEqual(deleted['projects'], [self.project.id])
+
+    def test_scoped_users_resync_when_their_projects_change(self):
+        dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        other = Project.objects.create(name='Other', description='')
+        Task.objects.create(title='Hidden', project=other, created_by=self.admin)
+        self.project.users.add(dev)
+        self.client.force_authenticate(user=dev)
+
+        first = self.sync()
+        self.assertEqual(self.ids(first['projects']), [self.project.id])
+        self.assertEqual(len(first['tasks']), 3)
+        self.assertFalse(self.sync(first['watermark'])['full'])
+
+        other.users.add(dev)
+        resync = self.sync(first['watermark'])
+        self.assertTrue(resync['full'])
+        self.assertEqual(self.ids(resync['projects']), [self.project.id, other.id])
+        self.assertEqual(len(resync['tasks']), 4)
+
+    def test_moves_out_of_scope_are_deletions(self):
+        dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        other = Project.objects.create(name='Other', description='')
+        self.project.users.add(dev)
+        self.client.force_authenticate(user=dev)
+        watermark = self.sync()['watermark']
+
+        task = self.tasks[0]
+        task.project = other
+        task.save()
+        delta = self.sync(watermark)
+        self.assertEqual(delta['tasks'], [])
+        self.assertEqual(delta['deleted']['tasks'], [task.id])
+        self.assertEqual(delta['deleted']['comments'], [self.comment.id])
+
+        # Someone who sees both projects just gets the moved rows
+        self.client.force_authenticate(user=self.admin)
+        delta = self.sync(watermark.split('.')[0] + '.all')
+        self.assertIn(task.id, self.ids(delta['tasks']))
+        self.assertEqual(delta['deleted'], {'projects': [], 'tasks': [], 'comments': []})
+
+    def test_one_change_number_per_deletion(self):
+        self.tasks[0].delete()
+        # The task and its cascaded comment share one number
+        self.assertEqual(len(set(Tombstone.objects.values_list('change_seq', flat=True))), 1)
+        self.assertEqual(Tombstone.objects.count(), 2)
+
+    def test_deferred_change_numbers_are_taken_at_the_end(self):
+        watermark = self.sync()['watermark']
+        with transaction.atomic(), deferred_change_seqs():
+            Task.objects.bulk_create([Task(title='A', project=self.project, created_by=self.admin)])
+            Task.objects.bulk_create([Task(title='B', project=self.project, created_by=self.admin)])
+            self.assertEqual(set(Task.objects.filter(title__in='AB').values_list('change_seq', flat=True)), {-1, -2})
+        first, second = Task.objects.filter(title__in='AB').order_by('title').values_list('change_seq', flat=True)
+        self.assertEqual(second, first + 1)
+        self.assertEqual([t['title'] for t in self.sync(watermark)['tasks']], ['A', 'B'])
@@ -1,12 +1,15 @@
 from rest_framework.test import APITestCase, APIClient
-from core.models import User, Task, Project
+from core.models import User, Task, Project, Comment, QueuedEmail, Tombstone
 from rest_framework.authtoken.models import Token
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 class TaskTests(APITestCase):
     def setUp(self):
         # Create user and project for testing
         self.user = User.objects.create_user(username="dev", password="1234", role="Developer")
         self.project = Project.objects.create(name="Proj", description="Desc")
+        self.project.users.add(self.user)
         
         # Get the token — do NOT create it manually
         self.token = Token.objects.get(user=self.user)
@@ -52,3 +55,171 @@ class TaskTests(APITestCase):
         
         response = self.client.delete(f"/api/tasks/{task.id}/")
         self.assertEqual(response.status_code, 204)
+
+
+class TaskCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dev", password="1234", role="Developer")
+        self.project = Project.objects.create(name="Proj", description="Desc")
+        self.project.users.add(self.user)
+        self.tasks = [
+            Task.objects.create(title=f"Task {i}", project=self.project, created_by=self.user)
+            for i in range(25)
+        ]
+        # Ties on created_at must be broken by id
+        Task.objects.filter(id__in=[t.id for t in self.tasks[5:15]]).update(created_at=self.tasks[5].created_at)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def expected_order(self):
+        return list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def test_cursor_pages_cover_every_task_once(self):
+        seen = []
+        url = "/api/tasks/?pagination=cursor"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            seen.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, self.expected_order())
+
+    def test_cursor_page_runs_no_count_query(self):
+        first = self.client.get("/api/tasks/?pagination=cursor")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(first.data['next'])
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in context.captured_queries))
+
+    def test_previous_link_returns_to_earlier_page(self):
+        first = self.client.get("/api/tasks/?pagination=cursor")
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertIsNone(first.data['previous'])
+        self.assertEqual(
+            [t['id'] for t in back.data['results']],
+            [t['id'] for t in first.data['results']],
+        )
+
+    def test_cursor_respects_filters(self):
+        other = Project.objects.create(name="Other", description="")
+        other.users.add(self.user)
+        Task.objects.create(title="Elsewhere", project=other, created_by=self.user)
+
+        response = self.client.get(f"/api/tasks/?pagination=cursor&project={other.id}")
+        self.assertEqual([t['title'] for t in response.data['results']], ["Elsewhere"])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get("/api/tasks/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_pagination_is_still_default(self):
+        response = self.client.get("/api/tasks/?page=2")
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+
+class TaskBulkTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="dev", password="1234", role="Developer", email="dev@example.com")
+        self.other = User.objects.create_user(username="dev2", password="1234", role="Developer", email="dev2@example.com")
+        self.client_user = User.objects.create_user(username="client", password="1234", role="Client")
+        self.project = Project.objects.create(name="Proj", description="Desc")
+        self.project.users.add(self.user, self.other, self.client_user)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def task_payload(self, i, assignee):
+        return {
+            "title": f"Bulk {i}", "status": "todo", "assigned_to": assignee.id,
+            "project": self.project.id, "created_by": self.user.id,
+        }
+
+    def test_bulk_create_in_constant_queries(self):
+        def create(count):
+            payload = [self.task_payload(i, self.user if i % 2 else self.other) for i in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post("/api/tasks/bulk/", payload, format='json')
+            self.assertEqual(response.status_code, 201)
+            return len(context.captured_queries)
+
+        create(2)  # First write creates the project's stats counter rows
+        self.assertEqual(create(2), create(40))
+        self.assertEqual(Task.objects.count(), 44)
+
+    def test_bulk_create_coalesces_emails_per_assignee(self):
+        payload = [self.task_payload(i, self.user) for i in range(3)] + [self.task_payload(3, self.other)]
+        response = self.client.post("/api/tasks/bulk/", payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([t['title'] for t in response.data], ["Bulk 0", "Bulk 1", "Bulk 2", "Bulk 3"])
+        emails = QueuedEmail.objects.order_by('to_email')
+        self.assertEqual([e.to_email for e in emails], ["dev2@example.com", "dev@example.com"])
+        self.assertIn("3 New Tasks Assigned", emails[1].subject)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        payload = [self.task_payload(0, self.user), dict(self.task_payload(1, self.user), project=999999)]
+        response = self.client.post("/api/tasks/bulk/", payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('project', response.data[1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_created_tasks_are_searchable(self):
+        self.client.post("/api/tasks/bulk/", [dict(self.task_payload(0, self.user), title="Quarterly roadmap")], format='json')
+        response = self.client.get("/api/tasks/?q=roadmap")
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_bulk_update(self):
+        tasks = [
+            Task.objects.create(title=f"T{i}", project=self.project, created_by=self.user, assigned_to=self.user)
+            for i in range(3)
+        ]
+        response = self.client.patch("/api/tasks/bulk/", [
+            {"id": tasks[0].id, "status": "done"},
+            {"id": tasks[1].id, "assigned_to": self.other.id},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(id=tasks[0].id).status, "done")
+        self.assertEqual(Task.objects.get(id=tasks[1].id).assigned_to, self.other)
+        self.assertEqual(Task.objects.get(id=tasks[2].id).status, "todo")
+        self.assertEqual(list(QueuedEmail.objects.values_list('to_email', flat=True)), ["dev2@example.com"])
+
+    def test_bulk_update_unknown_id(self):
+        response = self.client.patch("/api/tasks/bulk/", [{"id": 999999, "status": "done"}], format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_delete(self):
+        tasks = [Task.objects.create(title=f"T{i}", project=self.project, created_by=self.user) for i in range(3)]
+        response = self.client.delete("/api/tasks/bulk/", {"ids": [tasks[0].id, tasks[1].id]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [tasks[2].id])
+
+    def test_bulk_delete_takes_comments_tombstones_and_search_along(self):
+        tasks = [Task.objects.create(title=f"Roadmap {i}", project=self.project, created_by=self.user) for i in range(3)]
+        comment = Comment.objects.create(content="On roadmap", task=tasks[0], project=self.project, user=self.user, created_by=self.user)
+
+        self.client.delete("/api/tasks/bulk/", {"ids": [tasks[0].id, tasks[1].id]}, format='json')
+
+        self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+        self.assertEqual(
+            sorted(Tombstone.objects.values_list('model', 'object_id')),
+            [('core.comment', comment.pk), ('core.task', tasks[0].id), ('core.task', tasks[1].id)],
+        )
+        response = self.client.get("/api/tasks/?q=roadmap")
+        self.assertEqual([t['id'] for t in response.data['results']], [tasks[2].id])
+
+    def test_client_cannot_bulk_create_or_delete(self):
+        self.client.force_authenticate(user=self.client_user)
+        response = self.client.post("/api/tasks/bulk/", [self.task_payload(0, self.user)], format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.delete("/api/tasks/bulk/", {"ids": [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
@@ -1,6 +1,14 @@
 from django.test import TestCase
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
 from unittest.mock import patch, MagicMock
-from core.utils.notifications import send_task_assignment_email
+from io import StringIO
+from rest_framework.test import APIClient
+from core.models import User, Project, Task, QueuedEmail
+from core.utils.notifications import (
+    send_task_assignment_email, queue_task_assignment_email, deliver_queued_emails
+)
 import smtplib
 
 
@@ -80,3 +88,129 @@ class EmailNotificationTests(TestCase):
 
         # Should fail gracefully depending on implementation
         self.assertIn("status_code", response)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create_user(username='pm', password='pm', role='Project Manager')
+        self.dev = User.objects.create_user(username='dev', password='dev', role='Developer', email='dev@example.com')
+        self.project = Project.objects.create(name='Proj', description='Desc')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.manager)
+
+    def create_task(self):
+        return self.client.post('/api/tasks/', {
+            'title': 'Outbox task', 'status': 'todo',
+            'assigned_to': self.dev.id, 'project': self.project.id, 'created_by': self.manager.id,
+        })
+
+    @patch('core.utils.notifications.smtplib.SMTP_SSL')
+    def test_task_creation_queues_email_without_smtp(self, mock_smtp_ssl):
+        response = self.create_task()
+
+        self.assertEqual(response.status_code, 201)
+        mock_smtp_ssl.assert_not_called()
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.to_email, 'dev@example.com')
+        self.assertEqual(queued.status, QueuedEmail.PENDING)
+        self.assertIn('Outbox task', queued.subject)
+
+    def test_reassignment_queues_email(self):
+        task = Task.objects.create(title='T', project=self.project, created_by=self.manager, assigned_to=self.manager)
+        response = self.client.patch(f'/api/tasks/{task.id}/', {
+            'assigned_to': self.dev.id, 'project': self.project.id,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(QueuedEmail.objects.filter(to_email='dev@example.com').count(), 1)
+
+    def test_task_and_email_commit_together(self):
+        with patch('core.views.queue_task_assignment_email', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.create_task()
+        self.assertFalse(Task.objects.exists())
+
+    def test_deliver_sends_batch_over_one_connection(self):
+        for i in range(3):
+            queue_task_assignment_email(f'user{i}@example.com', f'Task {i}', 'pm')
+
+        connection = mail.get_connection()
+        with patch.object(connection, 'send_messages', wraps=connection.send_messages) as send:
+            result = deliver_queued_emails(connection=connection)
+
+        self.assertEqual(result, {'sent': 3, 'retried': 0, 'failed': 0})
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(QueuedEmail.objects.filter(status=QueuedEmail.SENT).count(), 3)
+
+    def test_failed_send_is_retried_with_backoff_then_given_up(self):
+        queued = queue_task_assignment_email('user@example.com', 'Task', 'pm')
+        connection = MagicMock()
+        connection.send_messages.side_effect = smtplib.SMTPException('boom')
+
+        with self.settings(EMAIL_OUTBOX={'MAX_ATTEMPTS': 2}):
+            result = deliver_queued_emails(connection=connection)
+            self.assertEqual(result['retried'], 1)
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, QueuedEmail.PENDING)
+            self.assertEqual(queued.attempts, 1)
+            self.assertGreater(queued.next_attempt_at, timezone.now())
+            self.assertIn('boom', queued.last_error)
+
+            # Not due yet, so nothing is claimed
+            self.assertEqual(deliver_queued_emails(connection=connection)['retried'], 0)
+
+            QueuedEmail.objects.update(next_attempt_at=timezone.now())
+            result = deliver_queued_emails(connection=connection)
+            self.assertEqual(result['failed'], 1)
+            queued.refresh_from_db()
+            self.assertEqual(queued.status, QueuedEmail.FAILED)
+
+    def test_expired_lease_is_reclaimed(self):
+        queued = queue_task_assignment_email('user@example.com', 'Task', 'pm')
+        QueuedEmail.objects.update(status=QueuedEmail.SENDING, claim_token='dead-worker', next_attempt_at=timezone.now())
+
+        result = deliver_queued_emails(connection=mail.get_connection())
+
+        self.assertEqual(result['sent'], 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedEmail.SENT)
+
+    def test_process_email_outbox_command(self):
+        queue_task_assignment_email('user@example.com', 'Task', 'pm')
+        out = StringIO()
+
+        call_command('process_email_outbox', '--once', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('sent=1', out.getvalue())
+
+    @patch('core.management.commands.process_email_outbox.get_connection')
+    def test_empty_outbox_never_connects(self, get_connection):
+        get_connection.return_value.open.side_effect = OSError('unreachable')
+        call_command('process_email_outbox', '--once', stdout=StringIO())
+        get_connection.return_value.open.assert_not_called()
+
+    def test_unreachable_server_returns_the_batch(self):
+        queued = queue_task_assignment_email('user@example.com', 'Task', 'pm')
+        connection = MagicMock(connection=None)
+        connection.open.side_effect = OSError('unreachable')
+
+        with self.assertRaises(OSError):
+            deliver_queued_emails(connection=connection)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.claim_token), (QueuedEmail.PENDING, 0, ''))
+        self.assertLessEqual(queued.next_attempt_at, timezone.now())
+
+    def test_dropped_connection_is_reopened_without_losing_an_attempt(self):
+        queued = queue_task_assignment_email('user@example.com', 'Task', 'pm')
+        connection = MagicMock()
+        connection.connection.noop.side_effect = smtplib.SMTPServerDisconnected()  # Idle session dropped
+        connection.send_messages.side_effect = [smtplib.SMTPServerDisconnected(), 1]
+
+        result = deliver_queued_emails(connection=connection)
+
+        self.assertEqual(result, {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(connection.open.call_count, 2)  # After the failed noop, then after the failed send
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (QueuedEmail.SENT, 1))
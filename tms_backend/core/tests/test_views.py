@@ -13,6 +13,7 @@ class ViewsTestCase(APITestCase):
 
         # Create a project, task, and comment
         self.project = Project.objects.create(name='Project A', description='Test project', created_by=self.admin)
+        self.project.users.add(self.dev, self.client_user)
         self.task = Task.objects.create(title='Task A', project=self.project, status='Open', created_by=self.admin)
         self.comment = Comment.objects.create(content='Initial comment', task=self.task, project=self.project, user=self.admin, created_by=self.admin)
 
@@ -0,0 +1,115 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase, APIRequestFactory
+
+from core.checks import check_shared_caches
+from core.models import User, Project, Task, Comment
+from core.permissions import IsProjectMember
+from core.response_cache import response_cache
+from core.visibility import visible_projects, VisibleProjectsCache
+
+
+class VisibilityTests(APITestCase):
+    def setUp(self):
+        response_cache.clear()
+        visible_projects.clear()
+        self.dev = User.objects.create_user(username='dev', password='password', role='Developer')
+        self.peer = User.objects.create_user(username='peer', password='password', role='Developer')
+        self.pm = User.objects.create_user(username='pm', password='password', role='Project Manager')
+
+        self.mine = Project.objects.create(name='Mine', description='')
+        self.theirs = Project.objects.create(name='Theirs', description='')
+        self.mine.users.add(self.dev)
+        self.theirs.users.add(self.peer)
+        self.my_task = Task.objects.create(title='My task', project=self.mine, created_by=self.dev)
+        self.their_task = Task.objects.create(title='Their task', project=self.theirs, created_by=self.peer)
+        Comment.objects.create(content='Mine', task=self.my_task, user=self.dev, created_by=self.dev)
+        Comment.objects.create(content='Theirs', task=self.their_task, user=self.peer, created_by=self.peer)
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+
+    def names(self, path, key):
+        return [item[key] for item in self.client.get(path).json()['results']]
+
+    def test_scoped_roles_see_only_their_projects(self):
+        self.login(self.dev)
+        self.assertEqual(self.names('/api/projects/', 'name'), ['Mine'])
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['My task'])
+        self.assertEqual(self.names('/api/comments/', 'content'), ['Mine'])
+        self.assertEqual(self.names('/api/async/tasks/', 'title'), ['My task'])
+        self.assertEqual(self.client.get(f'/api/tasks/{self.their_task.id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/projects/{self.theirs.id}/stats/').status_code, 404)
+
+        self.login(self.pm)
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['My task', 'Their task'])
+
+    def test_scoping_is_one_subquery(self):
+        self.login(self.dev)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/tasks/?fields=id')
+        select = next(q['sql'] for q in queries.captured_queries if 'FROM "core_task"' in q['sql'] and 'COUNT' not in q['sql'])
+        self.assertIn('"project_id" IN (SELECT U0."project_id" AS "project_id" FROM "core_project_users" U0', select)
+
+    def test_object_check_uses_the_cached_project_ids(self):
+        request = APIRequestFactory().get('/')
+        request.user = self.dev
+        permission = IsProjectMember()
+        self.assertTrue(permission.has_object_permission(request, None, self.my_task))
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_object_permission(request, None, self.mine))
+            self.assertFalse(permission.has_object_permission(request, None, self.their_task))
+
+    def test_writes_to_other_projects_are_rejected(self):
+        self.login(self.dev)
+        response = self.client.post('/api/tasks/', {'title': 'T', 'assigned_to': self.dev.id, 'project': self.theirs.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('project', response.data)
+        response = self.client.post('/api/comments/', {'content': 'Hi', 'task': self.their_task.id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_membership_changes_reach_cached_responses(self):
+        self.login(self.dev)
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['My task'])
+        self.theirs.users.add(self.dev)
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['My task', 'Their task'])
+        self.dev.projects.remove(self.mine)
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['Their task'])
+
+    def test_scoped_users_do_not_share_cached_responses(self):
+        self.login(self.dev)
+        self.assertEqual(self.names('/api/tasks/', 'title'), ['My task'])
+        self.login(self.peer)
+        response = self.client.get('/api/tasks/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([t['title'] for t in response.data['results']], ['Their task'])
+
+    @override_settings(VISIBILITY={'SHARED_CACHE': 'default'})
+    def test_invalidations_reach_other_workers(self):
+        other_worker = VisibleProjectsCache()
+        self.assertEqual(other_worker.get(self.dev.pk), {self.mine.id})
+        self.dev.projects.remove(self.mine)  # Invalidates the global cache only
+        self.assertEqual(other_worker.get(self.dev.pk), frozenset())
+
+    def test_deploy_check_requires_a_cache_shared_by_workers(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+        for caches, visibility, failing in (
+            (locmem, {}, True),
+            (redis, {}, False),
+            (redis, {'SHARED_CACHE': None}, True),
+        ):
+            with self.subTest(caches=caches['default']['BACKEND'], visibility=visibility):
+                with override_settings(CACHES=caches, VISIBILITY=visibility):
+                    messages = [e.msg for e in check_shared_caches(None) if e.id == 'core.E001']
+                self.assertEqual(any(m.startswith("VISIBILITY['SHARED_CACHE']") for m in messages), failing)
+
+    def test_removed_members_lose_cached_details(self):
+        self.login(self.dev)
+        url = f'/api/tasks/{self.my_task.id}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.mine.users.remove(self.dev)
+        self.assertEqual(self.client.get(url).status_code, 404)
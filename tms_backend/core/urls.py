@@ -4,9 +4,11 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserViewSet, ProjectViewSet, TaskViewSet, CommentViewSet,
-    RegisterView, ProfileView
+    RegisterView, ProfileView, MetricsView, SyncView, JWTLoginView, JWTRefreshView, JWTVerifyView, JWTLogoutView,
 )
 from rest_framework.authtoken.views import obtain_auth_token
+from .feeds import project_events
+from .async_views import AsyncProjectView, AsyncTaskView, AsyncCommentView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -19,4 +21,19 @@ urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', obtain_auth_token, name='login'),
     path('auth/profile/', ProfileView.as_view(), name='profile'),
+    path('auth/jwt/login/', JWTLoginView.as_view(), name='jwt-login'),  # Authorization: Bearer <access>
+    path('auth/jwt/refresh/', JWTRefreshView.as_view(), name='jwt-refresh'),
+    path('auth/jwt/verify/', JWTVerifyView.as_view(), name='jwt-verify'),
+    path('auth/jwt/logout/', JWTLogoutView.as_view(), name='jwt-logout'),
+    path('sync/', SyncView.as_view(), name='sync'),  # ?since=<watermark> delta sync
+    path('_metrics/', MetricsView.as_view(), name='metrics'),  # Admin only, Prometheus format
+    path('projects/<int:project_id>/events/', project_events, name='project-events'),  # SSE change feed
+
+    # ASGI-native read path (list/retrieve only)
+    path('async/projects/', AsyncProjectView.as_view(), name='async-project-list'),
+    path('async/projects/<int:pk>/', AsyncProjectView.as_view(), name='async-project-detail'),
+    path('async/tasks/', AsyncTaskView.as_view(), name='async-task-list'),
+    path('async/tasks/<int:pk>/', AsyncTaskView.as_view(), name='async-task-detail'),
+    path('async/comments/', AsyncCommentView.as_view(), name='async-comment-list'),
+    path('async/comments/<int:pk>/', AsyncCommentView.as_view(), name='async-comment-detail'),
 ]
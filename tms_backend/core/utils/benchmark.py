@@ -0,0 +1,209 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from django.db import connection
+
+from core.models import User, Project, Task, Comment
+
+
+# ------------------ BENCHMARK HELPERS ------------------
+# Shared by the benchmark_* management commands. Everything runs against a
+# throwaway test database so the real one is never seeded or modified.
+
+@contextmanager
+def throwaway_database(keepdb=False):
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def seed_dataset(users=10, projects=10, tasks=100, comments=0, members_per_project=5, batch_size=5000, log=None):
+    """
+    Bulk-insert a synthetic dataset: tasks and comments are spread round-robin over
+    projects, users and statuses. Returns the created users and projects.
+    """
+    statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+
+    user_objs = User.objects.bulk_create(
+        [User(username=f'bench_user_{i}', email=f'bench{i}@example.com', role=User.DEVELOPER, password='!')
+         for i in range(users)],
+        batch_size=batch_size,
+    )
+    project_objs = Project.objects.bulk_create(
+        [Project(name=f'Bench project {i}', description=f'Benchmark project number {i}', created_by=user_objs[0])
+         for i in range(projects)],
+        batch_size=batch_size,
+    )
+    Membership = Project.users.through
+    Membership.objects.bulk_create(
+        [Membership(project_id=project.id, user_id=user_objs[(p + m) % users].id)
+         for p, project in enumerate(project_objs) for m in range(min(members_per_project, users))],
+        batch_size=batch_size,
+    )
+
+    for start in range(0, tasks, batch_size):
+        Task.objects.bulk_create([
+            Task(
+                title=f'Task {i}',
+                description=f'Benchmark task {i} in status {statuses[i % len(statuses)]}',
+                project_id=project_objs[i % projects].id,
+                assigned_to_id=user_objs[i % users].id,
+                status=statuses[i % len(statuses)],
+                created_by_id=user_objs[(i + 1) % users].id,
+            )
+            for i in range(start, min(start + batch_size, tasks))
+        ])
+        if log:
+            log(f"  tasks: {min(start + batch_size, tasks)}/{tasks}")
+
+    if comments:
+        task_ids = list(Task.objects.order_by('id').values_list('id', 'project_id')[:max(1, min(tasks, comments))])
+        for start in range(0, comments, batch_size):
+            Comment.objects.bulk_create([
+                Comment(
+                    content=f'Benchmark comment {i}',
+                    task_id=task_ids[i % len(task_ids)][0],
+                    project_id=task_ids[i % len(task_ids)][1],
+                    user_id=user_objs[i % users].id,
+                    created_by_id=user_objs[i % users].id,
+                )
+                for i in range(start, min(start + batch_size, comments))
+            ])
+            if log:
+                log(f"  comments: {min(start + batch_size, comments)}/{comments}")
+
+    return user_objs, project_objs
+
+
+def time_call(fn, repeat=5):
+    """Run fn() `repeat` times and return the wall-clock durations in milliseconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(durations):
+    return {
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'mean_ms': round(statistics.fmean(durations), 3) if durations else 0.0,
+    }
+
+
+# ------------------ IN-PROCESS HTTP DRIVERS ------------------
+# Drive the WSGI and ASGI applications directly, without a server or sockets,
+# so the comparison measures the Django request path and nothing else.
+
+def wsgi_request(app, method, path, headers=None, body=None):
+    """`method` `path` through a WSGI app, with `body` sent as JSON; returns the status code."""
+    path, _, query = path.partition('?')
+    data = json.dumps(body).encode() if body is not None else b''
+    environ = {
+        'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_HOST': 'localhost',
+        'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(data)), 'wsgi.input': BytesIO(data),
+    }
+    for name, value in (headers or {}).items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    setup_testing_defaults(environ)
+    status = []
+    response = app(environ, lambda s, h, exc_info=None: status.append(s))
+    try:
+        b''.join(response)
+    finally:
+        getattr(response, 'close', lambda: None)()
+    return int(status[0].split()[0])
+
+
+def wsgi_get(app, path, headers=None):
+    """GET `path` through a WSGI app; returns the status code."""
+    return wsgi_request(app, 'GET', path, headers)
+
+
+async def asgi_get(app, path, headers=None):
+    """GET `path` through an ASGI app; returns the status code."""
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in {'Host': 'localhost', **(headers or {})}.items()],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    received = asyncio.Event()
+    status = []
+
+    async def receive():
+        if not received.is_set():
+            received.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Future()  # The client never disconnects
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_threaded(request, total, concurrency):
+    """
+    Issue `total` calls of request() from `concurrency` threads. Returns
+    (elapsed seconds, per-request latencies in ms, failed request count).
+    """
+    def timed(_):
+        start = time.perf_counter()
+        ok = request() < 400
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(total)))
+    return time.perf_counter() - start, [ms for ms, _ in results], sum(not ok for _, ok in results)
+
+
+async def run_concurrent(request, total, concurrency):
+    """Async counterpart of run_threaded: `concurrency` clients awaiting request() in turn."""
+    remaining = iter(range(total))
+    results = []
+
+    async def client():
+        for _ in remaining:
+            start = time.perf_counter()
+            ok = await request() < 400
+            results.append(((time.perf_counter() - start) * 1000, ok))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, [ms for ms, _ in results], sum(not ok for _, ok in results)
+
+
+class QueryCounter:
+    """connection.execute_wrapper hook counting the queries run on this thread."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
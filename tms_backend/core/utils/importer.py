@@ -0,0 +1,267 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
+
+from core.models import User, Project, Task, Comment
+from core.signals import bulk_post_save
+
+
+# ------------------ STREAMING READERS ------------------
+SECTIONS = {
+    'user': 'users', 'users': 'users',
+    'project': 'projects', 'projects': 'projects',
+    'task': 'tasks', 'tasks': 'tasks',
+    'comment': 'comments', 'comments': 'comments',
+}
+
+
+def iter_ndjson(fh):
+    """Yield (section, record) from NDJSON lines carrying a "type" key."""
+    for number, line in enumerate(fh, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        section = SECTIONS.get(record.pop('type', None))
+        if section is None:
+            raise ValueError(f"Line {number}: missing or unknown \"type\".")
+        yield section, record
+
+
+def iter_json_document(fh, chunk_size=1 << 16):
+    """
+    Yield (section, record) from a {"users": [...], "projects": [...], ...} document
+    one array element at a time, so the whole file is never held in memory.
+    Sections that are not lists (e.g. "api_endpoints") are skipped.
+    """
+    decoder = json.JSONDecoder()
+    state = {'buf': '', 'pos': 0, 'eof': False}
+
+    def fill():
+        data = fh.read(chunk_size)
+        state['buf'] = state['buf'][state['pos']:] + data
+        state['pos'] = 0
+        state['eof'] = not data
+
+    def peek():
+        while True:
+            buf, pos = state['buf'], state['pos']
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if state['eof']:
+                return ''
+            fill()
+
+    def expect(char):
+        if peek() != char:
+            raise ValueError(f"Expected '{char}' in JSON document.")
+        state['pos'] += 1
+
+    def value():
+        peek()
+        while True:
+            try:
+                result, end = decoder.raw_decode(state['buf'], state['pos'])
+                # A scalar ending exactly at the buffer edge may continue in the next chunk
+                if end < len(state['buf']) or state['eof']:
+                    state['pos'] = end
+                    return result
+            except json.JSONDecodeError:
+                if state['eof']:
+                    raise
+            fill()
+
+    expect('{')
+    while peek() != '}':
+        key = value()
+        expect(':')
+        if peek() == '[':
+            state['pos'] += 1
+            while peek() != ']':
+                record = value()
+                if key in SECTIONS:
+                    yield SECTIONS[key], record
+                if peek() == ',':
+                    state['pos'] += 1
+            expect(']')
+        else:
+            value()
+        if peek() == ',':
+            state['pos'] += 1
+    expect('}')
+
+
+def iter_records(path):
+    """Records from a .json document or, for any other extension, NDJSON."""
+    reader = iter_json_document if path.endswith('.json') else iter_ndjson
+    with open(path, encoding='utf-8') as fh:
+        yield from reader(fh)
+
+
+# ------------------ BULK LOADER ------------------
+class TMSDataLoader:
+    """
+    Buffers records per section and writes them with bulk_create. References are
+    1-based positions within their section (as in sample_data.json) and are
+    resolved in memory against the ids of rows already written.
+    """
+    ORDER = ['users', 'projects', 'tasks', 'comments']
+    # Accepts stored values and labels, in any case ("in_progress", "In Progress")
+    STATUS_VALUES = {
+        **{label.lower(): value for value, label in Task.STATUS_CHOICES},
+        **{value: value for value, _ in Task.STATUS_CHOICES},
+    }
+
+    def __init__(self, batch_size=5000, hash_passwords=True, hash_workers=0, send_signals=True):
+        self.batch_size = batch_size
+        self.hash_passwords = hash_passwords
+        self.hash_workers = hash_workers
+        self.send_signals = send_signals
+        self.pending = {section: [] for section in self.ORDER}
+        self.ids = {section: [] for section in self.ORDER}
+        self.task_project_ids = []
+        self.counts = Counter()
+        self.seconds = Counter()
+
+    def add(self, section, record):
+        self.pending[section].append(record)
+        if len(self.pending[section]) >= self.batch_size:
+            self.flush(section)
+
+    def finish(self):
+        for section in self.ORDER:
+            self.flush(section)
+
+    def flush(self, section):
+        # Everything a section can reference is written first
+        for dependency in self.ORDER[:self.ORDER.index(section)]:
+            if self.pending[dependency]:
+                self.flush(dependency)
+        records, self.pending[section] = self.pending[section], []
+        if not records:
+            return
+        start = time.perf_counter()
+        getattr(self, f'load_{section}')(records)
+        self.seconds[section] += time.perf_counter() - start
+        self.counts[section] += len(records)
+
+    def ref(self, section, position, required=False):
+        if position in (None, ''):
+            if required:
+                raise ValueError(f"Missing required reference to {section}.")
+            return None
+        position = int(position)
+        if not 1 <= position <= len(self.ids[section]):
+            raise ValueError(f"Reference to {section} #{position}, but only {len(self.ids[section])} loaded so far.")
+        return self.ids[section][position - 1]
+
+    def status(self, value, position):
+        if value in (None, ''):
+            return 'todo'
+        status = self.STATUS_VALUES.get(str(value).lower())
+        if status is None:
+            choices = ', '.join(value for value, _ in Task.STATUS_CHOICES)
+            raise ValueError(f"Task #{position}: unknown status {value!r}, expected one of {choices}.")
+        return status
+
+    def created(self, model, instances):
+        if self.send_signals:
+            bulk_post_save.send(sender=model, instances=instances, created=True)
+
+    def hash_all(self, passwords):
+        if not self.hash_passwords:
+            return [make_password(None)] * len(passwords)
+        if self.hash_workers > 1 and len(passwords) > 1:
+            with ProcessPoolExecutor(max_workers=self.hash_workers) as pool:
+                return list(pool.map(make_password, passwords, chunksize=64))
+        return [make_password(password) for password in passwords]
+
+    def load_users(self, records):
+        usernames = [record['username'] for record in records]
+        # Existing usernames are reused rather than duplicated
+        known = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        new_records, seen = [], set(known)
+        for record in records:
+            if record['username'] not in seen:
+                seen.add(record['username'])
+                new_records.append(record)
+
+        passwords = self.hash_all([record.get('password') for record in new_records])
+        users = User.objects.bulk_create([
+            User(
+                username=record['username'],
+                email=record.get('email', ''),
+                first_name=record.get('first_name', ''),
+                last_name=record.get('last_name', ''),
+                role=record.get('role') or User.DEVELOPER,
+                password=password,
+            )
+            for record, password in zip(new_records, passwords)
+        ], batch_size=self.batch_size)
+        # bulk_create skips the post_save receiver that issues tokens
+        Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users], batch_size=self.batch_size)
+        self.created(User, users)
+
+        known.update((user.username, user.id) for user in users)
+        self.ids['users'].extend(known[name] for name in usernames)
+
+    def load_projects(self, records):
+        projects = Project.objects.bulk_create([
+            Project(
+                name=record['name'],
+                description=record.get('description', ''),
+                created_by_id=self.ref('users', record.get('created_by')),
+            )
+            for record in records
+        ], batch_size=self.batch_size)
+
+        Membership = Project.users.through
+        Membership.objects.bulk_create([
+            Membership(project_id=project.id, user_id=self.ref('users', position, required=True))
+            for project, record in zip(projects, records)
+            for position in dict.fromkeys(record.get('user_ids', []))
+        ], batch_size=self.batch_size)
+        self.created(Project, projects)
+        self.ids['projects'].extend(project.id for project in projects)
+
+    def load_tasks(self, records):
+        first = len(self.ids['tasks']) + 1
+        tasks = Task.objects.bulk_create([
+            Task(
+                title=record['title'],
+                description=record.get('description', ''),
+                status=self.status(record.get('status'), position),
+                project_id=self.ref('projects', record.get('project'), required=True),
+                assigned_to_id=self.ref('users', record.get('assigned_to')),
+                created_by_id=self.ref('users', record.get('created_by'), required=True),
+            )
+            for position, record in enumerate(records, start=first)
+        ], batch_size=self.batch_size)
+        self.created(Task, tasks)
+        self.ids['tasks'].extend(task.id for task in tasks)
+        self.task_project_ids.extend(task.project_id for task in tasks)
+
+    def load_comments(self, records):
+        comments = []
+        for record in records:
+            task_position = int(record['task'])
+            task_id = self.ref('tasks', task_position, required=True)
+            user_id = self.ref('users', record.get('user'), required=True)
+            comments.append(Comment(
+                content=record['content'],
+                task_id=task_id,
+                project_id=self.task_project_ids[task_position - 1],  # Always the task's; any "project" is ignored
+                user_id=user_id,
+                created_by_id=self.ref('users', record.get('created_by')) or user_id,
+            ))
+        comments = Comment.objects.bulk_create(comments, batch_size=self.batch_size)
+        self.created(Comment, comments)
+        self.ids['comments'].extend(comment.id for comment in comments)
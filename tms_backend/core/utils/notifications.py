@@ -1,28 +1,23 @@
-import smtplib, os
+import smtplib, os, uuid
+from datetime import timedelta
 from email.message import EmailMessage
 from dotenv import load_dotenv
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Q
+from django.utils import timezone
+from core.models import QueuedEmail
 
 load_dotenv()
 
 EMAIL_ADDRESS = os.getenv('EMAIL_HOST_USER')
 EMAIL_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 
-def send_task_assignment_email(to_email, task_title, assigned_by):
-    try:
-        # Establish a connection to Gmail's SMTP server using SSL
-        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-
-        # Log in to your Gmail account
-        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-
-        # Create the email message
-        msg = EmailMessage()
-        msg['From'] = 'Task Management'
-        msg['To'] = to_email
-        msg['Subject'] = f"📌 New Task Assigned: {task_title}"
+def build_task_assignment_email(task_title, assigned_by):
+    subject = f"📌 New Task Assigned: {task_title}"
 
-        # Beautified email content
-        html_content = f"""
+    # Beautified email content
+    html_content = f"""
         <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 8px;">
@@ -46,6 +41,58 @@ def send_task_assignment_email(to_email, task_title, assigned_by):
         </body>
         </html>
         """
+    return subject, html_content
+
+
+def build_tasks_assignment_email(task_titles, assigned_by):
+    """One email covering several tasks assigned to the same person at once."""
+    if len(task_titles) == 1:
+        return build_task_assignment_email(task_titles[0], assigned_by)
+
+    subject = f"📌 {len(task_titles)} New Tasks Assigned"
+    task_items = "".join(
+        f'<li><strong style="color: #2F80ED;">{title}</strong></li>' for title in task_titles
+    )
+    html_content = f"""
+        <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px; border: 1px solid #e0e0e0; border-radius: 8px;">
+                <h2 style="color: #4CAF50;">🔔 Task Assignment Notification</h2>
+                <p>Hello,</p>
+                <p>
+                    You have been assigned {len(task_titles)} new tasks by <strong>{assigned_by}</strong>:
+                </p>
+                <ul>{task_items}</ul>
+                <p>
+                    Kindly log in to your Task Management Dashboard to view more details.
+                </p>
+                <a href="http://127.0.0.1:8000/api/auth/login/" style="display: inline-block; padding: 10px 15px; background-color: #4CAF50; color: white; text-decoration: none; border-radius: 4px;">
+                    View Tasks
+                </a>
+                <p style="margin-top: 30px; font-size: 12px; color: #999;">
+                    This is an automated message. Please do not reply to this email.
+                </p>
+            </div>
+        </body>
+        </html>
+        """
+    return subject, html_content
+
+
+def send_task_assignment_email(to_email, task_title, assigned_by):
+    try:
+        # Establish a connection to Gmail's SMTP server using SSL
+        server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
+
+        # Log in to your Gmail account
+        server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
+
+        # Create the email message
+        msg = EmailMessage()
+        msg['From'] = 'Task Management'
+        msg['To'] = to_email
+        subject, html_content = build_task_assignment_email(task_title, assigned_by)
+        msg['Subject'] = subject
 
         msg.add_alternative(html_content, subtype='html')
 
@@ -62,3 +109,146 @@ def send_task_assignment_email(to_email, task_title, assigned_by):
 
     except Exception as e:
         return {"status_code": 500, "message": f"Error: {str(e)}"}
+
+
+# ------------------ EMAIL OUTBOX ------------------
+# Requests only write a QueuedEmail row; the process_email_outbox worker delivers them.
+
+def queue_task_assignment_email(to_email, task_title, assigned_by):
+    """
+    Store the assignment email in the outbox. Call it inside the transaction that
+    saves the task so both commit (or roll back) together.
+    """
+    subject, html_content = build_task_assignment_email(task_title, assigned_by)
+    return QueuedEmail.objects.create(to_email=to_email, subject=subject, html_body=html_content)
+
+
+def queue_tasks_assignment_email(to_email, task_titles, assigned_by):
+    """Queue a single email for a batch of tasks assigned to the same person."""
+    subject, html_content = build_tasks_assignment_email(task_titles, assigned_by)
+    return QueuedEmail.objects.create(to_email=to_email, subject=subject, html_body=html_content)
+
+
+def outbox_setting(name):
+    defaults = {
+        'BATCH_SIZE': 50,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BACKOFF_SECONDS': 30,
+        'MAX_BACKOFF_SECONDS': 3600,
+        'LEASE_SECONDS': 300,
+    }
+    return getattr(settings, 'EMAIL_OUTBOX', {}).get(name, defaults[name])
+
+
+def claim_queued_emails(batch_size):
+    """
+    Lease up to batch_size due emails to this worker. Rows stuck in 'sending' after
+    a crashed worker become claimable again once their lease expires.
+    """
+    now = timezone.now()
+    due = (
+        QueuedEmail.objects
+        .filter(Q(status=QueuedEmail.PENDING) | Q(status=QueuedEmail.SENDING), next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    token = uuid.uuid4().hex
+    QueuedEmail.objects.filter(
+        Q(status=QueuedEmail.PENDING) | Q(status=QueuedEmail.SENDING),
+        id__in=list(due), next_attempt_at__lte=now,
+    ).update(
+        status=QueuedEmail.SENDING,
+        claim_token=token,
+        next_attempt_at=now + timedelta(seconds=outbox_setting('LEASE_SECONDS')),
+    )
+    return list(QueuedEmail.objects.filter(claim_token=token, status=QueuedEmail.SENDING).order_by('id'))
+
+
+def retry_delay(attempts):
+    delay = outbox_setting('RETRY_BACKOFF_SECONDS') * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, outbox_setting('MAX_BACKOFF_SECONDS')))
+
+
+def open_connection(connection):
+    """
+    Open `connection`, or make sure it still is: SMTP servers drop idle sessions,
+    and the backend's open() does nothing while it holds a (dead) socket.
+    """
+    smtp = getattr(connection, 'connection', None)
+    if smtp is not None:
+        try:
+            alive = smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            alive = False
+        if not alive:
+            connection.close()
+    connection.open()
+
+
+def release_queued_emails(emails):
+    """Hand claimed emails back to the queue, due now, without counting an attempt."""
+    QueuedEmail.objects.filter(id__in=[email.id for email in emails]).update(
+        status=QueuedEmail.PENDING, claim_token='', next_attempt_at=timezone.now(),
+    )
+
+
+def deliver_queued_emails(connection=None, batch_size=None):
+    """
+    Send one batch of due emails over a single reusable connection, opened (or
+    checked) only when something is due. Returns a dict with the number of
+    emails sent, rescheduled and given up on. If the connection can't be
+    opened, the batch goes back to the queue and the error is raised.
+    """
+    connection = connection or get_connection()
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    emails = claim_queued_emails(batch_size or outbox_setting('BATCH_SIZE'))
+    if not emails:
+        return result
+    try:
+        open_connection(connection)
+    except Exception:
+        release_queued_emails(emails)
+        raise
+
+    for email in emails:
+        msg = EmailMultiAlternatives(
+            subject=email.subject,
+            body='You have been assigned a new task.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email.to_email],
+            connection=connection,
+        )
+        msg.attach_alternative(email.html_body, 'text/html')
+        email.attempts += 1
+
+        try:
+            try:
+                connection.send_messages([msg])
+            except smtplib.SMTPServerDisconnected:
+                # Dropped since the check: reconnect and resend within the same attempt
+                connection.close()
+                connection.open()
+                connection.send_messages([msg])
+        except Exception as e:
+            email.last_error = str(e)
+            if email.attempts >= outbox_setting('MAX_ATTEMPTS'):
+                email.status = QueuedEmail.FAILED
+                result['failed'] += 1
+            else:
+                email.status = QueuedEmail.PENDING
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+                result['retried'] += 1
+            # A broken connection is reopened on the next send
+            if isinstance(e, smtplib.SMTPServerDisconnected):
+                connection.close()
+        else:
+            email.status = QueuedEmail.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ''
+            result['sent'] += 1
+
+        email.claim_token = ''
+        email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'claim_token', 'last_error', 'sent_at'])
+
+    return result
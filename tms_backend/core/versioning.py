@@ -0,0 +1,118 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import CollectionVersion
+
+
+# ------------------ COLLECTION VERSIONS ------------------
+def collection_name(model):
+    return model._meta.label_lower
+
+
+def bump_collection(*models):
+    """Advance the version of every given collection (one UPDATE each)."""
+    now = timezone.now()
+    for model in models:
+        name = collection_name(model)
+        if not CollectionVersion.objects.filter(name=name).update(version=F('version') + 1, updated_at=now):
+            CollectionVersion.objects.get_or_create(name=name, defaults={'version': 1, 'updated_at': now})
+
+
+def collection_versions(*models):
+    """
+    {name: (version, updated_at)} for the given collections in one query. Use
+    the pair as the generation: the timestamp keeps it unique even if a rolled
+    back transaction lets a counter value be reused.
+    """
+    names = [collection_name(model) for model in models]
+    found = {
+        name: (version, updated_at)
+        for name, version, updated_at in
+        CollectionVersion.objects.filter(name__in=names).values_list('name', 'version', 'updated_at')
+    }
+    return {name: found.get(name, (0, None)) for name in names}
+
+
+def touch(queryset):
+    """Bump updated_at on rows whose representation changed without a save() (M2M, related users)."""
+    return queryset.update(updated_at=timezone.now())
+
+
+# ------------------ CONDITIONAL GET ------------------
+def make_etag(*parts):
+    return quote_etag(hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest())
+
+
+def http_timestamp(value):
+    return timegm(value.utctimetuple()) if value else None
+
+
+class ConditionalGetMixin:
+    """
+    Answers If-None-Match / If-Modified-Since on list and retrieve with 304
+    before anything is serialized.
+
+    Lists are versioned by the CollectionVersion of `conditional_collections`
+    (defaults to the viewset's model), so checking one costs a single small
+    query. Details are versioned by the object's own updated_at, plus the other
+    collections when there are any (expanded relations). The ETag also
+    covers the representation fingerprint: full URL, role and media type.
+    """
+    conditional_collections = None
+
+    def get_conditional_collections(self):
+        return self.conditional_collections or [self.get_queryset().model]
+
+    def get_collection_versions(self):
+        # Looked up once per request; core.response_cache keys on them too
+        if getattr(self, '_collection_versions', None) is None:
+            self._collection_versions = collection_versions(*self.get_conditional_collections())
+        return self._collection_versions
+
+    def representation_fingerprint(self):
+        """Everything besides the data that shapes the response body."""
+        return (self.request.get_full_path(), getattr(self.request.user, 'role', None), self.request.accepted_media_type)
+
+    def not_modified(self, etag, last_modified):
+        """A 304 response if the request's validators still match, else None. last_modified is a Unix timestamp."""
+        response = get_conditional_response(self.request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            response['ETag'] = etag
+        return response
+
+    def with_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        versions = self.get_collection_versions()
+        etag = make_etag('list', sorted(versions.items()), *self.representation_fingerprint())
+        last_modified = http_timestamp(max((updated for _, updated in versions.values() if updated), default=None))
+        return self.not_modified(etag, last_modified) or self.with_validators(
+            super().list(request, *args, **kwargs), etag, last_modified,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        # Other collections the representation draws on (e.g. ?expand=) version it too
+        name = collection_name(type(instance))
+        others = [model for model in self.get_conditional_collections() if collection_name(model) != name]
+        related = sorted(collection_versions(*others).items()) if others else []
+        etag = make_etag('detail', name, instance.pk, instance.updated_at.isoformat(), related, *self.representation_fingerprint())
+        last_modified = http_timestamp(max(
+            [instance.updated_at] + [updated for _, (_, updated) in related if updated],
+        ))
+        response = self.not_modified(etag, last_modified)
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return self.with_validators(Response(serializer.data), etag, last_modified)
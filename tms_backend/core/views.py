@@ -2,22 +2,65 @@ from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import FilterSet, CharFilter
-from core.utils.notifications import send_task_assignment_email
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from core.utils.notifications import queue_task_assignment_email, queue_tasks_assignment_email
 
 from .models import User, Project, Task, Comment
 from .serializers import (
     UserSerializer, ProjectSerializer, TaskSerializer, CommentSerializer,
-    RegisterSerializer, ProfileSerializer
+    RegisterSerializer, ProfileSerializer, ProjectMembersSerializer, ClaimsTokenObtainPairSerializer,
+    ClaimsTokenRefreshSerializer, ClaimsTokenVerifySerializer, TokenRevokeSerializer,
 )
-from .permissions import IsAdminOrProjectManager, CanCreateEditDeleteProjects, CanCreateTasks, CanComment, IsAuthenticatedOrReadOnly
+from .permissions import IsAdminOrProjectManager, CanCreateEditDeleteProjects, CanCreateTasks, CanComment, IsAuthenticatedOrReadOnly, IsAdmin, IsProjectMember
+from .querysets import project_queryset, user_summary_queryset
+from .pagination import PageOrCursorPagination
+from .search import FullTextSearchFilter
+from .fields import prefetch_related_pks
+from .signals import bulk_post_save
+from .exceptions import BadRequestException, NotFoundException
+from .exports import EXPORT_CONTENT_TYPES, export_response
+from .stats import lock_counted_rows, project_stats
+from .versioning import ConditionalGetMixin
+from .response_cache import ResponseCacheMixin, response_cache
+from .fast_serializers import FastListMixin
+from .sparse_fields import SparseFieldsMixin
+from .visibility import VisibilityMixin
+from .purge import bulk_delete_tasks, soft_delete_project
+from .sync import changes_since
+from .metrics import registry as metrics_registry, render_response_cache_stats
+from .authentication import jwt_revocations
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt import views as jwt_views
+
+
+# ------------------ EXPORT ------------------
+class ExportMixin:
+    """
+    GET /api/<resource>/export/?output=ndjson|csv streams every row matching the
+    viewset's filters (same query params as the list endpoint), unpaginated.
+    """
+    export_chunk_size = 2000
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_CONTENT_TYPES:
+            raise BadRequestException(f"Unsupported export format '{output}'. Use one of: {', '.join(EXPORT_CONTENT_TYPES)}.")
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(queryset, output, filename=self.basename, chunk_size=self.export_chunk_size)
 
 
 # ------------------ USER VIEWSET ------------------
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    query_budget = {'list': 2, 'retrieve': 1}  # Max queries per action; see core.testing.QueryBudgetMixin
     permission_classes = [IsAdminOrProjectManager]  # Only admin and project manager can view/delete users
 
 
@@ -30,19 +73,56 @@ class ProjectFilter(FilterSet):
         model = Project
         fields = ['name', 'description']
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.all()
+class ProjectViewSet(VisibilityMixin, SparseFieldsMixin, ResponseCacheMixin, ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = project_queryset()
     serializer_class = ProjectSerializer
-    permission_classes = [CanCreateEditDeleteProjects, IsAuthenticatedOrReadOnly]  # Restrict actions to clients and developers for non-read operations
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    query_budget = {'list': 4, 'retrieve': 2, 'members': 3}
+    visibility_lookup = 'id'
+    permission_classes = [CanCreateEditDeleteProjects, IsAuthenticatedOrReadOnly, IsProjectMember]  # Restrict actions to clients and developers for non-read operations
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, FullTextSearchFilter]  # ?q= ranked search
     filterset_class = ProjectFilter
     search_fields = ['name', 'description']
 
+    # Hidden right away; purge_deleted_projects removes the rows in the background
+    def perform_destroy(self, instance):
+        soft_delete_project(instance)
+
+    # GET /api/projects/{id}/stats/ -> task counts per status and assignee, comment total.
+    # Served from the ProjectStat counters, so it never scans the task table.
+    @action(detail=True, methods=['get'], url_path='stats')
+    def stats(self, request, pk=None):
+        project = get_object_or_404(self.get_queryset().select_related(None).prefetch_related(None).only('id'), pk=pk)
+        self.check_object_permissions(request, project)
+        return Response(project_stats(project))
+
+    # GET    /api/projects/{id}/members/                     -> paginated members
+    # POST   /api/projects/{id}/members/  {"user_ids": [...]} -> add them (one bulk INSERT)
+    # DELETE /api/projects/{id}/members/  {"user_ids": [...]} -> remove them (one DELETE)
+    # Changes membership without sending or re-serializing the whole user_ids list.
+    @action(detail=True, methods=['get', 'post', 'delete'], url_path='members')
+    def members(self, request, pk=None):
+        project = get_object_or_404(self.get_queryset().select_related(None).prefetch_related(None).only('id'), pk=pk)
+        self.check_object_permissions(request, project)
+
+        if request.method == 'GET':
+            page = self.paginate_queryset(user_summary_queryset().filter(projects=project))
+            return self.get_paginated_response(UserSerializer(page, many=True).data)
+
+        serializer = ProjectMembersSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data['user_ids']
+        with transaction.atomic():
+            if request.method == 'POST':
+                project.users.add(*users)
+            else:
+                project.users.remove(*users)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
 
 # ------------------ TASK VIEWSET + FILTER ------------------
 class TaskFilter(FilterSet):
     title = CharFilter(field_name='title', lookup_expr='icontains')
-    status = CharFilter(field_name='status', lookup_expr='icontains')
+    status = CharFilter(field_name='status', lookup_expr='exact')  # One of Task.STATUS_CHOICES; seeks core_task_proj_status_idx
     assigned_to = CharFilter(field_name='assigned_to__username', lookup_expr='icontains')
     project = CharFilter(field_name='project__id', lookup_expr='exact')
 
@@ -51,52 +131,172 @@ class TaskFilter(FilterSet):
         fields = ['title', 'status', 'assigned_to', 'project']
 
 
-class TaskViewSet(viewsets.ModelViewSet):
-    queryset = Task.objects.all()
+class TaskViewSet(VisibilityMixin, SparseFieldsMixin, ResponseCacheMixin, ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.order_by('id')  # Stable pages; ?q= and cursor pagination reorder
     serializer_class = TaskSerializer
-    permission_classes = [CanCreateTasks, IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    query_budget = {'list': 3, 'retrieve': 1, 'bulk_destroy': 19}
+    permission_classes = [CanCreateTasks, IsAuthenticatedOrReadOnly, IsProjectMember]
+    pagination_class = PageOrCursorPagination  # ?pagination=cursor for keyset paging
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, FullTextSearchFilter]
     filterset_class = TaskFilter
     search_fields = ['title', 'description']
 
+    # Assignment emails go to the outbox in the same transaction as the task;
+    # the process_email_outbox worker sends them outside the request.
+    @transaction.atomic
     def perform_create(self, serializer):
         task = serializer.save(created_by=self.request.user)
         if task.assigned_to and task.assigned_to.email:
-            send_task_assignment_email(
+            queue_task_assignment_email(
                 to_email=task.assigned_to.email,
                 task_title=task.title,
                 assigned_by=self.request.user.username
             )
 
+    @transaction.atomic
     def perform_update(self, serializer):
-        old_task = self.get_object()
+        old_assigned_to_id = serializer.instance.assigned_to_id
         new_task = serializer.save()
 
-        if old_task.assigned_to != new_task.assigned_to:
+        if old_assigned_to_id != new_task.assigned_to_id:
             if new_task.assigned_to and new_task.assigned_to.email:
-                send_task_assignment_email(
+                queue_task_assignment_email(
                     to_email=new_task.assigned_to.email,
                     task_title=new_task.title,
                     assigned_by=self.request.user.username
                 )
 
+    # ------------------ BULK ENDPOINTS ------------------
+    # POST   /api/tasks/bulk/  [{task}, ...]            -> one INSERT for all tasks
+    # PATCH  /api/tasks/bulk/  [{"id": 1, ...}, ...]    -> one UPDATE per changed column set
+    # DELETE /api/tasks/bulk/  {"ids": [1, 2, ...]}
+    bulk_max_items = 1000
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'DELETE':
+            return self.bulk_destroy(request)
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise BadRequestException("Expected a non-empty list of tasks.")
+        if len(items) > self.bulk_max_items:
+            raise BadRequestException(f"At most {self.bulk_max_items} tasks can be sent at once.")
+
+        if request.method == 'POST':
+            return self.bulk_create(request, items)
+        return self.bulk_update(request, items)
+
+    def bulk_serializer_context(self, items):
+        context = self.get_serializer_context()
+        context['prefetched'] = prefetch_related_pks(self.get_serializer(), items)
+        return context
+
+    def bulk_create(self, request, items):
+        serializer = self.get_serializer(data=items, many=True, context=self.bulk_serializer_context(items))
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            tasks = serializer.save(created_by=request.user)
+            self.queue_bulk_assignment_emails(tasks)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, items):
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        if any(not isinstance(pk, int) for pk in ids) or len(set(ids)) != len(ids):
+            raise BadRequestException("Every task needs a unique integer id.")
+
+        instances = self.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            raise NotFoundException(f"Tasks not found: {missing}")
+
+        context = self.bulk_serializer_context(items)
+        task_serializers, errors = [], []
+        for item in items:
+            serializer = self.get_serializer(instances[item['id']], data=item, partial=True, context=context)
+            serializer.is_valid()
+            task_serializers.append(serializer)
+            errors.append(serializer.errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        newly_assigned, changed_fields = [], set()
+        for serializer in task_serializers:
+            task = serializer.instance
+            old_assigned_to_id = task.assigned_to_id
+            for attr, value in serializer.validated_data.items():
+                setattr(task, attr, value)
+                changed_fields.add(attr)
+            if task.assigned_to_id != old_assigned_to_id:
+                newly_assigned.append(task)
+
+        tasks = [serializer.instance for serializer in task_serializers]
+        with transaction.atomic():
+            if changed_fields:
+                # Diff the counters against the rows as stored now (see core.stats)
+                lock_counted_rows(Task, tasks)
+                # bulk_update doesn't apply auto_now
+                now = timezone.now()
+                for task in tasks:
+                    task.updated_at = now
+                Task.objects.bulk_update(tasks, sorted(changed_fields) + ['updated_at'], batch_size=500)
+                bulk_post_save.send(sender=Task, instances=tasks, created=False)
+            self.queue_bulk_assignment_emails(newly_assigned)
+
+        return Response([serializer.data for serializer in task_serializers])
+
+    def bulk_destroy(self, request):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        if not isinstance(ids, list) or not ids or any(not isinstance(pk, int) for pk in ids):
+            raise BadRequestException("Expected {\"ids\": [...]} with integer task ids.")
+        if len(ids) > self.bulk_max_items:
+            raise BadRequestException(f"At most {self.bulk_max_items} tasks can be deleted at once.")
+
+        queryset = self.get_queryset().filter(id__in=ids)
+        found = set(queryset.values_list('id', flat=True))
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise NotFoundException(f"Tasks not found: {missing}")
+
+        # Batched plain DELETEs with one bulk_post_delete each, not per-row signals
+        with transaction.atomic():
+            bulk_delete_tasks(Task.objects.filter(id__in=found))
+        return Response({'deleted': len(found)}, status=status.HTTP_200_OK)
+
+    def queue_bulk_assignment_emails(self, tasks):
+        # One email per assignee, however many of their tasks are in the batch
+        titles_by_assignee = {}
+        for task in tasks:
+            if task.assigned_to and task.assigned_to.email:
+                titles_by_assignee.setdefault(task.assigned_to.email, []).append(task.title)
+        for email, titles in titles_by_assignee.items():
+            queue_tasks_assignment_email(
+                to_email=email,
+                task_titles=titles,
+                assigned_by=self.request.user.username
+            )
+
 
 # ------------------ COMMENT VIEWSET + FILTER ------------------
 class CommentFilter(FilterSet):
     content = CharFilter(field_name='content', lookup_expr='icontains')
     task = CharFilter(field_name='task__id', lookup_expr='exact')
     user = CharFilter(field_name='user__id', lookup_expr='exact')
-    project = CharFilter(field_name='task__project__id', lookup_expr='exact')
+    project = CharFilter(field_name='project_id', lookup_expr='exact')  # Denormalized column, no join to core_task
 
     class Meta:
         model = Comment
         fields = ['content', 'task', 'user', 'project']
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+class CommentViewSet(VisibilityMixin, SparseFieldsMixin, ResponseCacheMixin, ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.order_by('id')  # Stable pages; ?q= and cursor pagination reorder
     serializer_class = CommentSerializer
-    permission_classes = [CanComment]  # All users can create comments
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    query_budget = {'list': 3, 'retrieve': 1}
+    permission_classes = [CanComment, IsProjectMember]  # All users can comment on their projects' tasks
+    pagination_class = PageOrCursorPagination  # ?pagination=cursor for keyset paging
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, FullTextSearchFilter]
     filterset_class = CommentFilter
     search_fields = ['content']
 
@@ -122,3 +322,67 @@ class ProfileView(APIView):
     def get(self, request):
         serializer = ProfileSerializer(request.user)
         return Response(serializer.data)
+
+
+# ------------------ DELTA SYNC ------------------
+# GET /api/sync/?since=<watermark> -> what changed since the client's last sync (see core.sync)
+class SyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        changes = changes_since(request.user, request.query_params.get('since'))
+        context = {'request': request}
+        return Response({
+            'watermark': changes['watermark'],
+            'full': changes['full'],
+            'has_more': changes['has_more'],
+            'projects': ProjectSerializer(changes['projects'], many=True, context=context).data,
+            'tasks': TaskSerializer(changes['tasks'], many=True, context=context).data,
+            'comments': CommentSerializer(changes['comments'], many=True, context=context).data,
+            'deleted': changes['deleted'],
+        })
+
+
+# ------------------ JWT ------------------
+# Alongside /api/auth/login/: access tokens carry the user's role (see core.authentication)
+class JWTLoginView(jwt_views.TokenObtainPairView):
+    serializer_class = ClaimsTokenObtainPairSerializer
+
+
+class JWTRefreshView(jwt_views.TokenRefreshView):
+    serializer_class = ClaimsTokenRefreshSerializer
+
+
+class JWTVerifyView(jwt_views.TokenVerifyView):
+    serializer_class = ClaimsTokenVerifySerializer
+
+
+class JWTLogoutView(APIView):
+    """
+    POST /api/auth/jwt/logout/ {"refresh": "..."} -> revokes the user's access
+    tokens (clients on other devices refresh once) and, if given, the refresh
+    token, until it expires.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if isinstance(request.auth, AccessToken):
+            jwt_revocations.revoke_user(request.user.pk)
+        if serializer.validated_data.get('refresh'):
+            jwt_revocations.revoke(serializer.validated_data['refresh'])
+        return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
+# ------------------ METRICS ------------------
+class MetricsView(APIView):
+    """
+    GET /api/_metrics/ -> Prometheus text: per-route histograms recorded by
+    core.metrics.MetricsMiddleware (when enabled) and response cache counters.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        body = metrics_registry.render() + render_response_cache_stats(response_cache.stats())
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
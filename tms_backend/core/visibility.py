@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import serializers
+
+from .models import Project
+
+
+def visibility_setting(name):
+    defaults = {
+        'UNSCOPED_ROLES': ['Admin', 'Project Manager'],  # See every project; other roles only their own
+        'TTL': 300,             # Seconds a cached project-id set is trusted
+        'SHARED_CACHE': 'default',  # CACHES alias shared by all workers (see core.checks)
+    }
+    return getattr(settings, 'VISIBILITY', {}).get(name, defaults[name])
+
+
+# ------------------ ROLE-SCOPED VISIBILITY ------------------
+# Admins, Project Managers and superusers see everything. Everyone else sees the
+# projects they are a member of (Project.users) and those projects' tasks and
+# comments. Querysets are narrowed in SQL with one subquery on the membership
+# table's user_id index; object checks and cache keys use the user's project-id
+# set, cached per user and invalidated by the membership receivers in core.signals.
+
+def is_scoped(user):
+    if not user.is_authenticated:
+        return True
+    return not (user.is_superuser or user.role in visibility_setting('UNSCOPED_ROLES'))
+
+
+def member_project_ids(user_id):
+    """Subquery of the ids of the projects `user_id` is a member of."""
+    return Project.users.through.objects.filter(user_id=user_id).values('project_id')
+
+
+def scope_queryset(queryset, user, lookup):
+    """Rows of `queryset` whose `lookup` (a project id column) is visible to `user`."""
+    if not is_scoped(user):
+        return queryset
+    if not user.is_authenticated:
+        return queryset.none()
+    return queryset.filter(**{f'{lookup}__in': member_project_ids(user.pk)})
+
+
+class VisibleProjectsCache:
+    """
+    Per-user frozenset of visible project ids: an in-process dict with a TTL,
+    plus the SHARED_CACHE alias unless it is set to None. As in core.authentication.TokenCache,
+    every user then has a version stamp in the shared cache; invalidating
+    replaces it, and local entries stored under an older stamp are reloaded,
+    so invalidations reach every worker.
+    """
+
+    def __init__(self):
+        self._entries = {}  # user id -> (project ids, expires_at, user version)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        alias = visibility_setting('SHARED_CACHE')
+        return caches[alias] if alias else None
+
+    def _key(self, user_id):
+        return f'tms:visible-projects:{user_id}'
+
+    def _version_key(self, user_id):
+        return f'tms:visible-projects-version:{user_id}'
+
+    def _user_version(self, user_id):
+        return self.shared.get(self._version_key(user_id)) if self.shared else None
+
+    def get(self, user_id):
+        version = self._user_version(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > time.monotonic() and entry[2] == version:
+            return entry[0]
+
+        cached = self.shared.get(self._key(user_id)) if self.shared else None
+        if cached is not None and cached[1] == version:
+            ids = cached[0]
+        else:
+            ids = frozenset(member_project_ids(user_id).values_list('project_id', flat=True))
+            if self.shared:
+                self.shared.set(self._key(user_id), (ids, version), visibility_setting('TTL'))
+        with self._lock:
+            self._entries[user_id] = (ids, time.monotonic() + visibility_setting('TTL'), version)
+        return ids
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        if self.shared:
+            self.shared.set_many({self._version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+visible_projects = VisibleProjectsCache()
+
+
+def visible_project_ids(user):
+    """The user's visible project ids, or None when they see every project."""
+    if not is_scoped(user):
+        return None
+    if not user.is_authenticated:
+        return frozenset()
+    return visible_projects.get(user.pk)
+
+
+def project_id_of(obj):
+    return obj.pk if isinstance(obj, Project) else obj.project_id
+
+
+def validate_visible_project(context, project_id, pk):
+    """
+    Serializer-side check for writes that point at a project (directly or via a
+    task): projects the user can't see are reported like missing rows.
+    """
+    request = context.get('request')
+    if request is None:
+        return
+    visible = visible_project_ids(request.user)
+    if visible is not None and project_id not in visible:
+        raise serializers.ValidationError(f'Invalid pk "{pk}" - object does not exist.')
+
+
+class VisibilityMixin:
+    """
+    Viewset side: narrows get_queryset() to the user's projects (through
+    `visibility_lookup`) and, for scoped users, adds the user and their
+    project-id set to the representation fingerprint behind ETags and the
+    response cache, so nobody is served someone else's rows.
+    """
+    visibility_lookup = 'project_id'
+
+    def get_queryset(self):
+        return scope_queryset(super().get_queryset(), self.request.user, self.visibility_lookup)
+
+    def representation_fingerprint(self):
+        fingerprint = super().representation_fingerprint()
+        visible = visible_project_ids(self.request.user)
+        if visible is None:
+            return fingerprint
+        return fingerprint + (self.request.user.pk, tuple(sorted(visible)))
@@ -10,7 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from datetime import timedelta
 from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -45,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',  # No-op unless METRICS['ENABLED']
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -139,14 +145,111 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 AUTH_USER_MODEL = 'core.User'
 
+# Token lookups are cached in-process and in the SHARED_CACHE alias, which must be
+# shared by all workers (e.g. Redis/Memcached) so invalidations reach all of them;
+# check --deploy fails while it is per process (core.checks).
+TOKEN_AUTH_CACHE = {
+    'TTL': 300,
+    'MAX_SIZE': 10000,
+    'SHARED_CACHE': 'default',
+}
+
+# JWT login alongside token login (/api/auth/jwt/...). Access tokens are short-lived
+# because they are trusted without a database lookup. Revocations are stored in the
+# database, and each user's revocation stamp is cached in the SHARED_CACHE alias so
+# every worker sees a revocation at once (checked by check --deploy). With None,
+# each worker keeps stamps for TTL seconds instead.
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+    'UPDATE_LAST_LOGIN': False,
+}
+
+JWT_REVOCATION = {
+    'TTL': 30,
+    'SHARED_CACHE': 'default',
+}
+
+# Roles outside UNSCOPED_ROLES only see projects they are a member of, and those
+# projects' tasks and comments (core.visibility). Each user's project ids are
+# cached per process and versioned in SHARED_CACHE, which must be shared by all
+# workers for membership changes to reach them at once (checked by check --deploy).
+VISIBILITY = {
+    'UNSCOPED_ROLES': ['Admin', 'Project Manager'],
+    'TTL': 300,
+    'SHARED_CACHE': 'default',
+}
+
+# Rendered list/detail responses are cached per process, keyed by the collection
+# versions they were built from (see core.response_cache).
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'MAX_BYTES': 32 * 1024 * 1024,
+    'MAX_ENTRY_BYTES': 1024 * 1024,
+}
+
+# Per-route query count / DB time / serialization time / latency histograms,
+# exposed to admins at /api/_metrics/. Costs a little per request, so opt-in.
+METRICS = {
+    'ENABLED': False,
+    'LATENCY_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    'QUERY_BUCKETS': (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+}
+
+# List endpoints of projects, tasks and comments build their results from
+# values() rows instead of a serializer instance per row (core.fast_serializers).
+FAST_SERIALIZATION = {
+    'ENABLED': True,
+}
+
+# Task/comment change feed (/api/projects/{id}/events/ and /ws/projects/{id}/).
+# The in-process broker only reaches clients connected to the same process.
+CHANGE_FEED = {
+    'BROKER': 'core.events.InProcessBroker',
+    'HISTORY': 1000,
+    'QUEUE_SIZE': 1000,
+    'KEEPALIVE': 15,
+}
+
+# Delta sync (/api/sync/, core.sync): at most about PAGE_SIZE changed rows per
+# resource per call; clients call again while has_more is true.
+SYNC = {
+    'PAGE_SIZE': 500,
+}
+
+# Email delivery
+# Task assignment emails are queued in core.QueuedEmail and sent by
+# `python manage.py process_email_outbox`, which keeps one SMTP connection open.
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = 'smtp.gmail.com'
+EMAIL_PORT = 465
+EMAIL_USE_SSL = True
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+DEFAULT_FROM_EMAIL = f'Task Management <{EMAIL_HOST_USER}>' if EMAIL_HOST_USER else 'Task Management <noreply@localhost>'
+
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,             # Emails claimed per worker iteration
+    'MAX_ATTEMPTS': 5,            # Give up (status 'failed') after this many tries
+    'RETRY_BACKOFF_SECONDS': 30,  # Doubled after every failed attempt
+    'MAX_BACKOFF_SECONDS': 3600,
+    'LEASE_SECONDS': 300,         # A claimed email is retried if its worker dies
+}